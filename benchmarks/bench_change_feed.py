@@ -0,0 +1,59 @@
+"""Benchmark resource change fan-out to many subscribed sessions.
+
+S sessions (default 5,000) each subscribe to ``tasks://list?filter=all``
+and their own ``task://{id}``. A burst of W writes (default 100), each
+touching one task and the list, is published, and the time until every
+notification is delivered is reported, with the number sent. Each delivery
+yields to the event loop, as writing to a session stream does.
+
+Without coalescing the burst would send W notifications per list subscriber.
+
+Run with: python -m benchmarks.bench_change_feed [S] [W]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from src.database.changes import ChangeFeed, list_uri, task_uri
+
+
+async def main(sessions: int, writes: int) -> None:
+    feed = ChangeFeed(window=0.01)
+    delivered = 0
+    done = asyncio.Event()
+    expected = sessions + min(writes, sessions)
+
+    async def deliver(uri: str) -> None:
+        nonlocal delivered
+        await asyncio.sleep(0)
+        delivered += 1
+        if delivered == expected:
+            done.set()
+
+    for i in range(sessions):
+        feed.subscribe(i, list_uri(), deliver)
+        feed.subscribe(i, task_uri(i), deliver)
+
+    start = time.perf_counter()
+    for i in range(writes):
+        feed.publish((task_uri(i), list_uri()))
+    published = time.perf_counter() - start
+    await asyncio.wait_for(done.wait(), 60)
+    elapsed = time.perf_counter() - start - feed.window
+
+    print(f"{sessions} sessions, {writes} writes in one burst")
+    print(f"  publish          {published / writes * 1e6:>10.1f} us per write")
+    print(f"  fan-out          {elapsed * 1e3:>10.1f} ms after the window")
+    print(f"  notifications    {delivered:>10} (uncoalesced: {sessions * writes + min(writes, sessions)})")
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 5_000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+        )
+    )
@@ -0,0 +1,69 @@
+"""Benchmark compression CPU cost against bytes saved for list_tasks responses.
+
+Encodes a list_tasks response at several list sizes and compresses it with
+every encoding installed here: gzip at levels 1, 6 and 9, plus brotli and
+zstd at their default levels when available. Reports the compressed size,
+the ratio, and the time per response. A response below COMPRESSION_MIN_SIZE
+is sent uncompressed, so the smallest size shows what that threshold avoids.
+
+Run with: python -m benchmarks.bench_compression
+"""
+
+from __future__ import annotations
+
+import functools
+import timeit
+from collections.abc import Callable
+
+from src.compression import ENCODERS, Encoder, GzipEncoder
+from src.tools.encoding import encode_stdlib
+
+SIZES = (5, 50, 500, 5_000)
+
+
+def _response(n: int) -> bytes:
+    tasks = [
+        {
+            "id": i,
+            "title": f"Task {i}: follow up on item {i * 7 % 113}",
+            "completed": i % 3 == 0,
+            "created_at": f"2025-01-{i % 28 + 1:02d}T09:{i % 60:02d}:00",
+            "parent_id": None if i % 4 == 0 else i - i % 4,
+        }
+        for i in range(1, n + 1)
+    ]
+    return encode_stdlib({"tasks": tasks, "total": n, "filter_applied": "all"}).encode()
+
+
+def _codecs() -> dict[str, Callable[[], Encoder]]:
+    codecs: dict[str, Callable[[], Encoder]] = {
+        f"gzip-{level}": lambda level=level: GzipEncoder(level) for level in (1, 6, 9)
+    }
+    for name in ("br", "zstd"):
+        if name in ENCODERS:
+            codecs[name] = ENCODERS[name]
+    return codecs
+
+
+def _compress(factory: Callable[[], Encoder], body: bytes) -> bytes:
+    encoder = factory()
+    return encoder.compress(body) + encoder.finish()
+
+
+def main() -> None:
+    print(f"{'tasks':>6}{'codec':>9}{'bytes':>10}{'->':>4}{'bytes':>9}{'ratio':>8}{'us':>10}{'MB/s':>9}")
+    for n in SIZES:
+        body = _response(n)
+        for name, factory in _codecs().items():
+            compressed = _compress(factory, body)
+            number = max(1, 200_000 // len(body))
+            seconds = min(timeit.repeat(functools.partial(_compress, factory, body), number=number, repeat=5)) / number
+            print(
+                f"{n:>6}{name:>9}{len(body):>10}{'':>4}{len(compressed):>9}"
+                f"{len(body) / len(compressed):>8.1f}{seconds * 1e6:>10.1f}"
+                f"{len(body) / seconds / 1e6:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Benchmark tools/call throughput over HTTP in stateful and stateless modes.
+
+Starts the server under uvicorn once per mode, each on a fresh database
+seeded with a few tasks, then sends N list_tasks calls (default 2,000) from
+C concurrent clients (default 16) and reports calls per second and latency.
+
+- stateful-sse: the default; one initialized MCP session per client and
+  SSE-framed responses.
+- stateless-sse: no MCP sessions; every POST stands alone.
+- stateless-json: no MCP sessions and plain JSON responses.
+
+Run with: python -m benchmarks.bench_http_modes [N] [C]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+MODES = {
+    "stateful-sse": {"MCP_STATELESS_HTTP": "false", "MCP_JSON_RESPONSE": "false"},
+    "stateless-sse": {"MCP_STATELESS_HTTP": "true", "MCP_JSON_RESPONSE": "false"},
+    "stateless-json": {"MCP_STATELESS_HTTP": "true", "MCP_JSON_RESPONSE": "true"},
+}
+HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+PROTOCOL_VERSION = "2025-06-18"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _message(body: str) -> dict[str, Any]:
+    """Return the JSON-RPC message in a JSON or SSE response body."""
+    if body.lstrip().startswith("{"):
+        return json.loads(body)
+    data = [line[5:].strip() for line in body.splitlines() if line.startswith("data:")]
+    return json.loads(data[-1])
+
+
+async def _open_session(client: httpx.AsyncClient, url: str, stateful: bool) -> dict[str, str]:
+    headers = dict(HEADERS)
+    if not stateful:
+        return headers
+    response = await client.post(
+        url,
+        headers=headers,
+        json={
+            "jsonrpc": "2.0",
+            "id": 0,
+            "method": "initialize",
+            "params": {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "bench", "version": "1"},
+            },
+        },
+    )
+    headers["mcp-session-id"] = response.headers["mcp-session-id"]
+    headers["mcp-protocol-version"] = PROTOCOL_VERSION
+    await client.post(url, headers=headers, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+    return headers
+
+
+async def _client(url: str, stateful: bool, calls: int, latencies: list[float]) -> None:
+    async with httpx.AsyncClient(timeout=30) as client:
+        headers = await _open_session(client, url, stateful)
+        for i in range(calls):
+            start = time.perf_counter()
+            response = await client.post(
+                url,
+                headers=headers,
+                json={
+                    "jsonrpc": "2.0",
+                    "id": i + 1,
+                    "method": "tools/call",
+                    "params": {"name": "list_tasks", "arguments": {}},
+                },
+            )
+            message = _message(response.text)
+            if "error" in message or message["result"].get("isError"):
+                raise RuntimeError(f"call failed: {message}")
+            latencies.append(time.perf_counter() - start)
+
+
+async def _wait_ready(base: str) -> None:
+    async with httpx.AsyncClient() as client:
+        for _ in range(200):
+            try:
+                if (await client.get(f"{base}/readyz")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.05)
+    raise RuntimeError("server did not become ready")
+
+
+async def _seed(base: str, stateful: bool) -> None:
+    async with httpx.AsyncClient() as client:
+        headers = await _open_session(client, f"{base}/mcp", stateful)
+        for i in range(20):
+            await client.post(
+                f"{base}/mcp",
+                headers=headers,
+                json={
+                    "jsonrpc": "2.0",
+                    "id": i,
+                    "method": "tools/call",
+                    "params": {"name": "add_task", "arguments": {"title": f"Task {i}"}},
+                },
+            )
+
+
+async def run_mode(name: str, env: dict[str, str], calls: int, concurrency: int) -> None:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        server = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "uvicorn", "src.server:app",
+            "--port", str(port), "--log-level", "warning",
+            env={
+                **os.environ,
+                **env,
+                "DATABASE_PATH": str(Path(tmp) / "bench.db"),
+                "LOG_LEVEL": "WARNING",
+                "ADMISSION_SESSION_RATE": "0",
+            },
+        )
+        try:
+            await _wait_ready(base)
+            stateful = env["MCP_STATELESS_HTTP"] == "false"
+            await _seed(base, stateful)
+            latencies: list[float] = []
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(_client(f"{base}/mcp", stateful, calls // concurrency, latencies) for _ in range(concurrency))
+            )
+            elapsed = time.perf_counter() - start
+        finally:
+            server.terminate()
+            await server.wait()
+
+    latencies.sort()
+    print(
+        f"{name:<16}{len(latencies) / elapsed:>10.0f} calls/s"
+        f"{statistics.median(latencies) * 1e3:>10.2f} ms p50"
+        f"{latencies[int(len(latencies) * 0.99)] * 1e3:>10.2f} ms p99"
+    )
+
+
+async def main(calls: int, concurrency: int) -> None:
+    print(f"{calls} list_tasks calls, {concurrency} concurrent clients")
+    for name, env in MODES.items():
+        await run_mode(name, env, calls, concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 2_000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 16,
+        )
+    )
@@ -0,0 +1,115 @@
+"""Benchmark rendering large task lists with and without the fragment cache.
+
+Renders a list card and a hierarchy card of N tasks (default 10,000):
+
+- uncached: every title escaped and every fragment formatted, as before
+  the cache existed.
+- cold: the cache starts empty, so every fragment is rendered and stored.
+- warm: every fragment is already cached.
+- 1% edited: warm, except that one task in a hundred changed its title.
+
+Then compares the whole list card with a windowed first page and with the
+card streamed piece by piece, by time and by peak memory allocated.
+
+Run with: python -m benchmarks.bench_render [N]
+"""
+
+from __future__ import annotations
+
+import functools
+import sys
+import timeit
+import tracemalloc
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from src.ui import components
+from src.ui.components import (
+    iter_task_list,
+    render_task_hierarchy,
+    render_task_list,
+    render_task_window,
+)
+
+REPEAT = 5
+NUMBER = 10
+
+
+def _tasks(count: int, suffix: str = "") -> list[dict[str, Any]]:
+    return [
+        {
+            "id": i,
+            "title": f"Follow up with <vendor> & review quote #{i}{suffix}",
+            "completed": i % 3 == 0,
+            "created_at": "2026-01-01T00:00:00Z",
+            "parent_id": None,
+        }
+        for i in range(count)
+    ]
+
+
+def _edit(tasks: list[dict[str, Any]], version: int) -> list[dict[str, Any]]:
+    """Return ``tasks`` with a fresh title on every hundredth task."""
+    edited = list(tasks)
+    for i in range(0, len(tasks), 100):
+        edited[i] = {**tasks[i], "title": f"{tasks[i]['title']} (edit {version})"}
+    return edited
+
+
+def _time(fn: Callable[[], object], setup: Callable[[], object] = lambda: None) -> float:
+    def run() -> None:
+        setup()
+        fn()
+
+    return min(timeit.repeat(run, number=NUMBER, repeat=REPEAT)) / NUMBER
+
+
+def _peak(fn: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _drain(pieces: Iterable[str]) -> int:
+    return sum(len(piece) for piece in pieces)
+
+
+def main(count: int) -> None:
+    tasks = _tasks(count)
+    renders = {
+        "list": lambda items: render_task_list(items, styles="none"),
+        "hierarchy": lambda items: render_task_hierarchy(items[0], items, styles="none"),
+    }
+    cached = components._fragment
+    print(f"{count} tasks, fragment cache of {cached.cache_info().maxsize}")
+    for name, render in renders.items():
+        components._fragment = cached.__wrapped__  # type: ignore[assignment]
+        try:
+            uncached = _time(functools.partial(render, tasks))
+        finally:
+            components._fragment = cached
+        cold = _time(functools.partial(render, tasks), setup=cached.cache_clear)
+        render(tasks)
+        warm = _time(functools.partial(render, tasks))
+        versions = iter([_edit(tasks, n) for n in range(REPEAT * NUMBER)])
+        partial = _time(lambda render=render, versions=versions: render(next(versions)))
+        print(
+            f"  {name:<10} uncached {uncached * 1e3:6.2f} ms   cold {cold * 1e3:6.2f} ms"
+            f"   warm {warm * 1e3:6.2f} ms   1% edited {partial * 1e3:6.2f} ms"
+        )
+
+    outputs = {
+        "whole": lambda: render_task_list(tasks, styles="none"),
+        "window": lambda: render_task_window(tasks, styles="none"),
+        "stream": lambda: _drain(iter_task_list(iter(tasks), count=count, styles="none")),
+    }
+    for name, render in outputs.items():
+        render()
+        print(f"  {name:<10} warm {_time(render) * 1e3:6.2f} ms   peak {_peak(render) / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
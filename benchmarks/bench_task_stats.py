@@ -0,0 +1,71 @@
+"""Benchmark task_stats against an equivalent GROUP BY over the tasks table.
+
+Populates a temporary database with N tasks (default 1,000,000) spread over
+parents and days, then times TaskRepository.get_stats, which reads the
+trigger-maintained aggregates, against computing the same totals directly.
+
+Run with: python -m benchmarks.bench_task_stats [N]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.database.connection import get_connection, init_db
+from src.database.models import TaskRepository
+
+REPEAT = 50
+
+
+async def _populate(repo: TaskRepository, n: int) -> None:
+    parents = max(n // 100, 1)
+    await repo.db.executemany(
+        "INSERT INTO tasks (title, completed, created_at) VALUES (?, ?, datetime('now', ?))",
+        ((f"Parent {i}", 0, f"-{i % 30} days") for i in range(parents)),
+    )
+    await repo.db.executemany(
+        "INSERT INTO tasks (title, completed, parent_id, created_at)"
+        " VALUES (?, ?, ?, datetime('now', ?))",
+        ((f"Task {i}", i % 3 == 0, i % parents + 1, f"-{i % 30} days") for i in range(n - parents)),
+    )
+    await repo.db.commit()
+
+
+async def _time(label: str, fn: object) -> None:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        await fn()  # type: ignore[operator]
+    print(f"{label:<24}{(time.perf_counter() - start) / REPEAT * 1e3:>10.2f} ms")
+
+
+async def main(n: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = await get_connection(str(Path(tmp) / "bench.db"))
+        await init_db(db)
+        repo = TaskRepository(db)
+        await _populate(repo, n)
+        print(f"{n} tasks")
+
+        async def group_by() -> None:
+            cursor = await db.execute(
+                "SELECT parent_id, COUNT(*), SUM(completed) FROM tasks"
+                " GROUP BY parent_id ORDER BY COUNT(*) DESC LIMIT 6"
+            )
+            await cursor.fetchall()
+            cursor = await db.execute(
+                "SELECT date(created_at), COUNT(*) FROM tasks"
+                " WHERE created_at > date('now', '-14 days') GROUP BY 1"
+            )
+            await cursor.fetchall()
+
+        await _time("get_stats (aggregates)", repo.get_stats)
+        await _time("GROUP BY over tasks", group_by)
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
@@ -0,0 +1,69 @@
+"""Benchmark per-tool argument validation along the server path.
+
+Both paths start as the server does: FastMCP validates the raw arguments
+against the tool signature's argument model (``fn_metadata.arg_model``),
+which only checks JSON types. Then:
+
+- before: the tool function rebuilt an args dict without ``None`` values
+  and the handler constructed the input model with ``Model(**args)``;
+- after: the tool function passes every argument through and the input
+  model checks the constraints once, with ``model_validate``.
+
+Run with: python -m benchmarks.bench_validation
+"""
+
+from __future__ import annotations
+
+import functools
+import timeit
+from typing import Any
+
+from mcp.server.fastmcp.utilities.func_metadata import ArgModelBase
+from pydantic import BaseModel
+from src.server import mcp
+from src.tools.task_tools import TOOLS, _validate
+
+NUMBER = 20_000
+
+SAMPLE_ARGS: dict[str, dict[str, Any]] = {
+    "add_task": {"title": "  Buy milk  "},
+    "list_tasks": {"filter": "incomplete", "parent_id": 3},
+    "task_stats": {"days": 7},
+    "complete_task": {"task_id": 42},
+    "delete_task": {"task_id": 42},
+    "decompose_task": {"task_id": 42, "subtask_titles": ["Plan", "Build", "Ship", "  "]},
+}
+
+
+def _check_signature(
+    arg_model: type[ArgModelBase], model: type[BaseModel], args: dict[str, Any]
+) -> dict[str, Any]:
+    checked = arg_model.model_validate(args).model_dump_one_level()
+    return {name: checked[name] for name in model.model_fields}
+
+
+def _before(arg_model: type[ArgModelBase], model: type[BaseModel], args: dict[str, Any]) -> BaseModel:
+    checked = _check_signature(arg_model, model, args)
+    return model(**{k: v for k, v in checked.items() if v is not None})
+
+
+def _after(arg_model: type[ArgModelBase], model: type[BaseModel], args: dict[str, Any]) -> BaseModel:
+    return _validate(model, _check_signature(arg_model, model, args))
+
+
+def _per_call_us(fn: Any) -> float:
+    return min(timeit.repeat(fn, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main() -> None:
+    print(f"{'tool':<16}{'before (us)':>14}{'after (us)':>14}")
+    for name, args in SAMPLE_ARGS.items():
+        arg_model = mcp._tool_manager._tools[name].fn_metadata.arg_model
+        model = TOOLS[name].input_model
+        before = _per_call_us(functools.partial(_before, arg_model, model, args))
+        after = _per_call_us(functools.partial(_after, arg_model, model, args))
+        print(f"{name:<16}{before:>14.2f}{after:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
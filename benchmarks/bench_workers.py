@@ -0,0 +1,95 @@
+"""Benchmark tools/call throughput against the number of server workers.
+
+Starts ``python -m src`` in stateless JSON mode once per worker count, each
+on a fresh database seeded with a few tasks, then sends N list_tasks calls
+(default 4,000) from P client processes (default 4) of C concurrent clients
+each (default 8) and reports calls per second and latency. Clients run in
+their own processes so that the load generator is not the bottleneck.
+
+The speed-up is bounded by the cores available: on a single core more
+workers only add context switching.
+
+Run with: python -m benchmarks.bench_workers [N] [P] [C] [WORKERS ...]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from benchmarks.bench_http_modes import _client, _free_port, _seed, _wait_ready
+
+
+def _load(url: str, calls: int, concurrency: int) -> list[float]:
+    async def run() -> list[float]:
+        latencies: list[float] = []
+        await asyncio.gather(*(_client(url, False, calls // concurrency, latencies) for _ in range(concurrency)))
+        return latencies
+
+    return asyncio.run(run())
+
+
+def run_workers(workers: int, calls: int, processes: int, concurrency: int) -> None:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "src"],
+            env={
+                **os.environ,
+                "WORKERS": str(workers),
+                "MCP_STATELESS_HTTP": "true",
+                "MCP_JSON_RESPONSE": "true",
+                "MCP_SERVER_HOST": "127.0.0.1",
+                "MCP_SERVER_PORT": str(port),
+                "DATABASE_PATH": str(Path(tmp) / "bench.db"),
+                "LOG_LEVEL": "WARNING",
+                "ADMISSION_SESSION_RATE": "0",
+            },
+        )
+        try:
+            asyncio.run(_wait_ready(base))
+            # Give every worker time to finish warming up, not just the first
+            time.sleep(1)
+            asyncio.run(_seed(base, stateful=False))
+            with ProcessPoolExecutor(processes) as pool:
+                start = time.perf_counter()
+                jobs = [pool.submit(_load, f"{base}/mcp", calls // processes, concurrency) for _ in range(processes)]
+                results = [job.result() for job in jobs]
+                elapsed = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies = sorted(latency for result in results for latency in result)
+    print(
+        f"{workers:>3} workers{len(latencies) / elapsed:>10.0f} calls/s"
+        f"{statistics.median(latencies) * 1e3:>10.2f} ms p50"
+        f"{latencies[int(len(latencies) * 0.99)] * 1e3:>10.2f} ms p99"
+    )
+
+
+def main(calls: int, processes: int, concurrency: int, worker_counts: list[int]) -> None:
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    print(
+        f"{calls} list_tasks calls from {processes} processes x {concurrency} clients, {cores} cores"
+    )
+    for workers in worker_counts:
+        run_workers(workers, calls, processes, concurrency)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(
+        args[0] if len(args) > 0 else 4_000,
+        args[1] if len(args) > 1 else 4,
+        args[2] if len(args) > 2 else 8,
+        args[3:] or [1, 2, 4],
+    )
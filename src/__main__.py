@@ -0,0 +1,38 @@
+"""Command-line entry point: ``python -m src``.
+
+Only the standard library is imported up front, so ``--help`` answers
+immediately and ``--profile-startup`` measures the server's imports from a
+clean slate; the server stack loads once it is actually needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+_START = time.perf_counter()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src", description="Run the ChatGPT ToDo MCP server with WORKERS processes.")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="report an import-time breakdown and the time to a first tools/call, then exit",
+    )
+    parser.add_argument("--json", action="store_true", help="print the startup profile as JSON")
+    args = parser.parse_args(argv)
+
+    if args.profile_startup:
+        from src.startup import profile_startup
+
+        profile_startup(_START, as_json=args.json)
+        return
+
+    from src.launcher import main as launch
+
+    launch()
+
+
+if __name__ == "__main__":
+    main()
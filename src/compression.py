@@ -0,0 +1,280 @@
+"""Negotiated response compression for the HTTP app.
+
+Large ``list_tasks`` and tree responses are mostly repeated JSON keys and
+compress several-fold. The middleware picks the first encoding in the
+server's preference order that the client accepts: gzip is always available,
+zstd and brotli when ``zstandard`` or ``brotli`` is installed.
+
+Responses smaller than the threshold are sent as they are, since they would
+save a few bytes for a fixed CPU cost. A streamed response is judged by its
+first chunk. In an SSE stream that is the first event, which for a tool call
+is the response itself. Each SSE event is flushed through the compressor as
+it is sent, so clients can decode it at once instead of waiting for the
+compressor to fill a block.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import time
+import zlib
+from collections.abc import Callable, Iterable
+from typing import Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.observability.metrics import REGISTRY
+
+
+def _installed(module: str) -> bool:
+    # Checked without importing, so the codecs load only when first used
+    return importlib.util.find_spec(module) is not None
+
+
+class Encoder(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes:
+        """Emit everything compressed so far, keeping the stream open."""
+        ...
+
+    def finish(self) -> bytes: ...
+
+
+class GzipEncoder:
+    DEFAULT_LEVEL = 6
+
+    def __init__(self, level: int | None = None) -> None:
+        level = self.DEFAULT_LEVEL if level is None else level
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    # Quality 4 is the usual choice for dynamic content; 11 is for static assets
+    DEFAULT_LEVEL = 4
+
+    def __init__(self, level: int | None = None) -> None:
+        import brotli  # type: ignore[import-not-found]
+
+        level = self.DEFAULT_LEVEL if level is None else level
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return bytes(self._compressor.process(data))
+
+    def flush(self) -> bytes:
+        return bytes(self._compressor.flush())
+
+    def finish(self) -> bytes:
+        return bytes(self._compressor.finish())
+
+
+class ZstdEncoder:
+    DEFAULT_LEVEL = 3
+
+    def __init__(self, level: int | None = None) -> None:
+        import zstandard  # type: ignore[import-not-found]
+
+        level = self.DEFAULT_LEVEL if level is None else level
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+
+    def compress(self, data: bytes) -> bytes:
+        return bytes(self._compressor.compress(data))
+
+    def flush(self) -> bytes:
+        return bytes(self._compressor.flush(self._flush_block))
+
+    def finish(self) -> bytes:
+        return bytes(self._compressor.flush())
+
+
+# Content-Encoding token -> encoder factory, for the encodings installed here
+ENCODERS: dict[str, Callable[[], Encoder]] = {"gzip": GzipEncoder}
+if _installed("brotli"):
+    ENCODERS["br"] = BrotliEncoder
+if _installed("zstandard"):
+    ENCODERS["zstd"] = ZstdEncoder
+
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.partition(";")[0].strip().lower()
+    return media_type.startswith(_COMPRESSIBLE_TYPES) or media_type.endswith("+json")
+
+
+def negotiate(accept_encoding: str, preferred: Iterable[str]) -> str | None:
+    """Return the first of ``preferred`` that ``accept_encoding`` allows.
+
+    An encoding is allowed if it is listed, or covered by ``*``, with a
+    non-zero quality value.
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        token, _, params = item.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        weights[token] = quality
+    wildcard = weights.get("*", 0.0)
+    for encoding in preferred:
+        if weights.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class _EncodingMetrics:
+    def __init__(self, encoding: str) -> None:
+        self.bytes_in = REGISTRY.counter(
+            "http_compression_input_bytes_total",
+            "Response bytes before compression",
+            encoding=encoding,
+        )
+        self.bytes_out = REGISTRY.counter(
+            "http_compression_output_bytes_total",
+            "Response bytes after compression",
+            encoding=encoding,
+        )
+        self.seconds = REGISTRY.histogram(
+            "http_compression_duration_seconds",
+            "Time spent compressing one response or stream chunk",
+            encoding=encoding,
+        )
+
+
+def _skipped(reason: str) -> None:
+    REGISTRY.counter(
+        "http_compression_skipped_total", "Responses sent uncompressed", reason=reason
+    ).inc()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with the best accepted encoding."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Iterable[str] = ("zstd", "br", "gzip"),
+        minimum_size: int = 1024,
+    ) -> None:
+        self.app = app
+        self.encodings = [encoding for encoding in encodings if encoding in ENCODERS]
+        self.minimum_size = minimum_size
+        self._metrics = {encoding: _EncodingMetrics(encoding) for encoding in self.encodings}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            _skipped("not_accepted")
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(
+            send, encoding, self.minimum_size, self._metrics[encoding]
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    """Holds back the response start until the first body chunk decides."""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int, metrics: _EncodingMetrics) -> None:
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.metrics = metrics
+        self._start: Message | None = None
+        self._encoder: Encoder | None = None
+        self._flush_each = False
+        # None until the first body chunk; then whether to compress
+        self._compress: bool | None = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            headers = Headers(raw=message["headers"])
+            if (
+                message["status"] in (204, 304)
+                or "content-encoding" in headers
+                or not _compressible(headers.get("content-type", ""))
+            ):
+                self._compress = False
+                await self._send(message)
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        if self._compress is None:
+            if not body and more_body:
+                return
+            await self._begin(body, more_body)
+            return
+        if not self._compress:
+            await self._send(message)
+            return
+        await self._send(
+            {"type": "http.response.body", "body": self._encode(body, more_body), "more_body": more_body}
+        )
+
+    async def _begin(self, body: bytes, more_body: bool) -> None:
+        assert self._start is not None
+        headers = MutableHeaders(raw=self._start["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        self._compress = len(body) >= self.minimum_size
+        if not self._compress:
+            _skipped("small")
+            await self._send(self._start)
+            await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        self._encoder = ENCODERS[self.encoding]()
+        self._flush_each = headers.get("content-type", "").startswith("text/event-stream")
+        data = self._encode(body, more_body)
+        headers["Content-Encoding"] = self.encoding
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(data))
+        await self._send(self._start)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    def _encode(self, body: bytes, more_body: bool) -> bytes:
+        assert self._encoder is not None
+        start = time.perf_counter()
+        data = self._encoder.compress(body)
+        if not more_body:
+            data += self._encoder.finish()
+        elif self._flush_each and body:
+            data += self._encoder.flush()
+        self.metrics.seconds.observe(time.perf_counter() - start)
+        self.metrics.bytes_in.inc(len(body))
+        self.metrics.bytes_out.inc(len(data))
+        return data
@@ -1,6 +1,13 @@
 import os
 from pathlib import Path
 
+
+def _per_tool(name: str) -> dict[str, float]:
+    """Parse comma-separated ``tool=value`` pairs from an environment variable."""
+    pairs = (item.partition("=") for item in os.getenv(name, "").split(",") if item.strip())
+    return {tool.strip(): float(value) for tool, _, value in pairs}
+
+
 DATABASE_PATH = Path(
     os.getenv("DATABASE_PATH", Path.home() / ".chatgpt-todo" / "tasks.db")
 )
@@ -9,4 +16,92 @@ MCP_SERVER_HOST = os.getenv("MCP_SERVER_HOST", "localhost")
 
 MCP_SERVER_PORT = int(os.getenv("MCP_SERVER_PORT", "8000"))
 
+WORKERS = int(os.getenv("WORKERS", "0"))
+
+SERVER_LOOP = os.getenv("SERVER_LOOP", "auto")
+
+SERVER_HTTP = os.getenv("SERVER_HTTP", "auto")
+
+DB_BUSY_TIMEOUT = float(os.getenv("DB_BUSY_TIMEOUT", "5"))
+
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1"))
+
+LOG_SAMPLE_RATES = _per_tool("LOG_SAMPLE_RATES")
+
+LOG_SLOW_CALL_MS = float(os.getenv("LOG_SLOW_CALL_MS", "500"))
+
+MCP_STRUCTURED_OUTPUT = os.getenv("MCP_STRUCTURED_OUTPUT", "false").lower() == "true"
+
+TREE_MAX_DEPTH = int(os.getenv("TREE_MAX_DEPTH", "10"))
+
+TREE_MAX_NODES = int(os.getenv("TREE_MAX_NODES", "1000"))
+
+RESPONSE_MAX_BYTES = int(os.getenv("RESPONSE_MAX_BYTES", "65536"))
+
+RESPONSE_MAX_ITEMS = int(os.getenv("RESPONSE_MAX_ITEMS", "200"))
+
+RESPONSE_SUMMARY_ITEMS = int(os.getenv("RESPONSE_SUMMARY_ITEMS", "20"))
+
+ADMISSION_SESSION_RATE = float(os.getenv("ADMISSION_SESSION_RATE", "20"))
+
+ADMISSION_SESSION_BURST = int(os.getenv("ADMISSION_SESSION_BURST", "40"))
+
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "32"))
+
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "10"))
+
+TOOL_TIMEOUTS = _per_tool("TOOL_TIMEOUTS")
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "2048"))
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+
+WARMUP_TOUCH_INDEXES = os.getenv("WARMUP_TOUCH_INDEXES", "true").lower() == "true"
+
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "30"))
+
+DRAIN_PRE_STOP_DELAY = float(os.getenv("DRAIN_PRE_STOP_DELAY", "0"))
+
+MCP_STATELESS_HTTP = os.getenv("MCP_STATELESS_HTTP", "false").lower() == "true"
+
+MCP_JSON_RESPONSE = os.getenv("MCP_JSON_RESPONSE", "false").lower() == "true"
+
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+
+SESSION_TTL = float(os.getenv("SESSION_TTL", "86400"))
+
+SESSION_MAX_SIZE = int(os.getenv("SESSION_MAX_SIZE", "100000"))
+
+RESOURCE_NOTIFY_WINDOW = float(os.getenv("RESOURCE_NOTIFY_WINDOW", "0.05"))
+
+UI_FRAGMENT_CACHE_SIZE = int(os.getenv("UI_FRAGMENT_CACHE_SIZE", "20000"))
+
+UI_PAGE_SIZE = int(os.getenv("UI_PAGE_SIZE", "50"))
+
+UI_TREE_DEPTH = int(os.getenv("UI_TREE_DEPTH", "3"))
+
+# How tool cards apply the stylesheet: "link" references the cacheable
+# stylesheet resource, "inline" embeds it in every card, "none" leaves it out
+UI_STYLES = os.getenv("UI_STYLES", "link")
+
+OUTPUT_MODE = os.getenv("OUTPUT_MODE", "both")
+
+COMPRESSION_ENCODINGS = [
+    encoding.strip()
+    for encoding in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")
+    if encoding.strip()
+]
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
@@ -1,4 +1,14 @@
-from .connection import get_connection, init_db
-from .models import TaskRepository
+from .changes import ChangeFeed
+from .connection import checkpoint_wal, get_connection, init_db
+from .models import TaskFields, TaskRepository, TaskRow, TreeRow
 
-__all__ = ["get_connection", "init_db", "TaskRepository"]
+__all__ = [
+    "ChangeFeed",
+    "TaskFields",
+    "TaskRepository",
+    "TaskRow",
+    "TreeRow",
+    "checkpoint_wal",
+    "get_connection",
+    "init_db",
+]
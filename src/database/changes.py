@@ -0,0 +1,182 @@
+"""In-process change notifications for subscribed resources.
+
+Repository writes publish the URIs of the resources they changed; sessions
+subscribe to URIs and are told when one changes. Publishing is cheap and
+synchronous: topics are marked dirty and flushed once per coalescing window,
+so a burst of writes (a decompose creating ten subtasks) notifies each
+subscriber of each changed resource once.
+
+Subscribers are indexed by topic, so a flush only touches sessions that
+subscribed to something that changed. Each subscriber is delivered to by its
+own task from a set of pending URIs: a slow session holds at most one pending
+notification per topic and never delays the others. A subscriber whose
+delivery fails is assumed gone and dropped.
+
+Only sessions in this process are notified.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+
+from src.observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LIST_FILTERS = ("all", "complete", "incomplete")
+
+Deliver = Callable[[str], Awaitable[None]]
+
+_published = REGISTRY.counter(
+    "resource_changes_published_total", "Resource changes published by repository writes"
+)
+_notified = REGISTRY.counter(
+    "resource_notifications_sent_total", "Resource updated notifications sent to subscribers"
+)
+_coalesced = REGISTRY.counter(
+    "resource_notifications_coalesced_total",
+    "Resource changes merged into a notification already pending",
+)
+_dropped = REGISTRY.counter(
+    "resource_subscribers_dropped_total", "Subscribers dropped after a failed delivery"
+)
+
+
+def task_uri(task_id: int) -> str:
+    return f"task://{task_id}"
+
+
+def list_uri(filter: str = "all") -> str:
+    return f"tasks://list?filter={filter}"
+
+
+class _Subscriber:
+    def __init__(self, deliver: Deliver) -> None:
+        self.deliver = deliver
+        # Topic -> the URI the client subscribed with, which notifications echo
+        self.topics: dict[str, str] = {}
+        self.pending: set[str] = set()
+        self.task: asyncio.Task[None] | None = None
+
+
+class ChangeFeed:
+    """Fan resource changes out to subscribed sessions, coalescing bursts.
+
+    ``window`` is how long, in seconds, changes are collected before
+    subscribers are notified; 0 notifies on the next loop iteration.
+    """
+
+    def __init__(self, window: float = 0.05) -> None:
+        self.window = window
+        self._subscribers: dict[Hashable, _Subscriber] = {}
+        self._topics: dict[str, set[Hashable]] = {}
+        self._dirty: set[str] = set()
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def subscriptions(self) -> int:
+        return sum(len(keys) for keys in self._topics.values())
+
+    def subscribe(self, key: Hashable, topic: str, deliver: Deliver, uri: str | None = None) -> None:
+        """Subscribe ``key`` to ``topic``; changes are sent with ``deliver(uri)``.
+
+        ``uri`` is the form of the topic the subscriber used, if different.
+        ``deliver`` replaces the one given with any earlier topic of ``key``.
+        """
+        subscriber = self._subscribers.get(key)
+        if subscriber is None:
+            subscriber = self._subscribers[key] = _Subscriber(deliver)
+        else:
+            subscriber.deliver = deliver
+        subscriber.topics[topic] = uri or topic
+        self._topics.setdefault(topic, set()).add(key)
+
+    def unsubscribe(self, key: Hashable, topic: str) -> None:
+        subscriber = self._subscribers.get(key)
+        if subscriber is None or subscriber.topics.pop(topic, None) is None:
+            return
+        self._discard(key, topic)
+        if not subscriber.topics:
+            del self._subscribers[key]
+
+    def remove(self, key: Hashable) -> None:
+        """Drop every subscription of ``key``."""
+        subscriber = self._subscribers.pop(key, None)
+        if subscriber is None:
+            return
+        for topic in subscriber.topics:
+            self._discard(key, topic)
+        if subscriber.task is not None and subscriber.task is not asyncio.current_task():
+            subscriber.task.cancel()
+
+    def _discard(self, key: Hashable, topic: str) -> None:
+        keys = self._topics.get(topic)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._topics[topic]
+
+    def has_subscribers(self, prefix: str = "") -> bool:
+        """Whether any subscription's topic starts with ``prefix``."""
+        return any(topic.startswith(prefix) for topic in self._topics)
+
+    def publish(self, topics: Iterable[str]) -> None:
+        """Mark ``topics`` changed; subscribers are notified after the window."""
+        if not self._topics:
+            return
+        for topic in topics:
+            _published.inc()
+            if topic in self._topics:
+                self._dirty.add(topic)
+        if self._dirty and self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+    def _flush(self) -> None:
+        self._flush_handle = None
+        dirty, self._dirty = self._dirty, set()
+        for topic in dirty:
+            for key in self._topics.get(topic, ()):
+                subscriber = self._subscribers[key]
+                if topic in subscriber.pending:
+                    _coalesced.inc()
+                    continue
+                subscriber.pending.add(topic)
+                if subscriber.task is None:
+                    subscriber.task = asyncio.create_task(self._deliver(key, subscriber))
+
+    async def _deliver(self, key: Hashable, subscriber: _Subscriber) -> None:
+        try:
+            while subscriber.pending:
+                topic = subscriber.pending.pop()
+                uri = subscriber.topics.get(topic)
+                if uri is None:
+                    continue  # unsubscribed while pending
+                await subscriber.deliver(uri)
+                _notified.inc()
+        # Deliver is a caller-supplied callback and a closed session fails in
+        # transport-specific ways; whatever the error, the subscriber is gone
+        except Exception as e:  # noqa: BLE001
+            logger.debug("Dropping resource subscriber after failed delivery: %r", e)
+            _dropped.inc()
+            self.remove(key)
+        finally:
+            subscriber.task = None
+
+    async def close(self) -> None:
+        """Cancel pending notifications and forget every subscriber."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._dirty.clear()
+        tasks = [s.task for s in self._subscribers.values() if s.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._subscribers.clear()
+        self._topics.clear()
@@ -1,5 +1,10 @@
+import time
+
 import aiosqlite
 
+from src.config import DB_BUSY_TIMEOUT
+from src.observability.metrics import REGISTRY
+
 _SCHEMA_DDL = """\
 CREATE TABLE IF NOT EXISTS tasks (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -8,21 +13,119 @@ CREATE TABLE IF NOT EXISTS tasks (
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     parent_id INTEGER REFERENCES tasks(id) ON DELETE CASCADE
 );
-CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks(completed);
-CREATE INDEX IF NOT EXISTS idx_tasks_parent_id ON tasks(parent_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_completed_created_at ON tasks(completed, created_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_parent_id_created_at ON tasks(parent_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_title ON tasks(title);
+DROP INDEX IF EXISTS idx_tasks_completed;
+DROP INDEX IF EXISTS idx_tasks_parent_id;
+
+-- Aggregates for task_stats, maintained by triggers so reads stay O(1) in
+-- the number of tasks. parent_id 0 holds the totals over all tasks.
+CREATE TABLE IF NOT EXISTS task_counts (
+    parent_id INTEGER PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_task_counts_total ON task_counts(total);
+
+-- Creation and net completion events per UTC day
+CREATE TABLE IF NOT EXISTS task_daily_counts (
+    day TEXT PRIMARY KEY,
+    created INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_tasks_counts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO task_counts (parent_id, total, completed) VALUES (0, 1, NEW.completed)
+        ON CONFLICT(parent_id) DO UPDATE SET
+            total = total + 1, completed = completed + excluded.completed;
+    INSERT INTO task_counts (parent_id, total, completed)
+        SELECT NEW.parent_id, 1, NEW.completed WHERE NEW.parent_id IS NOT NULL
+        ON CONFLICT(parent_id) DO UPDATE SET
+            total = total + 1, completed = completed + excluded.completed;
+    INSERT INTO task_daily_counts (day, created) VALUES (date(NEW.created_at), 1)
+        ON CONFLICT(day) DO UPDATE SET created = created + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tasks_counts_update AFTER UPDATE OF completed ON tasks
+WHEN NEW.completed != OLD.completed BEGIN
+    UPDATE task_counts SET completed = completed + NEW.completed - OLD.completed
+        WHERE parent_id = 0 OR parent_id = NEW.parent_id;
+    INSERT INTO task_daily_counts (day, completed)
+        VALUES (date('now'), NEW.completed - OLD.completed)
+        ON CONFLICT(day) DO UPDATE SET completed = completed + excluded.completed;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tasks_counts_delete AFTER DELETE ON tasks BEGIN
+    UPDATE task_counts SET total = total - 1, completed = completed - OLD.completed
+        WHERE parent_id = 0 OR parent_id = OLD.parent_id;
+    DELETE FROM task_counts WHERE parent_id = OLD.id;
+END;
 """
 
+# One-time GROUP BY pass that seeds the aggregates for databases created
+# before they existed. Completion dates were not recorded, so only creation
+# history can be rebuilt.
+_BACKFILL_AGGREGATES = (
+    """INSERT INTO task_counts (parent_id, total, completed)
+    SELECT 0, COUNT(*), COALESCE(SUM(completed), 0) FROM tasks""",
+    """INSERT INTO task_counts (parent_id, total, completed)
+    SELECT parent_id, COUNT(*), SUM(completed) FROM tasks
+    WHERE parent_id IS NOT NULL GROUP BY parent_id""",
+    """INSERT INTO task_daily_counts (day, created)
+    SELECT date(created_at), COUNT(*) FROM tasks WHERE true GROUP BY date(created_at)
+    ON CONFLICT(day) DO UPDATE SET created = excluded.created""",
+)
 
-async def get_connection(db_path: str) -> aiosqlite.Connection:
-    """Create an aiosqlite connection with WAL mode and foreign keys enabled."""
-    db = await aiosqlite.connect(db_path)
+
+_connect_seconds = REGISTRY.histogram(
+    "db_connect_duration_seconds", "Time to open and configure a SQLite connection"
+)
+
+
+async def get_connection(db_path: str, busy_timeout: float = DB_BUSY_TIMEOUT) -> aiosqlite.Connection:
+    """Create an aiosqlite connection with WAL mode and foreign keys enabled.
+
+    ``busy_timeout`` is how long a statement waits for a lock held by
+    another connection, possibly in another process, before failing.
+    """
+    start = time.perf_counter()
+    db = await aiosqlite.connect(db_path, timeout=busy_timeout)
     db.row_factory = aiosqlite.Row
     await db.execute("PRAGMA journal_mode=WAL")
     await db.execute("PRAGMA foreign_keys=ON")
+    _connect_seconds.observe(time.perf_counter() - start)
     return db
 
 
 async def init_db(db: aiosqlite.Connection) -> None:
-    """Initialize the database schema."""
+    """Initialize the database schema.
+
+    Safe to run from several processes at once: the DDL is idempotent, and
+    the aggregate backfill is checked and applied under one write lock, so
+    only the first process to get it runs it.
+    """
     await db.executescript(_SCHEMA_DDL)
-    await db.commit()
+    await db.execute("BEGIN IMMEDIATE")
+    try:
+        cursor = await db.execute("SELECT 1 FROM task_counts WHERE parent_id = 0")
+        if await cursor.fetchone() is None:
+            for statement in _BACKFILL_AGGREGATES:
+                await db.execute(statement)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+
+
+async def checkpoint_wal(db: aiosqlite.Connection) -> dict[str, int]:
+    """Copy the write-ahead log into the database file and truncate it.
+
+    ``busy`` is 1 if another connection kept the checkpoint from completing.
+    """
+    cursor = await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    row = await cursor.fetchone()
+    assert row is not None
+    busy, wal_pages, checkpointed_pages = row
+    return {"busy": busy, "wal_pages": wal_pages, "checkpointed_pages": checkpointed_pages}
@@ -1,32 +1,328 @@
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import functools
+import sqlite3
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, TypedDict, TypeVar, cast
 
 import aiosqlite
 
+from src.observability.metrics import REGISTRY, Histogram
+from src.observability.tracing import TRACER
+
+from .changes import LIST_FILTERS, ChangeFeed, list_uri, task_uri
+from .singleflight import SingleFlight, freeze
+
+_T = TypeVar("_T")
+
+# Column order of every task row returned by the repository. created_at is
+# rendered as an ISO 8601 UTC string once, in SQL, rather than per response.
+TASK_FIELDS = ("id", "title", "completed", "created_at", "parent_id")
+_COLUMN_SQL = {
+    "id": "id",
+    "title": "title",
+    "completed": "completed",
+    "created_at": "strftime('%Y-%m-%dT%H:%M:%SZ', created_at) AS created_at",
+    "parent_id": "parent_id",
+}
+_TASK_COLUMNS = ", ".join(_COLUMN_SQL.values())
+
+
+class TaskRow(TypedDict):
+    """A task as the repository returns it, built directly from its row.
+
+    Values keep their SQLite types: ``completed`` is 0 or 1 and
+    ``created_at`` an ISO 8601 UTC string. The schema already constrains
+    them, so rows are not validated again on the way out.
+    """
+
+    id: int
+    title: str
+    completed: int
+    created_at: str
+    parent_id: int | None
+
+
+class TaskFields(TypedDict, total=False):
+    """The columns of a task a projected read selected (see ``fields``)."""
+
+    id: int
+    title: str
+    completed: int
+    created_at: str
+    parent_id: int | None
+
+
+class TreeRow(TaskFields, total=False):
+    """A projected task row from get_tree, with its place in the forest."""
+
+    depth: int
+    hidden_subtasks: int
+
+
+# Sort keys accepted by get_all; each is covered by an index in the schema
+ORDER_COLUMNS = {"created_at": "tasks.created_at", "id": "tasks.id", "title": "tasks.title"}
+
+
+def _select_list(fields: Iterable[str] | None, required: Iterable[str] = ()) -> str:
+    if fields is None:
+        return _TASK_COLUMNS
+    wanted = {*fields, *required}
+    return ", ".join(sql for name, sql in _COLUMN_SQL.items() if name in wanted)
+
+# Per-task accumulator of seconds spent awaiting SQLite, set by measure_db_time()
+_db_elapsed: ContextVar[list[float] | None] = ContextVar("db_elapsed", default=None)
+
+
+@contextmanager
+def measure_db_time() -> Iterator[list[float]]:
+    """Accumulate time spent in repository statements issued within the block.
+
+    Yields a one-element list whose value is updated as statements complete.
+    """
+    elapsed = [0.0]
+    token = _db_elapsed.set(elapsed)
+    try:
+        yield elapsed
+    finally:
+        _db_elapsed.reset(token)
+
+
+_statement_seconds: dict[str, Histogram] = {}
+_commit_seconds = REGISTRY.histogram("db_commit_duration_seconds", "SQLite commit latency")
+_commits = REGISTRY.counter("db_commits_total", "SQLite transactions committed")
+
+
+def _statement_histogram(method: str) -> Histogram:
+    histogram = _statement_seconds.get(method)
+    if histogram is None:
+        histogram = _statement_seconds[method] = REGISTRY.histogram(
+            "db_statement_duration_seconds",
+            "SQLite statement latency by repository method",
+            method=method,
+        )
+    return histogram
+
+
+def _record_db_time(start: float, histogram: Histogram) -> None:
+    seconds = time.perf_counter() - start
+    histogram.observe(seconds)
+    elapsed = _db_elapsed.get()
+    if elapsed is not None:
+        elapsed[0] += seconds
+
+
+class _Read:
+    """A read statement queued or running on a connection's thread."""
+
+    __slots__ = ("dropped",)
+
+    def __init__(self) -> None:
+        self.dropped = False
+
+
+def _coalesced(
+    method: Callable[..., Awaitable[_T]],
+) -> Callable[..., Awaitable[_T]]:
+    """Share one execution of a read among identical concurrent calls."""
+
+    @functools.wraps(method)
+    async def wrapper(self: TaskRepository, *args: Any, **kwargs: Any) -> _T:
+        key = (method.__name__, freeze(args), freeze(kwargs))
+        return await self.flight.run(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
+
 
 class TaskRepository:
-    """Async repository for task CRUD operations."""
+    """Async repository for task CRUD operations.
 
-    def __init__(self, db: aiosqlite.Connection) -> None:
+    Reads are coalesced through ``flight``; pass one SingleFlight to every
+    repository on the same database so identical reads share a query across
+    connections. Returned rows may then be shared and must not be mutated.
+
+    Writes publish the resources they changed to ``changes``; likewise share
+    one ChangeFeed so subscribers hear about writes made by any session.
+    """
+
+    def __init__(
+        self,
+        db: aiosqlite.Connection,
+        flight: SingleFlight | None = None,
+        changes: ChangeFeed | None = None,
+    ) -> None:
         self.db = db
+        self.flight = SingleFlight() if flight is None else flight
+        self.changes = ChangeFeed() if changes is None else changes
+        # The read running on the connection's thread, and writes in progress
+        self._running_lock = threading.Lock()
+        self._running: _Read | None = None
+        self._writes = 0
+
+    async def _execute(
+        self, sql: str, params: Iterable[Any] = (), *, method: str
+    ) -> aiosqlite.Cursor:
+        start = time.perf_counter()
+        with TRACER.span("sql", method=method, statement=sql):
+            try:
+                return await self.db.execute(sql, params)
+            finally:
+                _record_db_time(start, _statement_histogram(method))
+
+    async def _read(
+        self, sql: str, params: Iterable[Any], fetch: Callable[[sqlite3.Cursor], _T], *, method: str
+    ) -> _T:
+        """Run a read on the connection's thread, interrupting only it if cancelled.
+
+        The statement and its fetch run as one unit on the thread, which
+        marks the read as running while it does. A cancelled caller whose
+        read is still queued drops it; one whose read is running interrupts
+        it, since otherwise the query would keep the thread busy and block
+        every statement queued behind it. Another caller's statement is never
+        interrupted, nor is anything while a write is in progress.
+        """
+        start = time.perf_counter()
+        read = _Read()
+        # aiosqlite has no public way to run a function on its thread
+        conn: sqlite3.Connection = self.db._conn
+
+        def run() -> _T | None:
+            with self._running_lock:
+                if read.dropped:
+                    return None
+                self._running = read
+            try:
+                cursor = conn.execute(sql, tuple(params))
+                try:
+                    return fetch(cursor)
+                finally:
+                    cursor.close()
+            finally:
+                with self._running_lock:
+                    self._running = None
+
+        with TRACER.span("sql", method=method, statement=sql):
+            try:
+                return await self.db._execute(run)  # type: ignore[no-untyped-call, no-any-return]
+            except asyncio.CancelledError:
+                self._cancel(read, conn)
+                raise
+            finally:
+                _record_db_time(start, _statement_histogram(method))
+
+    def _cancel(self, read: _Read, conn: sqlite3.Connection) -> None:
+        with self._running_lock:
+            read.dropped = True
+            if self._running is read and not self._writes:
+                try:
+                    conn.interrupt()
+                except sqlite3.Error:
+                    # The connection is already closed
+                    pass
+
+    async def _fetchall(
+        self, sql: str, params: Iterable[Any] = (), *, method: str
+    ) -> list[aiosqlite.Row]:
+        return await self._read(sql, params, sqlite3.Cursor.fetchall, method=method)
+
+    async def _fetchone(
+        self, sql: str, params: Iterable[Any] = (), *, method: str
+    ) -> aiosqlite.Row | None:
+        row: aiosqlite.Row | None = await self._read(sql, params, sqlite3.Cursor.fetchone, method=method)
+        return row
+
+    async def _write(
+        self, sql: str, params: Iterable[Any] = (), *, method: str
+    ) -> aiosqlite.Cursor:
+        """Execute a write and commit it as one step cancellation cannot split.
+
+        A cancelled caller stops waiting, but the write still completes, so a
+        transaction is never left open with a half-applied change.
+        """
+
+        async def execute_and_commit() -> aiosqlite.Cursor:
+            self._writes += 1
+            try:
+                cursor = await self._execute(sql, params, method=method)
+                await self._commit()
+                return cursor
+            finally:
+                self._writes -= 1
+
+        return await asyncio.shield(execute_and_commit())
+
+    async def _commit(self) -> None:
+        start = time.perf_counter()
+        with TRACER.span("sql", method="commit", statement="COMMIT"):
+            try:
+                await self.db.commit()
+            finally:
+                _record_db_time(start, _commit_seconds)
+        _commits.inc()
+        self.flight.invalidate()
+
+    async def touch_indexes(self) -> int:
+        """Read every index on the task tables once to pull its pages into cache.
+
+        Returns the number of indexes scanned.
+        """
+        rows = await self._fetchall(
+            "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index'"
+            " AND tbl_name IN ('tasks', 'task_counts') AND sql IS NOT NULL",
+            method="touch_indexes",
+        )
+        for row in rows:
+            await self._fetchone(
+                f'SELECT count(*) FROM "{row["tbl_name"]}" INDEXED BY "{row["name"]}"',
+                method="touch_indexes",
+            )
+        return len(rows)
+
+    async def prepare_statements(self) -> None:
+        """Run each read statement shape once so the connection caches it.
 
-    async def create(self, title: str, parent_id: int | None = None) -> dict[str, Any]:
-        """Create a new task and return it as a dict."""
-        cursor = await self.db.execute(
+        The arguments match no rows, so this is cheap at any table size.
+        """
+        await self.get_by_id(-1)
+        await self.get_all(parent_id=-1)
+        await self.count(parent_id=-1)
+        await self.get_tree(parent_id=-1)
+        await self.get_stats()
+
+    async def create(self, title: str, parent_id: int | None = None) -> TaskRow:
+        """Create a new task and return it."""
+        cursor = await self._write(
             "INSERT INTO tasks (title, parent_id) VALUES (?, ?)",
             (title, parent_id),
+            method="create",
         )
-        await self.db.commit()
         assert cursor.lastrowid is not None
+        self.changes.publish((task_uri(cursor.lastrowid), list_uri("all"), list_uri("incomplete")))
         task = await self.get_by_id(cursor.lastrowid)
         assert task is not None
         return task
 
+    @_coalesced
     async def get_all(
-        self, filter: str = "all", parent_id: int | None = None
-    ) -> list[dict[str, Any]]:
-        """Return tasks matching the filter and optional parent_id."""
+        self,
+        filter: str = "all",
+        parent_id: int | None = None,
+        fields: Iterable[str] | None = None,
+        order_by: str = "created_at",
+        descending: bool = False,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> list[TaskFields]:
+        """Return tasks matching the filter and optional parent_id.
+
+        ``fields`` restricts the returned columns, and ``order_by``,
+        ``descending``, ``limit`` and ``offset`` are applied in SQL.
+        """
         clauses: list[str] = []
         params: list[Any] = []
 
@@ -40,40 +336,162 @@ class TaskRepository:
             params.append(parent_id)
 
         where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
-        query = f"SELECT * FROM tasks{where} ORDER BY created_at"
+        direction = " DESC" if descending else ""
+        query = (
+            f"SELECT {_select_list(fields)} FROM tasks{where}"
+            f" ORDER BY {ORDER_COLUMNS[order_by]}{direction}"
+        )
+        if limit is not None or offset:
+            query += " LIMIT ? OFFSET ?"
+            params += [-1 if limit is None else limit, offset]
+
+        rows = await self._fetchall(query, params, method="get_all")
+        return cast(list[TaskFields], [dict(row) for row in rows])
+
+    @_coalesced
+    async def count(self, filter: str = "all", parent_id: int | None = None) -> dict[str, int]:
+        """Return how many tasks match the filter and optional parent_id.
+
+        The result holds ``total`` and how many of those are ``completed``.
+        Reads one trigger-maintained ``task_counts`` row, so the cost does not
+        depend on table size.
+        """
+        row = await self._fetchone(
+            "SELECT total, completed FROM task_counts WHERE parent_id = ?",
+            (0 if parent_id is None else parent_id,),
+            method="count",
+        )
+        total, completed = (row["total"], row["completed"]) if row else (0, 0)
+        if filter == "complete":
+            total = completed
+        elif filter == "incomplete":
+            total, completed = total - completed, 0
+        return {"total": total, "completed": completed}
 
-        cursor = await self.db.execute(query, params)
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+    @_coalesced
+    async def get_tree(
+        self,
+        filter: str = "all",
+        parent_id: int | None = None,
+        max_depth: int = 0,
+        max_nodes: int = 1000,
+        fields: Iterable[str] | None = None,
+        order_by: str = "created_at",
+        descending: bool = False,
+    ) -> tuple[list[TreeRow], bool]:
+        """Return a task forest as flat rows in breadth-first order.
+
+        Roots are top-level tasks, or the children of ``parent_id`` when given;
+        the filter applies at every level. Each row carries its ``depth``, and
+        rows at ``max_depth`` carry ``hidden_subtasks``: the number of matching
+        children left out. Rows come from one recursive query, and at most
+        ``max_nodes`` are returned; the flag reports whether more existed.
+        ``fields`` projects columns (``id`` and ``parent_id`` are always kept
+        to link the tree) and the sort options order siblings.
+        """
+        completed = {"complete": 1, "incomplete": 0}.get(filter)
+
+        def status(table: str) -> str:
+            return "" if completed is None else f" AND {table}.completed = {completed}"
+
+        root = "parent_id IS NULL" if parent_id is None else "parent_id = ?"
+        query = f"""
+            WITH RECURSIVE subtree(node_id, depth) AS (
+                SELECT id, 0 FROM tasks WHERE {root}{status("tasks")}
+                UNION ALL
+                SELECT tasks.id, subtree.depth + 1
+                FROM tasks JOIN subtree ON tasks.parent_id = subtree.node_id
+                WHERE subtree.depth < ?{status("tasks")}
+            )
+            SELECT {_select_list(fields, required=("id", "parent_id"))}, depth,
+                CASE WHEN depth = ? THEN (
+                    SELECT COUNT(*) FROM tasks AS child
+                    WHERE child.parent_id = subtree.node_id{status("child")}
+                ) ELSE 0 END AS hidden_subtasks
+            FROM subtree JOIN tasks ON tasks.id = subtree.node_id
+            ORDER BY depth, {ORDER_COLUMNS[order_by]}{" DESC" if descending else ""}, tasks.id
+            LIMIT ?
+        """
+        params: list[Any] = [] if parent_id is None else [parent_id]
+        params += [max_depth, max_depth, max_nodes + 1]
+
+        rows = await self._fetchall(query, params, method="get_tree")
+        truncated = len(rows) > max_nodes
+        return cast(list[TreeRow], [dict(row) for row in rows[:max_nodes]]), truncated
+
+    @_coalesced
+    async def get_stats(self, top_parents: int = 5, days: int = 14) -> dict[str, Any]:
+        """Return task totals, the largest parents and per-day activity.
+
+        Reads only the trigger-maintained aggregate tables, so the cost
+        depends on ``top_parents`` and ``days`` rather than on table size.
+        """
+        totals = await self._fetchone(
+            "SELECT total, completed FROM task_counts WHERE parent_id = 0",
+            method="get_stats",
+        )
+        parents = await self._fetchall(
+            "SELECT counts.parent_id AS id, tasks.title, counts.total, counts.completed"
+            " FROM task_counts AS counts JOIN tasks ON tasks.id = counts.parent_id"
+            " WHERE counts.parent_id != 0 AND counts.total > 0"
+            " ORDER BY counts.total DESC LIMIT ?",
+            (top_parents,),
+            method="get_stats",
+        )
+        daily = await self._fetchall(
+            "SELECT day, created, completed FROM task_daily_counts"
+            " WHERE day > date('now', ?) ORDER BY day",
+            (f"-{days} days",),
+            method="get_stats",
+        )
+        return {
+            "total": totals["total"] if totals else 0,
+            "completed": totals["completed"] if totals else 0,
+            "parents": [dict(row) for row in parents],
+            "daily": [dict(row) for row in daily],
+        }
 
-    async def get_by_id(self, task_id: int) -> dict[str, Any] | None:
+    @_coalesced
+    async def get_by_id(self, task_id: int) -> TaskRow | None:
         """Return a single task by ID, or None if not found."""
-        cursor = await self.db.execute(
-            "SELECT * FROM tasks WHERE id = ?", (task_id,)
+        row = await self._fetchone(
+            f"SELECT {_TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,), method="get_by_id"
         )
-        row = await cursor.fetchone()
-        return dict(row) if row else None
+        return cast(TaskRow, dict(row)) if row else None
 
-    async def update_completed(self, task_id: int, completed: bool) -> dict[str, Any] | None:
+    async def update_completed(self, task_id: int, completed: bool) -> TaskRow | None:
         """Mark a task as completed or incomplete. Returns updated task or None."""
-        await self.db.execute(
+        await self._write(
             "UPDATE tasks SET completed = ? WHERE id = ?",
             (completed, task_id),
+            method="update_completed",
         )
-        await self.db.commit()
+        self.changes.publish((task_uri(task_id), *map(list_uri, LIST_FILTERS)))
         return await self.get_by_id(task_id)
 
     async def delete(self, task_id: int) -> bool:
         """Delete a task by ID. Returns True if a row was deleted."""
-        cursor = await self.db.execute(
-            "DELETE FROM tasks WHERE id = ?", (task_id,)
+        # Subtasks go with it by cascade; only look them up if someone is watching
+        deleted = [task_id]
+        if self.changes.has_subscribers("task://"):
+            rows = await self._fetchall(
+                "WITH RECURSIVE subtree(id) AS (SELECT id FROM tasks WHERE parent_id = ?"
+                " UNION ALL SELECT tasks.id FROM tasks JOIN subtree ON tasks.parent_id = subtree.id)"
+                " SELECT id FROM subtree",
+                (task_id,),
+                method="delete",
+            )
+            deleted.extend(row["id"] for row in rows)
+        cursor = await self._write(
+            "DELETE FROM tasks WHERE id = ?", (task_id,), method="delete"
         )
-        await self.db.commit()
+        if cursor.rowcount > 0:
+            self.changes.publish((*map(task_uri, deleted), *map(list_uri, LIST_FILTERS)))
         return cursor.rowcount > 0
 
     async def create_subtasks(
         self, parent_id: int, titles: list[str]
-    ) -> list[dict[str, Any]]:
+    ) -> list[TaskRow]:
         """Create multiple subtasks under a parent. Returns the created subtasks."""
         subtasks = []
         for title in titles:
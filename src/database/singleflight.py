@@ -0,0 +1,87 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+Callers that ask for the same key while a computation for it is running
+await that computation instead of starting their own. Keys are scoped to a
+write generation: every committed write bumps it, so a caller arriving after
+a write never joins a read that may have started before it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Mapping
+from typing import Any, TypeVar
+
+_T = TypeVar("_T")
+
+
+def freeze(value: Any) -> Hashable:
+    """Return a hashable equivalent of nested dicts, lists and sets.
+
+    Raises TypeError if some leaf value cannot be hashed.
+    """
+    if isinstance(value, Mapping):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    leaf: Hashable = value
+    hash(leaf)
+    return leaf
+
+
+class SingleFlight:
+    """Share one in-flight computation among concurrent callers with the same key.
+
+    Results are shared, not copied, so callers must treat them as read-only.
+    """
+
+    def __init__(self) -> None:
+        self.generation = 0
+        self.calls = 0
+        self.coalesced = 0
+        self._calls: dict[Hashable, asyncio.Future[Any]] = {}
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of calls that joined a computation already in flight."""
+        return self.coalesced / self.calls if self.calls else 0.0
+
+    def invalidate(self) -> None:
+        """Start a new generation; reads already in flight are not joined again."""
+        self.generation += 1
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[_T]]) -> _T:
+        """Return ``fn()``, or the result of an identical call already running."""
+        self.calls += 1
+        scoped = (self.generation, key)
+        pending = self._calls.get(scoped)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller running the computation was cancelled; run our own
+                return await self.run(key, fn)
+
+        future: asyncio.Future[_T] = asyncio.get_running_loop().create_future()
+        self._calls[scoped] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark it retrieved; with no waiters the caller alone sees the error
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(scoped) is future:
+                del self._calls[scoped]
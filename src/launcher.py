@@ -0,0 +1,200 @@
+"""Multi-process launcher behind ``python -m src``.
+
+Starts one server process per worker. Each binds the port itself with
+SO_REUSEPORT, so the kernel spreads new connections evenly across them
+rather than all workers contending to accept on one shared socket. Workers
+run uvicorn with uvloop and httptools when those are installed. The parent
+imports none of the server stack: it only starts workers, replaces any that
+die, and passes shutdown on to them.
+
+A stateful MCP session lives in the memory of the process that created it,
+while SO_REUSEPORT routes each TCP connection independently, so later
+requests of a session could reach a worker that has never seen it. More
+than one worker therefore requires MCP_STATELESS_HTTP.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from multiprocessing.connection import wait
+from multiprocessing.process import BaseProcess
+from types import FrameType
+
+from src.config import (
+    DRAIN_PRE_STOP_DELAY,
+    DRAIN_TIMEOUT,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    MCP_SERVER_HOST,
+    MCP_SERVER_PORT,
+    MCP_STATELESS_HTTP,
+    SERVER_HTTP,
+    SERVER_LOOP,
+    WORKERS,
+)
+from src.observability.logs import configure_logging, shutdown_logging
+
+logger = logging.getLogger(__name__)
+
+# A worker that exits sooner than this after starting is failing to start;
+# replacing it would only loop, so the launcher shuts down instead
+_MIN_WORKER_LIFETIME = 5.0
+
+
+def resolve_workers(configured: int, stateless: bool) -> int:
+    """Return how many workers to start for a WORKERS setting (0 = one per core)."""
+    count = configured
+    if count <= 0:
+        count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    if count > 1 and not stateless:
+        logger.warning("Stateful MCP sessions are pinned to one process; starting 1 worker, not %d", count)
+        return 1
+    if count > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        logger.warning("SO_REUSEPORT is not available on this platform; starting 1 worker")
+        return 1
+    return count
+
+
+def resolve_loop(setting: str) -> str:
+    if setting == "auto":
+        return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    return setting
+
+
+def resolve_http(setting: str) -> str:
+    if setting == "auto":
+        return "httptools" if importlib.util.find_spec("httptools") else "h11"
+    return setting
+
+
+def bind_socket(host: str, port: int, reuse_port: bool = False) -> socket.socket:
+    """Bind a listening TCP socket, optionally shared with other processes."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((host, port))
+        sock.listen(2048)
+    except OSError:
+        sock.close()
+        raise
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve(host: str, port: int, reuse_port: bool = False) -> None:
+    """Run one server process on the calling thread until it is signalled to stop."""
+    import uvicorn
+
+    from src.lifecycle import DrainingServer
+    from src.server import app
+    from src.tools.admission import ADMISSION
+
+    sock = bind_socket(host, port, reuse_port)
+    loop, http = resolve_loop(SERVER_LOOP), resolve_http(SERVER_HTTP)
+    logger.info("Worker serving", extra={"pid": os.getpid(), "loop": loop, "http": http})
+    config = uvicorn.Config(
+        app,
+        loop=loop,
+        http=http,
+        log_level=LOG_LEVEL.lower(),
+        timeout_graceful_shutdown=int(DRAIN_TIMEOUT),
+    )
+    DrainingServer(config, ADMISSION, DRAIN_PRE_STOP_DELAY).run(sockets=[sock])
+
+
+def _worker_main(host: str, port: int) -> None:
+    # Own process group, so a terminal's Ctrl-C reaches only the launcher,
+    # which then stops each worker exactly once
+    os.setpgrp()
+    serve(host, port, reuse_port=True)
+
+
+class Launcher:
+    """Starts and supervises worker processes sharing one port."""
+
+    def __init__(self, workers: int, host: str, port: int) -> None:
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: dict[BaseProcess, float] = {}
+        self._stopping = threading.Event()
+
+    def _start_worker(self) -> None:
+        process = self._context.Process(
+            target=_worker_main, args=(self.host, self.port), name="todo-worker", daemon=False
+        )
+        process.start()
+        self._processes[process] = time.monotonic()
+
+    def _handle_signal(self, signum: int, frame: FrameType | None) -> None:
+        self._stopping.set()
+
+    def run(self) -> int:
+        """Supervise workers until signalled; returns the process exit code."""
+        signal.signal(signal.SIGINT, self._handle_signal)
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        logger.info(
+            "Starting workers",
+            extra={"workers": self.workers, "host": self.host, "port": self.port, "pid": os.getpid()},
+        )
+        for _ in range(self.workers):
+            self._start_worker()
+
+        exit_code = 0
+        while not self._stopping.is_set():
+            for sentinel in wait([p.sentinel for p in self._processes], timeout=0.5):
+                process = next(p for p in self._processes if p.sentinel == sentinel)
+                started = self._processes.pop(process)
+                process.join()
+                if self._stopping.is_set():
+                    break
+                if time.monotonic() - started < _MIN_WORKER_LIFETIME:
+                    logger.error("Worker %s failed to start (exit code %s)", process.pid, process.exitcode)
+                    self._stopping.set()
+                    exit_code = 1
+                    break
+                logger.warning("Worker %s exited with code %s; replacing it", process.pid, process.exitcode)
+                self._start_worker()
+
+        self._stop_workers()
+        return exit_code
+
+    def _stop_workers(self) -> None:
+        for process in self._processes:
+            if process.is_alive() and process.pid is not None:
+                os.kill(process.pid, signal.SIGTERM)
+        # Workers drain for up to DRAIN_TIMEOUT twice: open connections, then tool calls
+        deadline = time.monotonic() + 2 * DRAIN_TIMEOUT + 5
+        for process in self._processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.error("Worker %s did not stop in time; killing it", process.pid)
+                process.kill()
+                process.join()
+        self._processes.clear()
+
+
+def main() -> None:
+    """Run the server with the configured number of workers."""
+    configure_logging(LOG_LEVEL, LOG_FORMAT)
+    workers = resolve_workers(WORKERS, MCP_STATELESS_HTTP)
+    if workers == 1:
+        serve(MCP_SERVER_HOST, MCP_SERVER_PORT)
+        return
+    try:
+        exit_code = Launcher(workers, MCP_SERVER_HOST, MCP_SERVER_PORT).run()
+    finally:
+        shutdown_logging()
+    sys.exit(exit_code)
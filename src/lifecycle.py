@@ -0,0 +1,261 @@
+"""Process lifecycle: startup warmup, readiness and shutdown drain.
+
+The MCP lifespan in ``src.server`` runs once per session; the work here runs
+once per process, from the HTTP app's lifespan. Warmup happens in the
+background so ``/healthz`` answers immediately, while ``/readyz`` reports
+ready only once warmup has finished. On shutdown the process drains: it
+stops admitting tool calls, lets running ones finish, and waits for
+background jobs and shutdown hooks before the database is closed. Under
+``DrainingServer`` the drain starts from the exit signal, while uvicorn
+still accepts connections, so ``/readyz`` can report it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import socket
+import time
+from collections.abc import Awaitable, Callable, Coroutine
+from typing import Any
+
+import uvicorn
+
+from src.database.connection import get_connection, init_db
+from src.database.models import TaskRepository
+from src.tools.admission import AdmissionController
+from src.tools.task_tools import handle_tool_call
+
+logger = logging.getLogger(__name__)
+
+WarmupHook = Callable[[TaskRepository], Awaitable[None]]
+
+ShutdownHook = Callable[[], Awaitable[None]]
+
+# Extra warmup steps, e.g. cache pre-loading, run after the built-in ones
+WARMUP_HOOKS: list[WarmupHook] = []
+
+# Steps run while draining, e.g. flushing queued writes, before the database closes
+SHUTDOWN_HOOKS: list[ShutdownHook] = []
+
+
+class Readiness:
+    """Whether the process has finished warming up."""
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.draining = False
+        self.error: str | None = None
+        self.steps: dict[str, float] = {}
+
+    def report(self) -> dict[str, Any]:
+        if self.draining:
+            status = "draining"
+        else:
+            status = "ready" if self.ready else "failed" if self.error else "warming_up"
+        report: dict[str, Any] = {"status": status, "warmup_ms": self.steps}
+        if self.error:
+            report["error"] = self.error
+        return report
+
+
+READINESS = Readiness()
+
+
+class BackgroundJobs:
+    """Fire-and-forget tasks that shutdown waits for instead of losing."""
+
+    def __init__(self) -> None:
+        self._tasks: set[asyncio.Task[Any]] = set()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def spawn(self, coro: Coroutine[Any, Any, Any]) -> asyncio.Task[Any]:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._finished)
+        return task
+
+    def _finished(self, task: asyncio.Task[Any]) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background job failed", exc_info=task.exception())
+
+    async def wait(self, timeout: float) -> int:
+        """Wait up to ``timeout`` seconds for every job, then cancel the rest.
+
+        Returns how many were cancelled.
+        """
+        if not self._tasks:
+            return 0
+        _, pending = await asyncio.wait(set(self._tasks), timeout=max(timeout, 0))
+        for task in pending:
+            task.cancel()
+        return len(pending)
+
+
+BACKGROUND_JOBS = BackgroundJobs()
+
+
+def register_warmup(hook: WarmupHook) -> WarmupHook:
+    """Add a warmup step; usable as a decorator."""
+    WARMUP_HOOKS.append(hook)
+    return hook
+
+
+def register_shutdown(hook: ShutdownHook) -> ShutdownHook:
+    """Add a drain step; usable as a decorator."""
+    SHUTDOWN_HOOKS.append(hook)
+    return hook
+
+
+async def _step(steps: dict[str, float], name: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """Run one warmup step, recording how many milliseconds it took."""
+    start = time.perf_counter()
+    result = await fn()
+    steps[name] = round((time.perf_counter() - start) * 1e3, 3)
+    return result
+
+
+async def warm_up(repo: TaskRepository, touch_indexes: bool = True, statements: bool = True) -> dict[str, float]:
+    """Warm the page cache, statement cache, tool pipeline and any hooks.
+
+    Returns the milliseconds each step took.
+    """
+    steps: dict[str, float] = {}
+    if touch_indexes:
+        await _step(steps, "indexes", repo.touch_indexes)
+    if statements:
+        await _step(steps, "statements", repo.prepare_statements)
+
+    async def run_read_tools() -> None:
+        # Exercises validation, handlers, middleware and response encoding
+        await handle_tool_call("list_tasks", {"limit": 1}, repo)
+        await handle_tool_call("task_stats", {}, repo)
+
+    await _step(steps, "tools", run_read_tools)
+    for hook in WARMUP_HOOKS:
+        await _step(steps, getattr(hook, "__name__", "hook"), functools.partial(hook, repo))
+    return steps
+
+
+async def run_warmup(
+    db_path: str,
+    touch_indexes: bool = True,
+    state: Readiness = READINESS,
+    serving: Callable[[], Awaitable[TaskRepository]] | None = None,
+) -> None:
+    """Warm up and mark the process ready.
+
+    The indexes are read into the page cache, which every connection shares,
+    on a dedicated connection. Prepared statements are per connection, so
+    when the process serves requests on one connection (stateless mode),
+    ``serving`` opens it and the rest of the warmup runs there; the first
+    request then finds it open and warm. Otherwise each session opens and
+    prepares its own connection, and the tools and hooks run on the
+    dedicated one, which warms only the code paths.
+
+    Failures are logged and recorded; the process then stays not-ready.
+    """
+    start = time.perf_counter()
+    steps: dict[str, float] = {}
+    try:
+        db = await get_connection(db_path)
+        try:
+            await init_db(db)
+            side = TaskRepository(db)
+            if touch_indexes:
+                await _step(steps, "indexes", side.touch_indexes)
+            if serving is None:
+                steps.update(await warm_up(side, touch_indexes=False, statements=False))
+        finally:
+            await db.close()
+        if serving is not None:
+            repo = await _step(steps, "connection", serving)
+            steps.update(await warm_up(repo, touch_indexes=False))
+    except Exception as e:
+        logger.exception("Warmup failed")
+        state.error = f"{type(e).__name__}: {e}"
+        return
+    state.steps = steps
+    state.ready = True
+    logger.info(
+        "Warmup finished",
+        extra={"duration_ms": round((time.perf_counter() - start) * 1e3, 3), "steps": state.steps},
+    )
+
+
+def begin_drain(admission: AdmissionController, state: Readiness = READINESS) -> None:
+    """Fail readiness, so load balancers stop sending traffic here, and stop admitting calls."""
+    state.ready = False
+    state.draining = True
+    admission.close()
+
+
+class DrainingServer(uvicorn.Server):
+    """A uvicorn server that starts draining as soon as it is told to exit.
+
+    Uvicorn closes its listeners and connections before the app's lifespan
+    shutdown runs ``drain``, so a drain begun there is never seen: nothing
+    is left to answer ``/readyz``. This server begins the drain first, then
+    keeps serving for ``pre_stop_delay`` seconds, for load balancers to see
+    ``/readyz`` report draining, before its own shutdown proceeds. A second
+    Ctrl-C cuts the delay short.
+    """
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        admission: AdmissionController,
+        pre_stop_delay: float = 0.0,
+        state: Readiness = READINESS,
+    ) -> None:
+        super().__init__(config)
+        self.admission = admission
+        self.pre_stop_delay = pre_stop_delay
+        self.state = state
+
+    async def shutdown(self, sockets: list[socket.socket] | None = None) -> None:
+        begin_drain(self.admission, self.state)
+        deadline = time.monotonic() + self.pre_stop_delay
+        # Polled like uvicorn's own shutdown waits, so a forced exit is prompt
+        while not self.force_exit and time.monotonic() < deadline:
+            await asyncio.sleep(min(0.1, deadline - time.monotonic()))
+        await super().shutdown(sockets)
+
+
+async def drain(
+    admission: AdmissionController,
+    timeout: float,
+    jobs: BackgroundJobs = BACKGROUND_JOBS,
+    state: Readiness = READINESS,
+) -> dict[str, Any]:
+    """Stop taking calls and wait for outstanding work, all within ``timeout`` seconds.
+
+    Reports what was left behind: calls still running at the deadline,
+    background jobs cancelled, and shutdown hooks that failed or ran out of
+    time.
+    """
+    start = time.perf_counter()
+    deadline = time.monotonic() + timeout
+    begin_drain(admission, state)
+    calls_abandoned = await admission.wait_idle(timeout)
+    jobs_dropped = await jobs.wait(deadline - time.monotonic())
+
+    hooks_failed: list[str] = []
+    for hook in SHUTDOWN_HOOKS:
+        name = getattr(hook, "__name__", "hook")
+        try:
+            await asyncio.wait_for(hook(), max(deadline - time.monotonic(), 0))
+        except Exception:
+            logger.exception("Shutdown hook %s failed", name)
+            hooks_failed.append(name)
+
+    return {
+        "duration_ms": round((time.perf_counter() - start) * 1e3, 3),
+        "calls_abandoned": calls_abandoned,
+        "jobs_dropped": jobs_dropped,
+        "hooks_failed": hooks_failed,
+    }
@@ -0,0 +1,24 @@
+from .exposition import CONTENT_TYPE, render_prometheus
+from .logs import JsonFormatter, configure_logging, shutdown_logging
+from .metrics import REGISTRY, Counter, Gauge, Histogram, MetricsRegistry
+from .process import register_process_metrics
+from .tracing import TRACER, JsonLinesExporter, RingBufferExporter, Span, Tracer
+
+__all__ = [
+    "CONTENT_TYPE",
+    "REGISTRY",
+    "TRACER",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "JsonFormatter",
+    "JsonLinesExporter",
+    "MetricsRegistry",
+    "RingBufferExporter",
+    "Span",
+    "Tracer",
+    "configure_logging",
+    "register_process_metrics",
+    "render_prometheus",
+    "shutdown_logging",
+]
@@ -0,0 +1,59 @@
+"""Prometheus text exposition of a MetricsRegistry.
+
+Rendering walks every series once at scrape time; nothing here runs on the
+recording path.
+"""
+
+from __future__ import annotations
+
+from .metrics import REGISTRY, LabelKey, MetricsRegistry
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(key: LabelKey, *extra: tuple[str, str]) -> str:
+    pairs = (*key, *extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _header(lines: list[str], registry: MetricsRegistry, name: str, kind: str) -> None:
+    help = registry.help.get(name)
+    if help:
+        lines.append(f"# HELP {name} {_escape(help)}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def render_prometheus(registry: MetricsRegistry = REGISTRY) -> str:
+    """Return every metric in the Prometheus text format, version 0.0.4."""
+    lines: list[str] = []
+    for name, counters in registry.counters().items():
+        _header(lines, registry, name, "counter")
+        for key, counter in counters.items():
+            lines.append(f"{name}{_labels(key)} {counter.value}")
+
+    for name, gauges in registry.gauges().items():
+        _header(lines, registry, name, "gauge")
+        for key, gauge in gauges.items():
+            lines.append(f"{name}{_labels(key)} {_number(gauge.value)}")
+
+    for name, histograms in registry.histograms().items():
+        _header(lines, registry, name, "histogram")
+        for key, histogram in histograms.items():
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(key, ('le', _number(bound)))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(key, ('le', '+Inf'))} {histogram.count}")
+            lines.append(f"{name}_sum{_labels(key)} {_number(histogram.sum)}")
+            lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+    return "\n".join(lines) + "\n"
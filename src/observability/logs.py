@@ -0,0 +1,93 @@
+"""Non-blocking structured logging.
+
+Handlers attached to the root logger only enqueue the record; a listener
+thread formats it as one JSON object per line and writes it to stderr. The
+event loop never pays for formatting or for a blocking write.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RECORD_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+_listener: QueueListener | None = None
+_handler: QueueHandler | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON, including ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue records unformatted, leaving all formatting to the listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(level: str, format: str = "json") -> None:
+    """Route all logging through a background thread.
+
+    ``format`` is ``"json"`` for structured records or ``"text"`` for the
+    plain single-line format. Calling it again replaces the previous setup.
+    """
+    global _listener, _handler
+
+    stream = logging.StreamHandler(sys.stderr)
+    if format == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
+
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(records)
+    listener = QueueListener(records, stream, respect_handler_level=True)
+
+    root = logging.getLogger()
+    shutdown_logging()
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, level.upper()))
+    listener.start()
+    _listener, _handler = listener, handler
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and detach the background handler."""
+    global _listener, _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,179 @@
+"""In-process metrics: counters and bucketed histograms.
+
+Metrics are plain Python objects updated from the event loop thread, so
+recording is a couple of list/int operations with no locking. Histograms use
+fixed bucket boundaries, which keeps both ``observe`` and quantile estimation
+(p50/p95/p99) independent of how many samples have been recorded.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Callable
+from typing import Any
+
+
+def _exponential_buckets(start: float, factor: float, count: int) -> tuple[float, ...]:
+    return tuple(start * factor**i for i in range(count))
+
+
+# 10 µs .. ~80 s, four buckets per doubling (~19% relative error on quantiles)
+LATENCY_BUCKETS = _exponential_buckets(1e-5, 2**0.25, 93)
+
+# 64 B .. 64 MiB, one bucket per doubling
+SIZE_BUCKETS = _exponential_buckets(64, 2, 21)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+
+class Gauge:
+    """Point-in-time value read from a callback when metrics are collected."""
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn: Callable[[], float]) -> None:
+        self.fn = fn
+
+    @property
+    def value(self) -> float:
+        return self.fn()
+
+
+class Histogram:
+    """Distribution of observed values over fixed upper-bound buckets."""
+
+    __slots__ = ("bounds", "count", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.bounds = bounds
+        # The final slot counts observations above the largest bound
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile by interpolating within its bucket."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if n and cumulative + n >= rank:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - cumulative) / n
+            cumulative += n
+        return self.bounds[-1]
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """Get-or-create store of labelled counters and histograms."""
+
+    def __init__(self) -> None:
+        self._counters: dict[str, dict[LabelKey, Counter]] = {}
+        self._histograms: dict[str, dict[LabelKey, Histogram]] = {}
+        self._gauges: dict[str, dict[LabelKey, Gauge]] = {}
+        self._histogram_bounds: dict[str, tuple[float, ...]] = {}
+        self.help: dict[str, str] = {}
+
+    def counter(self, name: str, help: str = "", **labels: str) -> Counter:
+        series = self._counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        counter = series.get(key)
+        if counter is None:
+            counter = series[key] = Counter()
+            self.help.setdefault(name, help)
+        return counter
+
+    def gauge(self, name: str, fn: Callable[[], float], help: str = "", **labels: str) -> Gauge:
+        """Register ``fn`` as the source of a gauge, replacing any earlier one."""
+        gauge = Gauge(fn)
+        self._gauges.setdefault(name, {})[tuple(sorted(labels.items()))] = gauge
+        self.help.setdefault(name, help)
+        return gauge
+
+    def histogram(
+        self,
+        name: str,
+        help: str = "",
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        **labels: str,
+    ) -> Histogram:
+        series = self._histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            bounds = self._histogram_bounds.setdefault(name, buckets)
+            histogram = series[key] = Histogram(bounds)
+            self.help.setdefault(name, help)
+        return histogram
+
+    def counters(self) -> dict[str, dict[LabelKey, Counter]]:
+        return self._counters
+
+    def histograms(self) -> dict[str, dict[LabelKey, Histogram]]:
+        return self._histograms
+
+    def gauges(self) -> dict[str, dict[LabelKey, Gauge]]:
+        return self._gauges
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return current values; cost scales with series, not samples."""
+        return {
+            "counters": {
+                name: [{"labels": dict(key), "value": c.value} for key, c in series.items()]
+                for name, series in self._counters.items()
+            },
+            "gauges": {
+                name: [{"labels": dict(key), "value": g.value} for key, g in series.items()]
+                for name, series in self._gauges.items()
+            },
+            "histograms": {
+                name: [{"labels": dict(key), **h.summary()} for key, h in series.items()]
+                for name, series in self._histograms.items()
+            },
+        }
+
+    def reset(self) -> None:
+        """Zero every series in place so cached metric handles stay valid.
+
+        Gauges are left alone; they have no state of their own.
+        """
+        for counters in self._counters.values():
+            for counter in counters.values():
+                counter.value = 0
+        for histograms in self._histograms.values():
+            for histogram in histograms.values():
+                histogram.counts = [0] * len(histogram.counts)
+                histogram.count = 0
+                histogram.sum = 0.0
+
+
+REGISTRY = MetricsRegistry()
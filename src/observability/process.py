@@ -0,0 +1,35 @@
+"""Process-level gauges."""
+
+from __future__ import annotations
+
+import os
+import sys
+
+from .metrics import REGISTRY, MetricsRegistry
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None  # type: ignore[assignment]
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def resident_memory_bytes() -> int:
+    """Return the current resident set size, or the peak where that is all we can read."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def register_process_metrics(registry: MetricsRegistry = REGISTRY) -> None:
+    registry.gauge(
+        "process_resident_memory_bytes", resident_memory_bytes, "Resident memory size in bytes"
+    )
@@ -0,0 +1,191 @@
+"""Lightweight request tracing with head-based sampling.
+
+A trace is a tree of spans: one per MCP request, one per tool dispatch and
+one per SQL statement. Whether a trace is recorded is decided once, when its
+root span starts; for unsampled traces every nested ``span()`` call is a
+context-variable read returning a shared no-op, so tracing that is off costs
+next to nothing. Finished spans go to an exporter: an in-memory ring buffer
+the debug route reads, or a JSON-lines file.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar, Token
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Protocol
+
+from src.config import TRACE_BUFFER_SIZE, TRACE_FILE, TRACE_SAMPLE_RATE
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+class Exporter(Protocol):
+    def export(self, span: Span) -> None: ...
+
+
+class Span:
+    """A timed operation within a trace; use as a context manager."""
+
+    __slots__ = (
+        "_started",
+        "_token",
+        "attributes",
+        "duration",
+        "name",
+        "parent_id",
+        "span_id",
+        "start",
+        "trace_id",
+        "tracer",
+    )
+
+    def __init__(
+        self,
+        tracer: Tracer,
+        name: str,
+        trace_id: str,
+        parent_id: str | None,
+        attributes: dict[str, Any],
+    ) -> None:
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = 0.0
+        self.duration = 0.0
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> Self:
+        self._token: Token[Span | object | None] = _current.set(self)
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.duration = time.perf_counter() - self._started
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        _current.reset(self._token)
+        self.tracer.exporter.export(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1e3, 3),
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stand-in for spans of unsampled traces."""
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    # Not Self: _UnsampledRoot enters as the shared no-op span
+    def __enter__(self) -> _NoopSpan:  # noqa: PYI034
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+
+class _UnsampledRoot(_NoopSpan):
+    """Marks the rest of an unsampled trace so nested spans skip sampling."""
+
+    __slots__ = ("_token",)
+
+    def __enter__(self) -> _NoopSpan:
+        self._token = _current.set(_UNSAMPLED)
+        return _NOOP
+
+    def __exit__(self, *exc_info: object) -> None:
+        _current.reset(self._token)
+
+
+_NOOP = _NoopSpan()
+_UNSAMPLED = object()
+_current: ContextVar[Span | object | None] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Creates spans and decides, per trace, whether to record them."""
+
+    def __init__(self, sample_rate: float, exporter: Exporter) -> None:
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    def span(self, name: str, **attributes: Any) -> Span | _NoopSpan:
+        """Return a span nested in the current one, or a new trace's root."""
+        parent = _current.get()
+        if parent is _UNSAMPLED:
+            return _NOOP
+        if isinstance(parent, Span):
+            return Span(self, name, parent.trace_id, parent.span_id, attributes)
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return _UnsampledRoot()
+        return Span(self, name, f"{random.getrandbits(128):032x}", None, attributes)
+
+
+class RingBufferExporter:
+    """Keeps the most recent finished spans in memory."""
+
+    def __init__(self, capacity: int) -> None:
+        self.spans: deque[Span] = deque(maxlen=capacity)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def query(self, trace_id: str | None = None, limit: int = 100) -> list[dict[str, Any]]:
+        """Return the newest spans first, optionally for one trace only."""
+        found: list[dict[str, Any]] = []
+        for span in reversed(self.spans):
+            if trace_id is None or span.trace_id == trace_id:
+                found.append(span.to_dict())
+                if len(found) >= limit:
+                    break
+        return found
+
+
+class JsonLinesExporter:
+    """Appends each finished span to a file as one JSON object per line."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        # Line buffered, so each span reaches the file as soon as it ends
+        self._file = open(path, "a", buffering=1, encoding="utf-8")  # noqa: SIM115
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+TRACER = Tracer(
+    TRACE_SAMPLE_RATE,
+    JsonLinesExporter(TRACE_FILE) if TRACE_FILE else RingBufferExporter(TRACE_BUFFER_SIZE),
+)
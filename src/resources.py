@@ -0,0 +1,61 @@
+"""Resource URIs for reading and subscribing to tasks.
+
+- ``task://{id}``: one task.
+- ``tasks://list``: the list_tasks response; ``?filter=complete`` or
+  ``?filter=incomplete`` narrows it, like the tool's ``filter`` argument.
+
+Each resource maps to one change-feed topic, whichever way its URI is
+written, so ``tasks://list`` and ``tasks://list?filter=all`` are the same
+subscription.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from mcp.server.fastmcp.resources import ResourceTemplate
+
+from src.database.changes import LIST_FILTERS, list_uri, task_uri
+
+LIST_TEMPLATE = "tasks://list{?filter}"
+
+
+def parse_resource_uri(uri: str) -> tuple[str, dict[str, Any]]:
+    """Return ``("task", {"task_id": ...})`` or ``("list", {"filter": ...})``.
+
+    Raises ValueError for a URI that names no resource.
+    """
+    parts = urlsplit(uri)
+    if parts.path not in ("", "/") or parts.fragment:
+        raise ValueError(f"Unknown resource: {uri}")
+    if parts.scheme == "task" and not parts.query and parts.netloc.isdigit():
+        return "task", {"task_id": int(parts.netloc)}
+    if parts.scheme == "tasks" and parts.netloc == "list":
+        query = parse_qs(parts.query, keep_blank_values=True)
+        filters = query.pop("filter", ["all"])
+        if query or len(filters) != 1 or filters[0] not in LIST_FILTERS:
+            raise ValueError(f"Unknown resource: {uri}; filter must be one of {', '.join(LIST_FILTERS)}")
+        return "list", {"filter": filters[0]}
+    raise ValueError(f"Unknown resource: {uri}")
+
+
+def resource_topic(uri: str) -> str:
+    """Return the change-feed topic for a resource URI."""
+    kind, params = parse_resource_uri(uri)
+    return task_uri(params["task_id"]) if kind == "task" else list_uri(params["filter"])
+
+
+class TaskListTemplate(ResourceTemplate):
+    """Matches ``tasks://list`` with its optional ``filter`` query parameter.
+
+    FastMCP templates match path segments only, not an RFC 6570 query
+    expression like ``{?filter}``.
+    """
+
+    def matches(self, uri: str) -> dict[str, Any] | None:
+        try:
+            kind, params = parse_resource_uri(uri)
+        except ValueError:
+            return None
+        return params if kind == "list" else None
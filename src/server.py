@@ -9,28 +9,110 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-from contextlib import asynccontextmanager
+import sqlite3
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, suppress
 from pathlib import Path
-from collections.abc import AsyncIterator
 from typing import Any
 
+import anyio
 from mcp.server.fastmcp import Context, FastMCP
-
-from src.config import DATABASE_PATH, LOG_LEVEL, MCP_SERVER_HOST, MCP_SERVER_PORT
-from src.database.connection import get_connection, init_db
+from mcp.server.fastmcp.exceptions import ResourceError
+from mcp.server.session import ServerSession
+from mcp.shared.exceptions import McpError
+from mcp.types import (
+    INVALID_PARAMS,
+    INVALID_REQUEST,
+    CallToolResult,
+    ErrorData,
+    ServerCapabilities,
+    TextContent,
+)
+from pydantic import AnyUrl
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from src.compression import CompressionMiddleware
+from src.config import (
+    COMPRESSION_ENCODINGS,
+    COMPRESSION_MIN_SIZE,
+    DATABASE_PATH,
+    DRAIN_PRE_STOP_DELAY,
+    DRAIN_TIMEOUT,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    MCP_JSON_RESPONSE,
+    MCP_SERVER_HOST,
+    MCP_SERVER_PORT,
+    MCP_STATELESS_HTTP,
+    MCP_STRUCTURED_OUTPUT,
+    RESOURCE_NOTIFY_WINDOW,
+    SERVER_HTTP,
+    SERVER_LOOP,
+    SESSION_MAX_SIZE,
+    SESSION_STORE,
+    SESSION_TTL,
+    WARMUP_ENABLED,
+    WARMUP_TOUCH_INDEXES,
+)
+from src.database.changes import ChangeFeed, Deliver
+from src.database.connection import checkpoint_wal, get_connection, init_db
 from src.database.models import TaskRepository
-from src.tools.task_tools import handle_tool_call
-
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+from src.database.singleflight import SingleFlight
+from src.lifecycle import BACKGROUND_JOBS, READINESS, DrainingServer, drain, run_warmup
+from src.observability import (
+    CONTENT_TYPE,
+    REGISTRY,
+    TRACER,
+    RingBufferExporter,
+    configure_logging,
+    register_process_metrics,
+    render_prometheus,
 )
+from src.resources import LIST_TEMPLATE, TaskListTemplate, resource_topic
+from src.sessions import SessionStore, create_session_store
+from src.tools.admission import ADMISSION
+from src.tools.schemas import OUTPUT_MODES
+from src.tools.task_tools import handle_tool_call_encoded
+from src.ui import STYLESHEET, STYLESHEET_URI, fragment_cache_info
+
+configure_logging(LOG_LEVEL, LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
 
-@asynccontextmanager
-async def lifespan(server: FastMCP[TaskRepository]) -> AsyncIterator[TaskRepository]:
-    """Manage database connection lifecycle."""
+# Shared by every session's repository so identical reads coalesce across
+# them, and so subscribers hear about writes made through any session
+_reads = SingleFlight()
+_changes = ChangeFeed(RESOURCE_NOTIFY_WINDOW)
+
+register_process_metrics()
+REGISTRY.gauge("read_calls", lambda: _reads.calls, "Repository reads and read-only tool calls")
+REGISTRY.gauge(
+    "read_calls_coalesced", lambda: _reads.coalesced, "Reads served by a call already in flight"
+)
+REGISTRY.gauge(
+    "read_coalescing_hit_ratio", lambda: _reads.hit_ratio, "Fraction of reads that were coalesced"
+)
+REGISTRY.gauge(
+    "resource_subscribers", lambda: _changes.subscribers, "Sessions subscribed to a resource"
+)
+REGISTRY.gauge(
+    "resource_subscriptions", lambda: _changes.subscriptions, "Resource subscriptions across all sessions"
+)
+REGISTRY.gauge(
+    "ui_fragment_cache_hits", lambda: fragment_cache_info().hits, "Card fragments served from the cache"
+)
+REGISTRY.gauge(
+    "ui_fragment_cache_misses", lambda: fragment_cache_info().misses, "Card fragments rendered afresh"
+)
+REGISTRY.gauge(
+    "ui_fragment_cache_size", lambda: fragment_cache_info().currsize, "Card fragments held in the cache"
+)
+
+
+async def _open_repository() -> TaskRepository:
     db_path = str(DATABASE_PATH)
     Path(db_path).parent.mkdir(parents=True, exist_ok=True)
 
@@ -38,21 +120,81 @@ async def lifespan(server: FastMCP[TaskRepository]) -> AsyncIterator[TaskReposit
     db = await get_connection(db_path)
     await init_db(db)
     logger.info("Database initialized")
+    repo = TaskRepository(db, flight=_reads, changes=_changes)
+    if WARMUP_ENABLED:
+        await repo.prepare_statements()
+    return repo
+
+
+# In stateless mode every request is its own MCP session, so requests share
+# one repository for the life of the process rather than each opening one
+_shared_repo: TaskRepository | None = None
+_shared_repo_lock = asyncio.Lock()
+
+
+async def _shared_repository() -> TaskRepository:
+    global _shared_repo
+    if _shared_repo is None:
+        async with _shared_repo_lock:
+            if _shared_repo is None:
+                _shared_repo = await _open_repository()
+    return _shared_repo
+
+
+async def _close_database() -> dict[str, int] | None:
+    """Checkpoint the WAL into the database file, then close the shared connection.
 
+    Without a shared repository (stateful mode) a short-lived connection
+    runs the checkpoint. Returns the checkpoint result, or None on failure.
+    """
+    global _shared_repo
+    repo, _shared_repo = _shared_repo, None
+    try:
+        db = repo.db if repo is not None else await get_connection(str(DATABASE_PATH))
+    except (sqlite3.Error, OSError):
+        logger.exception("Could not open the database to checkpoint it")
+        return None
     try:
-        yield TaskRepository(db)
+        return await checkpoint_wal(db)
+    except sqlite3.Error:
+        logger.exception("WAL checkpoint failed")
+        return None
     finally:
-        logger.info("Closing database connection")
         await db.close()
 
 
+@asynccontextmanager
+async def lifespan(server: FastMCP[TaskRepository]) -> AsyncIterator[TaskRepository]:
+    """Manage database connection lifecycle."""
+    if MCP_STATELESS_HTTP:
+        yield await _shared_repository()
+        return
+
+    repo = await _open_repository()
+    try:
+        yield repo
+    finally:
+        # The session's resource subscriptions are keyed by its repository
+        _changes.remove(repo)
+        logger.info("Closing database connection")
+        # A session usually ends by cancellation; unshielded, the close would
+        # be interrupted and leave the connection's worker thread running
+        with anyio.CancelScope(shield=True):
+            await repo.db.close()
+
+
+sessions: SessionStore = create_session_store(SESSION_STORE, str(DATABASE_PATH), SESSION_TTL, SESSION_MAX_SIZE)
+
+
 mcp = FastMCP(
     name="ChatGPT ToDo App",
-    instructions="Manage your tasks conversationally. You can add, list, complete, delete, and decompose tasks.",
+    instructions="Manage your tasks conversationally. You can add, list, complete, delete, and decompose tasks, and get progress statistics.",
     host=MCP_SERVER_HOST,
     port=MCP_SERVER_PORT,
     log_level=LOG_LEVEL,  # type: ignore[arg-type]
     lifespan=lifespan,
+    stateless_http=MCP_STATELESS_HTTP,
+    json_response=MCP_JSON_RESPONSE,
 )
 
 
@@ -62,98 +204,460 @@ def _get_repo(ctx: Context[Any, Any, Any]) -> TaskRepository:
     return repo
 
 
-@mcp.tool()
+# Headers that identify a session: the transport's own, or one a client of a
+# stateless deployment sends to keep its metadata and rate limit across calls
+_SESSION_HEADERS = ("mcp-session-id", "x-session-id")
+
+
+def _session_key(ctx: Context[Any, Any, Any]) -> str | None:
+    """Key a call to its session, for rate limiting and session metadata.
+
+    Uses the session header, so the key is the same in every process. A call
+    without one has no session to key: a stateless request whose client
+    sent no X-Session-Id, or a stdio call, whose process serves one client.
+    """
+    headers = getattr(ctx.request_context.request, "headers", None)
+    if isinstance(headers, Mapping):
+        for name in _SESSION_HEADERS:
+            session_id = headers.get(name)
+            if session_id:
+                return str(session_id)
+    return None
+
+
+# Output modes of the sessions this process has seen, read from the store
+# once per session and kept in least recently used order
+_session_modes: OrderedDict[str, str | None] = OrderedDict()
+_MAX_KNOWN_SESSIONS = 10_000
+
+
+def _client_timeout(ctx: Context[Any, Any, Any]) -> float | None:
+    """Return the deadline a client sent as ``_meta.timeout`` seconds, if any.
+
+    It can only shorten the tool's configured deadline. Client cancellation
+    needs no plumbing: FastMCP cancels the request task, which interrupts
+    any statement the call is running.
+    """
+    timeout = getattr(ctx.request_context.meta, "timeout", None)
+    if isinstance(timeout, (int, float)) and not isinstance(timeout, bool) and timeout > 0:
+        return float(timeout)
+    return None
+
+
+def _header_output_mode(ctx: Context[Any, Any, Any]) -> str | None:
+    headers = getattr(ctx.request_context.request, "headers", None)
+    if isinstance(headers, Mapping):
+        return headers.get("x-output-mode") or None
+    return None
+
+
+async def _output_mode(
+    ctx: Context[Any, Any, Any], output_mode: str | None, session_id: str | None
+) -> str | None:
+    """Return the call's output mode, else its session's.
+
+    A session picks its mode with the X-Output-Mode header. A valid one is
+    kept in the session store, by a background job off the call's path, so
+    the session's later calls use it without the header, in any process.
+    The store is read once per session per process, so a session that
+    changes its mode keeps sending the header. Neither means the
+    OUTPUT_MODE default.
+    """
+    if output_mode:
+        return output_mode
+    requested = _header_output_mode(ctx)
+    if session_id is None:
+        return requested
+    if session_id in _session_modes:
+        _session_modes.move_to_end(session_id)
+        stored = _session_modes[session_id]
+    else:
+        data = await sessions.get(session_id)
+        stored = None if data is None else data.get("output_mode")
+    if requested in OUTPUT_MODES and requested != stored:
+        BACKGROUND_JOBS.spawn(sessions.put(session_id, {"output_mode": requested}))
+        stored = requested
+    _session_modes[session_id] = stored
+    if len(_session_modes) > _MAX_KNOWN_SESSIONS:
+        _session_modes.popitem(last=False)
+    return requested or stored
+
+
+async def _call_tool(
+    name: str, args: dict[str, Any], ctx: Context[Any, Any, Any], output_mode: str | None = None
+) -> str | CallToolResult:
+    """Run a tool call and shape its response for the MCP layer.
+
+    The JSON text is encoded exactly once. With structured output enabled the
+    response dict is also attached as structured content, so clients do not
+    have to parse the text back.
+
+    Tool signatures declare bare types, so FastMCP only checks JSON types.
+    The constraints are checked once, by the tool's input model, so a bad
+    argument gets the same VALIDATION_ERROR envelope as any other error.
+    """
+    session_id = _session_key(ctx)
+    mode = await _output_mode(ctx, output_mode, session_id)
+    with TRACER.span("mcp.request", tool=name, request_id=str(ctx.request_id)) as span:
+        result, text = await handle_tool_call_encoded(
+            name,
+            args,
+            _get_repo(ctx),
+            session_id=session_id,
+            timeout=_client_timeout(ctx),
+            output_mode=mode,
+        )
+        span.set("response_bytes", len(text))
+    if not MCP_STRUCTURED_OUTPUT:
+        return text
+    return CallToolResult(
+        content=[TextContent(type="text", text=text)],
+        structuredContent=result,
+    )
+
+
+@mcp.tool(structured_output=False)
 async def add_task(
     title: str,
     ctx: Context[Any, Any, Any],
     parent_id: int | None = None,
-) -> str:
+    output_mode: str | None = None,
+) -> str | CallToolResult:
     """Create a new task or subtask.
 
     Args:
         title: The task description (1-500 characters)
         parent_id: Optional parent task ID for creating subtasks
+        output_mode: 'json' for the data, 'html' for the UI card, or 'both' (default: the session's)
     """
-    logger.info("add_task called: title=%r, parent_id=%s", title, parent_id)
-    repo = _get_repo(ctx)
-    args: dict[str, Any] = {"title": title}
-    if parent_id is not None:
-        args["parent_id"] = parent_id
-    result = await handle_tool_call("add_task", args, repo)
-    return json.dumps(result, default=str)
+    return await _call_tool("add_task", {"title": title, "parent_id": parent_id}, ctx, output_mode)
 
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 async def list_tasks(
     ctx: Context[Any, Any, Any],
     filter: str = "all",
     parent_id: int | None = None,
-) -> str:
+    tree: bool = False,
+    max_depth: int | None = None,
+    fields: list[str] | None = None,
+    order_by: str = "created_at",
+    limit: int | None = None,
+    cursor: str | None = None,
+    output_mode: str | None = None,
+) -> str | CallToolResult:
     """Retrieve tasks with optional filtering.
 
     Args:
         filter: Filter tasks by completion status ('all', 'complete', or 'incomplete')
         parent_id: Filter to subtasks of a specific parent
+        tree: Return tasks nested under their parents instead of a flat list
+        max_depth: Deepest subtask level to include in tree mode (0 = top level only)
+        fields: Task fields to return ('id', 'title', 'completed', 'created_at', 'parent_id')
+        order_by: Sort key ('created_at', 'id' or 'title'), optionally followed by 'asc' or 'desc'
+        limit: Maximum number of tasks to return (1-1000)
+        cursor: Continuation cursor from a summarized response, to fetch the next page
+        output_mode: 'json' for the data, 'html' for the UI card, or 'both' (default: the session's)
     """
-    logger.info("list_tasks called: filter=%r, parent_id=%s", filter, parent_id)
-    repo = _get_repo(ctx)
-    args: dict[str, Any] = {"filter": filter}
-    if parent_id is not None:
-        args["parent_id"] = parent_id
-    result = await handle_tool_call("list_tasks", args, repo)
-    return json.dumps(result, default=str)
+    return await _call_tool(
+        "list_tasks",
+        {
+            "filter": filter,
+            "parent_id": parent_id,
+            "tree": tree,
+            "max_depth": max_depth,
+            "fields": fields,
+            "order_by": order_by,
+            "limit": limit,
+            "cursor": cursor,
+        },
+        ctx,
+        output_mode,
+    )
 
 
-@mcp.tool()
-async def complete_task(task_id: int, ctx: Context[Any, Any, Any]) -> str:
+@mcp.tool(structured_output=False)
+async def task_stats(
+    ctx: Context[Any, Any, Any],
+    top_parents: int = 5,
+    days: int = 14,
+    output_mode: str | None = None,
+) -> str | CallToolResult:
+    """Summarize progress: totals, completion ratios of the largest parent tasks, and daily activity.
+
+    Args:
+        top_parents: Number of parent tasks to report completion for (0-50)
+        days: Number of recent days in the activity histogram (1-366)
+        output_mode: 'json' for the data, 'html' for the UI card, or 'both' (default: the session's)
+    """
+    return await _call_tool("task_stats", {"top_parents": top_parents, "days": days}, ctx, output_mode)
+
+
+@mcp.tool(structured_output=False)
+async def complete_task(
+    task_id: int, ctx: Context[Any, Any, Any], output_mode: str | None = None
+) -> str | CallToolResult:
     """Mark a task as completed.
 
     Args:
         task_id: The ID of the task to complete
+        output_mode: 'json' for the data, 'html' for the UI card, or 'both' (default: the session's)
     """
-    logger.info("complete_task called: task_id=%s", task_id)
-    repo = _get_repo(ctx)
-    result = await handle_tool_call("complete_task", {"task_id": task_id}, repo)
-    return json.dumps(result, default=str)
+    return await _call_tool("complete_task", {"task_id": task_id}, ctx, output_mode)
 
 
-@mcp.tool()
-async def delete_task(task_id: int, ctx: Context[Any, Any, Any]) -> str:
+@mcp.tool(structured_output=False)
+async def delete_task(
+    task_id: int, ctx: Context[Any, Any, Any], output_mode: str | None = None
+) -> str | CallToolResult:
     """Remove a task and its subtasks.
 
     Args:
         task_id: The ID of the task to delete
+        output_mode: 'json' for the data, 'html' for the UI card, or 'both' (default: the session's)
     """
-    logger.info("delete_task called: task_id=%s", task_id)
-    repo = _get_repo(ctx)
-    result = await handle_tool_call("delete_task", {"task_id": task_id}, repo)
-    return json.dumps(result, default=str)
+    return await _call_tool("delete_task", {"task_id": task_id}, ctx, output_mode)
 
 
-@mcp.tool()
+@mcp.tool(structured_output=False)
 async def decompose_task(
     task_id: int,
     subtask_titles: list[str],
     ctx: Context[Any, Any, Any],
-) -> str:
+    output_mode: str | None = None,
+) -> str | CallToolResult:
     """Break down a complex task into subtasks. ChatGPT generates the subtask titles.
 
     Args:
         task_id: The ID of the task to decompose
         subtask_titles: Titles for the subtasks to create (1-10 items)
+        output_mode: 'json' for the data, 'html' for the UI card, or 'both' (default: the session's)
     """
-    logger.info("decompose_task called: task_id=%s, subtasks=%d", task_id, len(subtask_titles))
-    repo = _get_repo(ctx)
-    result = await handle_tool_call(
+    return await _call_tool(
         "decompose_task",
         {"task_id": task_id, "subtask_titles": subtask_titles},
-        repo,
+        ctx,
+        output_mode,
     )
-    return json.dumps(result, default=str)
+
+
+# Resource functions look the context up rather than declaring a Context
+# parameter: FastMCP validates template arguments with pydantic, which
+# rebuilds a parametrized Context without its request
+@mcp.resource("task://{task_id}", name="task", mime_type="application/json")
+async def task_resource(task_id: int) -> str:
+    """One task, by ID."""
+    task = await _get_repo(mcp.get_context()).get_by_id(task_id)
+    if task is None:
+        raise ResourceError(f"Task with ID {task_id} does not exist")
+    return json.dumps(task)
+
+
+async def task_list_resource(filter: str = "all") -> str:
+    """Tasks as list_tasks returns them, filtered by completion ('all', 'complete' or 'incomplete')."""
+    ctx = mcp.get_context()
+    result, text = await handle_tool_call_encoded(
+        "list_tasks", {"filter": filter}, _get_repo(ctx), session_id=_session_key(ctx), output_mode="json"
+    )
+    if "error" in result:
+        raise ResourceError(result["error"]["message"])
+    return text
+
+
+@mcp.resource(STYLESHEET_URI, name="stylesheet", mime_type="text/css")
+def stylesheet_resource() -> str:
+    """The inline cards' stylesheet. Its URI changes whenever its content does."""
+    return STYLESHEET
+
+
+# FastMCP has no public hooks for query-string templates or subscriptions,
+# so both are registered on its resource manager and low-level server
+_list_template = TaskListTemplate.from_function(
+    task_list_resource, uri_template=LIST_TEMPLATE, name="task_list", mime_type="application/json"
+)
+mcp._resource_manager._templates[_list_template.uri_template] = _list_template
+_lowlevel = mcp._mcp_server
+
+
+def _notifier(session: ServerSession) -> Deliver:
+    async def deliver(uri: str) -> None:
+        await session.send_resource_updated(AnyUrl(uri))
+
+    return deliver
+
+
+def _subscription_topic(uri: AnyUrl) -> str:
+    if MCP_STATELESS_HTTP:
+        raise McpError(
+            ErrorData(code=INVALID_REQUEST, message="Subscriptions need stateful HTTP sessions")
+        )
+    try:
+        return resource_topic(str(uri))
+    except ValueError as e:
+        raise McpError(ErrorData(code=INVALID_PARAMS, message=str(e))) from None
+
+
+SubscriptionHandler = Callable[[AnyUrl], Awaitable[None]]
+
+# The low-level server's subscription decorators are unannotated
+_on_subscribe: Callable[[SubscriptionHandler], SubscriptionHandler] = (
+    _lowlevel.subscribe_resource()  # type: ignore[no-untyped-call]
+)
+_on_unsubscribe: Callable[[SubscriptionHandler], SubscriptionHandler] = (
+    _lowlevel.unsubscribe_resource()  # type: ignore[no-untyped-call]
+)
+
+
+@_on_subscribe
+async def subscribe_resource(uri: AnyUrl) -> None:
+    """Notify this session with notifications/resources/updated when ``uri`` changes.
+
+    Subscriptions are keyed by the session's repository, which the stateful
+    lifespan opens for the session and removes them with when it ends.
+    """
+    topic = _subscription_topic(uri)
+    context = _lowlevel.request_context
+    _changes.subscribe(context.lifespan_context, topic, _notifier(context.session), uri=str(uri))
+
+
+@_on_unsubscribe
+async def unsubscribe_resource(uri: AnyUrl) -> None:
+    _changes.unsubscribe(_lowlevel.request_context.lifespan_context, _subscription_topic(uri))
+
+
+_get_capabilities = _lowlevel.get_capabilities
+
+
+def _capabilities(*args: Any, **kwargs: Any) -> ServerCapabilities:
+    # The low-level server always reports resources.subscribe as false
+    capabilities = _get_capabilities(*args, **kwargs)
+    if capabilities.resources is not None and not MCP_STATELESS_HTTP:
+        capabilities.resources.subscribe = True
+    return capabilities
+
+
+_lowlevel.get_capabilities = _capabilities  # type: ignore[method-assign]
+
+
+Endpoint = Callable[[Request], Awaitable[Response]]
+
+
+def _get_route(path: str) -> Callable[[Endpoint], Endpoint]:
+    """Register a GET endpoint on the HTTP app; FastMCP's decorator is untyped."""
+    route: Callable[[Endpoint], Endpoint] = mcp.custom_route(path, methods=["GET"])
+    return route
 
 
 # ASGI app for `uvicorn src.server:app`
+@_get_route("/metrics")
+async def metrics(request: Request) -> Response:
+    """Serve every metric in the Prometheus text format."""
+    return Response(render_prometheus(), media_type=CONTENT_TYPE)
+
+
+@_get_route("/debug/traces")
+async def debug_traces(request: Request) -> Response:
+    """Return recently finished spans, newest first.
+
+    Query parameters: ``trace_id`` to select one trace, ``limit`` (default
+    100). Only available when spans are kept in memory.
+    """
+    exporter = TRACER.exporter
+    if not isinstance(exporter, RingBufferExporter):
+        return JSONResponse({"error": "Traces are exported to a file"}, status_code=404)
+    try:
+        limit = int(request.query_params.get("limit", "100"))
+    except ValueError:
+        return JSONResponse({"error": "limit must be an integer"}, status_code=400)
+    spans = exporter.query(request.query_params.get("trace_id"), limit)
+    return JSONResponse({"sample_rate": TRACER.sample_rate, "spans": spans})
+
+
+@_get_route("/healthz")
+async def healthz(request: Request) -> Response:
+    """Liveness: the process is up and serving HTTP."""
+    return JSONResponse({"status": "ok"})
+
+
+@_get_route("/readyz")
+async def readyz(request: Request) -> Response:
+    """Readiness: 200 once warmup has finished, 503 until then or if it failed."""
+    return JSONResponse(READINESS.report(), status_code=200 if READINESS.ready else 503)
+
+
+# Starlette lifespans yield either nothing or a state mapping for requests
+AppLifespan = Callable[[Starlette], AbstractAsyncContextManager[Any]]
+
+
+def _with_process_lifecycle(app_lifespan: AppLifespan) -> AppLifespan:
+    """Extend the HTTP app's lifespan with process-wide startup and shutdown.
+
+    Warmup runs as a background task. On shutdown the process drains while
+    the session manager is still running, so in-flight calls can finish;
+    then resource subscriptions are dropped, the WAL is checkpointed and the
+    database and session store close.
+    """
+
+    @asynccontextmanager
+    async def process_lifespan(app: Starlette) -> AsyncIterator[Mapping[str, Any] | None]:
+        report: dict[str, Any] = {}
+        try:
+            async with app_lifespan(app) as state:
+                warmup = _start_warmup()
+                try:
+                    yield state
+                finally:
+                    if warmup is not None:
+                        warmup.cancel()
+                        with suppress(asyncio.CancelledError):
+                            await warmup
+                    report = await drain(ADMISSION, DRAIN_TIMEOUT, state=READINESS)
+        finally:
+            await _changes.close()
+            report["wal_checkpoint"] = await _close_database()
+            await sessions.close()
+            dropped = any(report.get(key) for key in ("calls_abandoned", "jobs_dropped", "hooks_failed"))
+            logger.log(logging.WARNING if dropped else logging.INFO, "Drain finished", extra=report)
+
+    return process_lifespan
+
+
+def _start_warmup() -> asyncio.Task[None] | None:
+    if not WARMUP_ENABLED:
+        READINESS.ready = True
+        return None
+    Path(DATABASE_PATH).parent.mkdir(parents=True, exist_ok=True)
+    # In stateless mode requests share one repository, so warm that one
+    serving = _shared_repository if MCP_STATELESS_HTTP else None
+    return asyncio.create_task(
+        run_warmup(str(DATABASE_PATH), WARMUP_TOUCH_INDEXES, state=READINESS, serving=serving)
+    )
+
+
 app = mcp.streamable_http_app()
+app.router.lifespan_context = _with_process_lifecycle(app.router.lifespan_context)
+app.add_middleware(
+    CompressionMiddleware, encodings=COMPRESSION_ENCODINGS, minimum_size=COMPRESSION_MIN_SIZE
+)
+
+
+def run() -> None:
+    """Serve the app with uvicorn in this process on the configured host and port."""
+    import uvicorn
+
+    from src.launcher import resolve_http, resolve_loop
+
+    config = uvicorn.Config(
+        app,
+        host=MCP_SERVER_HOST,
+        port=MCP_SERVER_PORT,
+        loop=resolve_loop(SERVER_LOOP),
+        http=resolve_http(SERVER_HTTP),
+        log_level=LOG_LEVEL.lower(),
+        timeout_graceful_shutdown=int(DRAIN_TIMEOUT),
+    )
+    DrainingServer(config, ADMISSION, DRAIN_PRE_STOP_DELAY).run()
+
 
 if __name__ == "__main__":
-    asyncio.run(mcp.run_streamable_http_async())
+    run()
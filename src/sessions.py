@@ -0,0 +1,155 @@
+"""Session metadata that outlives a single process.
+
+The MCP transport keeps protocol state per session in memory; in stateless
+HTTP mode there is none, and any request may reach any process. What the app
+itself remembers about a session (per-session preferences such as its output
+mode) lives in a SessionStore instead, so it survives restarts and is shared
+by every process behind a load balancer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any, Protocol
+
+import aiosqlite
+
+SessionData = dict[str, Any]
+
+
+class SessionStore(Protocol):
+    """Key-value store of session metadata with a time-to-live."""
+
+    async def get(self, session_id: str) -> SessionData | None: ...
+
+    async def put(self, session_id: str, data: SessionData) -> None: ...
+
+    async def delete(self, session_id: str) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class InMemorySessionStore:
+    """Per-process store; sessions are lost on restart and not shared.
+
+    Holds at most ``max_size`` sessions. Every put moves its session to the
+    end, so with one TTL the sessions are in expiry order: expired ones, and
+    the least recently written past the bound, are dropped from the front.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 100_000) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._sessions: dict[str, tuple[float, SessionData]] = {}
+
+    async def get(self, session_id: str) -> SessionData | None:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at <= time.time():
+            del self._sessions[session_id]
+            return None
+        return data
+
+    async def put(self, session_id: str, data: SessionData) -> None:
+        now = time.time()
+        self._sessions.pop(session_id, None)
+        self._sessions[session_id] = (now + self.ttl, data)
+        self._sweep(now)
+
+    def _sweep(self, now: float) -> None:
+        excess = len(self._sessions) - self.max_size
+        dropped: list[str] = []
+        for session_id, (expires_at, _) in self._sessions.items():
+            if expires_at > now and len(dropped) >= excess:
+                break
+            dropped.append(session_id)
+        for session_id in dropped:
+            del self._sessions[session_id]
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+    async def close(self) -> None:
+        self._sessions.clear()
+
+
+_SESSIONS_DDL = """\
+CREATE TABLE IF NOT EXISTS mcp_sessions (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_mcp_sessions_expires_at ON mcp_sessions(expires_at);
+"""
+
+
+class SqliteSessionStore:
+    """Store backed by a table in an SQLite file, shared by local processes.
+
+    Stands in for a networked store such as Redis; every process pointing at
+    the same file sees the same sessions. The connection opens on first use.
+    """
+
+    def __init__(self, db_path: str, ttl: float) -> None:
+        self.db_path = db_path
+        self.ttl = ttl
+        self._db: aiosqlite.Connection | None = None
+        self._lock = asyncio.Lock()
+
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._db is None:
+            async with self._lock:
+                if self._db is None:
+                    db = await aiosqlite.connect(self.db_path)
+                    await db.execute("PRAGMA journal_mode=WAL")
+                    await db.executescript(_SESSIONS_DDL)
+                    # Expired sessions are dropped here rather than on every read
+                    await db.execute("DELETE FROM mcp_sessions WHERE expires_at <= ?", (time.time(),))
+                    await db.commit()
+                    self._db = db
+        return self._db
+
+    async def get(self, session_id: str) -> SessionData | None:
+        db = await self._connection()
+        cursor = await db.execute(
+            "SELECT data FROM mcp_sessions WHERE id = ? AND expires_at > ?",
+            (session_id, time.time()),
+        )
+        row = await cursor.fetchone()
+        return None if row is None else json.loads(row[0])
+
+    async def put(self, session_id: str, data: SessionData) -> None:
+        db = await self._connection()
+        await db.execute(
+            "INSERT INTO mcp_sessions (id, data, expires_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at",
+            (session_id, json.dumps(data), time.time() + self.ttl),
+        )
+        await db.commit()
+
+    async def delete(self, session_id: str) -> None:
+        db = await self._connection()
+        await db.execute("DELETE FROM mcp_sessions WHERE id = ?", (session_id,))
+        await db.commit()
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+def create_session_store(kind: str, db_path: str, ttl: float, max_size: int = 100_000) -> SessionStore:
+    """Build the store named by SESSION_STORE: ``memory`` or ``sqlite``.
+
+    ``max_size`` bounds the in-memory store; the SQLite one is bounded by
+    its TTL, swept whenever a process opens it.
+    """
+    if kind == "memory":
+        return InMemorySessionStore(ttl, max_size)
+    if kind == "sqlite":
+        return SqliteSessionStore(db_path, ttl)
+    raise ValueError(f"Unknown session store: {kind!r}")
@@ -0,0 +1,120 @@
+"""Cold-start profiling for ``python -m src --profile-startup``.
+
+Reports where the time to a first successful ``tools/call`` goes: an import
+breakdown taken from ``python -X importtime`` in a fresh interpreter, and the
+phases of starting the server in this process (importing ``src.server``,
+opening an MCP session, which runs the lifespan and the initialize handshake,
+and the call itself).
+"""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import time
+from typing import Any
+
+_IMPORTTIME_PREFIX = "import time:"
+
+
+def _package(module: str) -> str:
+    """Group our own modules by subpackage and everything else by distribution."""
+    parts = module.split(".")
+    return ".".join(parts[:2]) if parts[0] == "src" else parts[0]
+
+
+def parse_importtime(output: str, top: int = 15) -> dict[str, Any]:
+    """Summarize ``-X importtime`` output by package, using self times so they add up."""
+    by_package: dict[str, float] = {}
+    modules: list[tuple[float, str]] = []
+    for line in output.splitlines():
+        if not line.startswith(_IMPORTTIME_PREFIX):
+            continue
+        self_us, _, name = line[len(_IMPORTTIME_PREFIX):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        self_ms = int(self_us) / 1e3
+        module = name.strip()
+        by_package[_package(module)] = by_package.get(_package(module), 0.0) + self_ms
+        modules.append((self_ms, module))
+    modules.sort(reverse=True)
+    return {
+        "total_ms": round(sum(by_package.values()), 1),
+        "by_package": {
+            name: round(ms, 1) for name, ms in sorted(by_package.items(), key=lambda item: -item[1])
+        },
+        "slowest_modules": {module: round(ms, 1) for ms, module in modules[:top]},
+    }
+
+
+def import_breakdown(module: str = "src.server") -> dict[str, Any]:
+    """Import ``module`` in a fresh interpreter and break down where the time went."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+async def time_to_first_call(start: float) -> dict[str, float]:
+    """Start the server in-process and time each phase up to a first tool call.
+
+    ``start`` is the ``perf_counter`` reading taken when the process began.
+    """
+    phases: dict[str, float] = {}
+
+    def mark(name: str, since: float) -> float:
+        now = time.perf_counter()
+        phases[name] = round((now - since) * 1e3, 1)
+        return now
+
+    t = time.perf_counter()
+    from mcp.shared.memory import create_connected_server_and_client_session
+    from mcp.types import TextContent
+
+    from src.server import mcp
+
+    t = mark("import_ms", t)
+    async with create_connected_server_and_client_session(mcp) as client:
+        t = mark("session_ms", t)
+        result = await client.call_tool("list_tasks", {"limit": 1})
+        t = mark("first_call_ms", t)
+    content = result.content[0] if result.content else None
+    text = content.text if isinstance(content, TextContent) else ""
+    if result.isError or "error" in json.loads(text or "{}"):
+        raise RuntimeError(f"First tool call failed: {text}")
+    phases["total_ms"] = round((t - start) * 1e3, 1)
+    return phases
+
+
+def profile_startup(start: float, as_json: bool = False) -> dict[str, Any]:
+    """Print, and return, the import breakdown and time to first call."""
+    import asyncio
+
+    # Time the first call before spawning the importtime interpreter, which
+    # would otherwise count towards it
+    phases = asyncio.run(time_to_first_call(start))
+    report = {"imports": import_breakdown(), "time_to_first_call": phases}
+    if as_json:
+        print(json.dumps(report, indent=2))
+        return report
+
+    imports = report["imports"]
+    print(f"Import breakdown of src.server, fresh interpreter: {imports['total_ms']:.1f} ms")
+    other = 0.0
+    for name, ms in imports["by_package"].items():
+        if ms >= 5 or name.startswith("src"):
+            print(f"  {name:<40}{ms:>9.1f} ms")
+        else:
+            other += ms
+    print(f"  {'(other)':<40}{other:>9.1f} ms")
+    print("Slowest modules (self time):")
+    for name, ms in imports["slowest_modules"].items():
+        print(f"  {name:<40}{ms:>9.1f} ms")
+    print(f"Time to first tools/call: {phases['total_ms']:.1f} ms")
+    for name in ("import_ms", "session_ms", "first_call_ms"):
+        print(f"  {name.removesuffix('_ms'):<40}{phases[name]:>9.1f} ms")
+    return report
@@ -0,0 +1,184 @@
+"""Admission control for tool calls.
+
+Each session draws from its own token bucket, so one runaway client cannot
+monopolize the server, and every admitted call then takes one of a fixed
+number of in-flight slots. Calls that find all slots busy wait in a bounded
+FIFO queue; calls over their session rate, or arriving at a full queue, or
+waiting past the queue timeout are rejected immediately with a retry hint.
+Once closed for shutdown, no further calls are admitted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Hashable
+
+from src.config import (
+    ADMISSION_MAX_IN_FLIGHT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_SESSION_BURST,
+    ADMISSION_SESSION_RATE,
+)
+from src.observability.metrics import REGISTRY
+
+# Idle buckets are pruned once this many sessions are tracked
+_MAX_TRACKED_SESSIONS = 10_000
+
+# Retry hint for calls refused during shutdown; another process can take them
+_SHUTDOWN_RETRY_AFTER = 1.0
+
+
+class AdmissionRejected(Exception):
+    """Raised when a call is refused; the caller may retry after ``retry_after`` seconds."""
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"Call rejected: {reason}")
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``rate`` tokens per second."""
+
+    __slots__ = ("burst", "rate", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now: float) -> bool:
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Per-session rate limiting in front of a bounded in-flight pool."""
+
+    def __init__(
+        self,
+        session_rate: float = ADMISSION_SESSION_RATE,
+        session_burst: float = ADMISSION_SESSION_BURST,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+    ) -> None:
+        self.session_rate = session_rate
+        self.session_burst = session_burst
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.closed = False
+        self._buckets: dict[Hashable, TokenBucket] = {}
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._idle: asyncio.Event | None = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _check_rate(self, session: Hashable | None) -> None:
+        if self.session_rate <= 0 or session is None:
+            return
+        now = time.monotonic()
+        bucket = self._buckets.get(session)
+        if bucket is None:
+            if len(self._buckets) >= _MAX_TRACKED_SESSIONS:
+                self._prune(now)
+            bucket = self._buckets[session] = TokenBucket(self.session_rate, self.session_burst, now)
+        if not bucket.try_take(now):
+            raise AdmissionRejected("session_rate", bucket.retry_after())
+
+    def _prune(self, now: float) -> None:
+        for session, bucket in list(self._buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.burst:
+                del self._buckets[session]
+
+    async def acquire(self, session: Hashable | None = None) -> float:
+        """Admit a call, waiting for a slot if needed; returns the seconds spent queued."""
+        if self.closed:
+            raise AdmissionRejected("shutting_down", _SHUTDOWN_RETRY_AFTER)
+        self._check_rate(session)
+        if self.in_flight < self.max_in_flight and not self.queued:
+            self.in_flight += 1
+            return 0.0
+        if self.queued >= self.max_queue:
+            raise AdmissionRejected("queue_full", self.queue_timeout)
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except BaseException as e:
+            if not waiter.done() or waiter.cancelled():
+                # release() or close() may already have discarded it
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            elif waiter.exception() is None:
+                # A slot was handed over just as we gave up; pass it on
+                self.release()
+            if isinstance(e, asyncio.TimeoutError):
+                raise AdmissionRejected("queue_timeout", self.queue_timeout) from None
+            raise
+        return time.perf_counter() - start
+
+    def release(self) -> None:
+        """Free a slot, handing it directly to the oldest live waiter if any.
+
+        A waiter cancelled by its deadline or its client stays queued until
+        its task next runs; such waiters are skipped and discarded.
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+        if not self.in_flight and self._idle is not None:
+            self._idle.set()
+
+    def close(self) -> None:
+        """Stop admitting calls and reject the queued ones; running calls go on."""
+        self.closed = True
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(AdmissionRejected("shutting_down", _SHUTDOWN_RETRY_AFTER))
+
+    async def wait_idle(self, timeout: float) -> int:
+        """Wait up to ``timeout`` seconds for running calls to finish.
+
+        Returns how many are still running.
+        """
+        if self.in_flight:
+            self._idle = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._idle = None
+        return self.in_flight
+
+
+ADMISSION = AdmissionController()
+
+REGISTRY.gauge("tool_calls_in_flight", lambda: ADMISSION.in_flight, "Tool calls holding a slot")
+REGISTRY.gauge("tool_calls_queued", lambda: ADMISSION.queued, "Tool calls waiting for a slot")
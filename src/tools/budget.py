@@ -0,0 +1,96 @@
+"""Response size budget for list-shaped tool results.
+
+When a result carries more items or encodes to more bytes than the budget
+allows, it is replaced by a compact summary: the counts, the first few items
+and a cursor the client can pass back to fetch the next page.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+from collections import deque
+from collections.abc import Mapping
+from typing import Any
+
+_CURSOR_PREFIX = "offset:"
+
+
+def encode_cursor(offset: int) -> str:
+    """Return an opaque continuation cursor for the given row offset."""
+    return base64.urlsafe_b64encode(f"{_CURSOR_PREFIX}{offset}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """Return the row offset in a cursor, raising ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError("cursor is not valid") from e
+    if not raw.startswith(_CURSOR_PREFIX) or not raw[len(_CURSOR_PREFIX):].isdigit():
+        raise ValueError("cursor is not valid")
+    return int(raw[len(_CURSOR_PREFIX):])
+
+
+def truncate_tree(roots: list[dict[str, Any]], keep: int) -> list[dict[str, Any]]:
+    """Return the first ``keep`` nodes of a task forest, breadth first, re-nested.
+
+    Every kept node's ancestors are kept too, so the result is still a
+    forest; a kept node's children that were cut are added to its
+    ``hidden_subtasks``. The input nodes are not modified.
+    """
+    kept: list[dict[str, Any]] = []
+    queue: deque[tuple[dict[str, Any], dict[str, Any] | None]] = deque((root, None) for root in roots)
+    while queue and keep > 0:
+        node, parent = queue.popleft()
+        keep -= 1
+        copy = {**node, "subtasks": []}
+        hidden = node.get("hidden_subtasks", 0) + len(node["subtasks"])
+        if hidden:
+            copy["hidden_subtasks"] = hidden
+        if parent is None:
+            kept.append(copy)
+        else:
+            parent["subtasks"].append(copy)
+            parent["hidden_subtasks"] -= 1
+            if not parent["hidden_subtasks"]:
+                del parent["hidden_subtasks"]
+        queue.extend((child, copy) for child in node["subtasks"])
+    return kept
+
+
+def summarize(
+    result: Mapping[str, Any],
+    keep: int,
+    reason: str,
+    offset: int = 0,
+    tree: bool = False,
+) -> dict[str, Any]:
+    """Replace a result's task list with its first ``keep`` items and counts.
+
+    For flat listings ``offset`` is the position of the first item, and the
+    summary carries a cursor to the item after the last one kept, and
+    completion counts taken from the result when it has them, else counted
+    over ``tasks``. Tree results cannot be resumed; their first ``keep``
+    nodes are kept breadth first instead, with ``hidden_subtasks`` counting
+    the children left out.
+    """
+    tasks: list[dict[str, Any]] = result["tasks"]
+    kept = truncate_tree(tasks, keep) if tree else tasks[:keep]
+    summary = dict(result)
+    # A tree's total counts its nodes, and the first ``keep`` of them are kept
+    summary["returned"] = min(keep, result["total"]) if tree else len(kept)
+    summary["summarized"] = reason
+
+    summary["tasks"] = kept
+
+    if tree:
+        summary["next_cursor"] = None
+        return summary
+
+    if "completed" not in result and tasks and "completed" in tasks[0]:
+        completed = sum(1 for task in tasks if task["completed"])
+        summary["completed"] = completed
+        summary["incomplete"] = len(tasks) - completed
+    summary["next_cursor"] = encode_cursor(offset + len(kept)) if len(kept) < len(tasks) else None
+    return summary
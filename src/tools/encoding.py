@@ -0,0 +1,67 @@
+"""JSON encoding for tool responses.
+
+Uses orjson when it is installed. Otherwise falls back to the standard
+library encoder, with a precomputed serializer for the fixed task row shape
+so large task lists skip the generic per-key encoding work.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Mapping
+from json.encoder import encode_basestring_ascii
+from typing import Any
+
+from src.database.models import TASK_FIELDS
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore[assignment]
+
+
+def _encode_bool(value: bool | int) -> str:
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    return f"{value:d}"
+
+
+def _encode_task(task: Mapping[str, Any]) -> str:
+    task_id = task["id"]
+    title = encode_basestring_ascii(task["title"])
+    completed = _encode_bool(task["completed"])
+    created_at = encode_basestring_ascii(task["created_at"])
+    parent_id = task["parent_id"]
+    parent = "null" if parent_id is None else f"{parent_id:d}"
+    return (
+        f'{{"id": {task_id:d}, "title": {title}, "completed": {completed}, '
+        f'"created_at": {created_at}, "parent_id": {parent}}}'
+    )
+
+
+def _is_task(value: Any) -> bool:
+    return isinstance(value, dict) and tuple(value) == TASK_FIELDS
+
+
+def _encode_value(value: Any) -> str:
+    if isinstance(value, list) and value and all(_is_task(item) for item in value):
+        return "[" + ", ".join(map(_encode_task, value)) + "]"
+    if _is_task(value):
+        return _encode_task(value)
+    return json.dumps(value, default=str)
+
+
+def encode_stdlib(result: Mapping[str, Any]) -> str:
+    """Encode a tool response with the standard library encoder."""
+    return "{" + ", ".join(
+        f"{encode_basestring_ascii(key)}: {_encode_value(value)}" for key, value in result.items()
+    ) + "}"
+
+
+def encode_response(result: Mapping[str, Any]) -> str:
+    """Encode a tool response as JSON text using the fastest available encoder."""
+    if orjson is not None:
+        return orjson.dumps(result, default=str).decode()
+    return encode_stdlib(result)
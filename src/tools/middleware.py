@@ -0,0 +1,393 @@
+"""Middleware chain wrapped around every tool handler.
+
+Each middleware is an async callable ``(call, call_next) -> result`` that can
+observe or alter the call on its way in and the result on its way out. The
+chain is composed once at import time; per-call cost is one function call per
+layer plus whatever the layer itself records.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable, Hashable, Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from pydantic import BaseModel
+
+from src.config import (
+    LOG_SAMPLE_RATE,
+    LOG_SLOW_CALL_MS,
+    RESPONSE_MAX_BYTES,
+    RESPONSE_MAX_ITEMS,
+    RESPONSE_SUMMARY_ITEMS,
+    TOOL_TIMEOUT,
+)
+from src.database.models import measure_db_time
+from src.database.singleflight import freeze
+from src.observability.metrics import REGISTRY, SIZE_BUCKETS, Counter, MetricsRegistry
+from src.observability.tracing import TRACER
+
+from .admission import ADMISSION, AdmissionRejected
+from .budget import summarize
+from .encoding import encode_response
+from .schemas import ErrorCode, OutputMode, ToolError
+
+if TYPE_CHECKING:
+    from src.database.models import TaskRepository
+
+call_logger = logging.getLogger("src.tools.calls")
+
+Handler = Callable[[Any, "TaskRepository"], Awaitable[dict[str, Any]]]
+CallNext = Callable[["ToolCall"], Awaitable[dict[str, Any]]]
+Middleware = Callable[["ToolCall", CallNext], Awaitable[dict[str, Any]]]
+# Builds a tool's UI card from its result and validated input
+Renderer = Callable[[dict[str, Any], Any], str]
+
+
+class ToolMetrics:
+    """Metric handles for one tool, resolved once at registration."""
+
+    __slots__ = (
+        "_errors",
+        "_registry",
+        "_summarized",
+        "db_time",
+        "latency",
+        "render_time",
+        "response_bytes",
+        "tool",
+    )
+
+    def __init__(self, tool: str, registry: MetricsRegistry = REGISTRY) -> None:
+        self.tool = tool
+        self.latency = registry.histogram(
+            "tool_call_duration_seconds", "Tool call latency", tool=tool
+        )
+        self.db_time = registry.histogram(
+            "tool_db_duration_seconds", "Time a tool call spent in SQLite", tool=tool
+        )
+        self.render_time = registry.histogram(
+            "tool_render_duration_seconds", "Time a tool call spent rendering its UI card", tool=tool
+        )
+        self.response_bytes = registry.histogram(
+            "tool_response_bytes", "Encoded tool response size", buckets=SIZE_BUCKETS, tool=tool
+        )
+        self._registry = registry
+        self._errors: dict[str, Counter] = {}
+        self._summarized: dict[str, Counter] = {}
+
+    def error(self, code: str) -> Counter:
+        counter = self._errors.get(code)
+        if counter is None:
+            counter = self._errors[code] = self._registry.counter(
+                "tool_errors_total", "Tool calls that returned an error", tool=self.tool, code=code
+            )
+        return counter
+
+    def summarized(self, reason: str) -> Counter:
+        counter = self._summarized.get(reason)
+        if counter is None:
+            counter = self._summarized[reason] = self._registry.counter(
+                "tool_responses_summarized_total",
+                "Responses replaced by a summary for exceeding the budget",
+                tool=self.tool,
+                reason=reason,
+            )
+        return counter
+
+
+@dataclass(frozen=True)
+class RegisteredTool:
+    """A tool handler with its input schema and metric handles."""
+
+    name: str
+    handler: Handler
+    input_model: type[BaseModel]
+    metrics: ToolMetrics
+    read_only: bool = False
+    timeout: float = TOOL_TIMEOUT
+    log_sample_rate: float = LOG_SAMPLE_RATE
+    render: Renderer | None = None
+
+
+@dataclass
+class ToolCall:
+    """State for one tool invocation as it passes through the chain."""
+
+    tool: RegisteredTool
+    args: Mapping[str, Any] | BaseModel
+    repo: TaskRepository
+    encode: bool = False
+    session_id: Hashable | None = None
+    timeout: float | None = None
+    output_mode: OutputMode = "both"
+    validated: BaseModel | None = None
+    response: str | None = None
+    db_seconds: float = 0.0
+    render_seconds: float = 0.0
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+def _bind(layer: Middleware, call_next: CallNext) -> CallNext:
+    async def bound(call: ToolCall) -> dict[str, Any]:
+        return await layer(call, call_next)
+
+    return bound
+
+
+def build_chain(middleware: Sequence[Middleware], endpoint: CallNext) -> CallNext:
+    """Compose middleware around the endpoint; the first entry is outermost."""
+    chain = endpoint
+    for layer in reversed(middleware):
+        chain = _bind(layer, chain)
+    return chain
+
+
+async def tracing_middleware(call: ToolCall, call_next: CallNext) -> dict[str, Any]:
+    """Wrap the dispatch in a trace span, tagged with any error code."""
+    with TRACER.span("tool.dispatch", tool=call.tool.name) as span:
+        result = await call_next(call)
+        error = result.get("error")
+        if error is not None:
+            span.set("error_code", error["code"])
+        return result
+
+
+async def logging_middleware(call: ToolCall, call_next: CallNext) -> dict[str, Any]:
+    """Log a sample of calls, and every call slower than LOG_SLOW_CALL_MS.
+
+    Records carry the call's fields as ``extra`` so the JSON formatter
+    emits them as structured keys; formatting happens off the event loop.
+    """
+    start = time.perf_counter()
+    result = await call_next(call)
+    elapsed_ms = (time.perf_counter() - start) * 1e3
+    if elapsed_ms >= LOG_SLOW_CALL_MS:
+        level, message = logging.WARNING, "Slow tool call"
+    elif call.tool.log_sample_rate >= 1 or random.random() < call.tool.log_sample_rate:
+        level, message = logging.INFO, "Tool call"
+    else:
+        return result
+    if call_logger.isEnabledFor(level):
+        error = result.get("error")
+        call_logger.log(
+            level,
+            message,
+            extra={
+                "tool": call.tool.name,
+                "arguments": call.args if isinstance(call.args, Mapping) else call.args.model_dump(),
+                "duration_ms": round(elapsed_ms, 3),
+                "db_ms": round(call.db_seconds * 1e3, 3),
+                "render_ms": round(call.render_seconds * 1e3, 3),
+                "error_code": None if error is None else error["code"],
+                "sampled": level == logging.INFO,
+            },
+        )
+    return result
+
+
+async def timing_middleware(call: ToolCall, call_next: CallNext) -> dict[str, Any]:
+    """Record end-to-end latency, including encoding, and the time spent rendering."""
+    start = time.perf_counter()
+    try:
+        return await call_next(call)
+    finally:
+        call.tool.metrics.latency.observe(time.perf_counter() - start)
+        if call.render_seconds:
+            call.tool.metrics.render_time.observe(call.render_seconds)
+
+
+async def coalescing_middleware(call: ToolCall, call_next: CallNext) -> dict[str, Any]:
+    """Share one run and one encoded response among identical concurrent reads.
+
+    Only read-only tools are coalesced, through the repository's single-flight
+    group, so a committed write starts a fresh generation of calls. The layer
+    sits inside the deadline and admission layers, so every caller is held to
+    its own deadline and rate limit, and an error is never shared: a caller
+    that joined a run ending in one runs the call itself.
+    """
+    if not call.tool.read_only:
+        return await call_next(call)
+    try:
+        key = ("tool", call.tool.name, call.encode, call.output_mode, freeze(dict(call.args)))
+    except TypeError:
+        return await call_next(call)
+
+    ran = False
+
+    async def run() -> tuple[dict[str, Any], str | None]:
+        nonlocal ran
+        ran = True
+        result = await call_next(call)
+        if call.encode and call.response is None:
+            call.response = encode_response(result)
+        return result, call.response
+
+    result, response = await call.repo.flight.run(key, run)
+    if not ran and "error" in result:
+        return await call_next(call)
+    call.response = response
+    return result
+
+
+async def encoding_middleware(call: ToolCall, call_next: CallNext) -> dict[str, Any]:
+    """Encode the result once when the caller wants JSON, and account its size."""
+    result = await call_next(call)
+    if call.encode:
+        if call.response is None:
+            call.response = encode_response(result)
+        call.tool.metrics.response_bytes.observe(len(call.response))
+    return result
+
+
+async def budget_middleware(call: ToolCall, call_next: CallNext) -> dict[str, Any]:
+    """Summarize task lists that exceed the response item or byte budget.
+
+    The byte check encodes the result as it will be sent, UI card included;
+    when it fits, that encoding is kept so the encoding layer does not
+    repeat the work. A summarized result gets its card rendered again.
+    """
+    result = await call_next(call)
+    data = call.extra.get("data", result)
+    tasks = data.get("tasks")
+    if not isinstance(tasks, list):
+        return result
+
+    tree = getattr(call.validated, "tree", False)
+    # A tree's total counts every node returned, not just the roots
+    if (data["total"] if tree else len(tasks)) > RESPONSE_MAX_ITEMS:
+        reason = "items"
+    else:
+        text = encode_response(result)
+        if len(text) <= RESPONSE_MAX_BYTES:
+            call.response = text
+            return result
+        reason = "bytes"
+
+    call.tool.metrics.summarized(reason).inc()
+    summary = summarize(
+        data,
+        RESPONSE_SUMMARY_ITEMS,
+        reason,
+        offset=getattr(call.validated, "offset", 0),
+        tree=tree,
+    )
+    return _with_card(call, summary) if "data" in call.extra else summary
+
+
+async def error_metrics_middleware(call: ToolCall, call_next: CallNext) -> dict[str, Any]:
+    """Count error responses by error code."""
+    result = await call_next(call)
+    error = result.get("error")
+    if error is not None:
+        call.tool.metrics.error(ErrorCode(error["code"]).value).inc()
+    return result
+
+
+def _with_card(call: ToolCall, result: dict[str, Any]) -> dict[str, Any]:
+    """Return ``result`` with the tool's UI card, or the card alone in ``html`` mode.
+
+    The data the card was rendered from is kept in ``call.extra["data"]``.
+    """
+    render = call.tool.render
+    assert render is not None
+    start = time.perf_counter()
+    with TRACER.span("render"):
+        ui = render(result, call.validated)
+    call.render_seconds += time.perf_counter() - start
+    call.extra["data"] = result
+    if call.output_mode == "html":
+        return {"ui": ui}
+    return {**result, "ui": ui}
+
+
+async def rendering_middleware(call: ToolCall, call_next: CallNext) -> dict[str, Any]:
+    """Render the tool's UI card when the call's output mode asks for it.
+
+    Handlers return data only, so a ``json`` call never builds markup.
+    Rendering sits inside the budget layer, so the card counts against the
+    response byte budget.
+    """
+    result = await call_next(call)
+    if call.output_mode == "json" or call.tool.render is None or "error" in result:
+        return result
+    return _with_card(call, result)
+
+
+def _error(code: ErrorCode, message: str, details: dict[str, Any]) -> dict[str, Any]:
+    return {"error": ToolError(code=code, message=message, details=details).model_dump(mode="json")}
+
+
+async def deadline_middleware(call: ToolCall, call_next: CallNext) -> dict[str, Any]:
+    """Abort the call once its deadline passes and report a timeout.
+
+    The deadline is the tool's configured timeout, or the caller's if that
+    is shorter. On expiry the rest of the chain is cancelled, which releases
+    the admission slot and interrupts any SQLite read still running.
+    """
+    timeout = call.tool.timeout if call.timeout is None else min(call.timeout, call.tool.timeout)
+    try:
+        return await asyncio.wait_for(call_next(call), timeout)
+    except asyncio.TimeoutError:
+        return _error(
+            ErrorCode.TIMEOUT,
+            f"Tool call exceeded its {timeout:g}s deadline",
+            {"timeout": timeout, "retryable": call.tool.read_only},
+        )
+
+
+_queue_wait = REGISTRY.histogram(
+    "tool_queue_wait_seconds", "Time a tool call waited for an in-flight slot"
+)
+
+
+async def admission_middleware(call: ToolCall, call_next: CallNext) -> dict[str, Any]:
+    """Hold an in-flight slot for the call, or reject it as retryable.
+
+    Sits inside the error counter so rejections are counted per tool, and
+    outside the budget and handler so queued calls do no work.
+    """
+    try:
+        wait = await ADMISSION.acquire(call.session_id)
+    except AdmissionRejected as e:
+        REGISTRY.counter(
+            "tool_admission_rejected_total", "Tool calls refused by admission control", reason=e.reason
+        ).inc()
+        details = {"reason": e.reason, "retry_after": round(e.retry_after, 3), "retryable": True}
+        if e.reason == "shutting_down":
+            return _error(ErrorCode.UNAVAILABLE, "Server is shutting down, retry later", details)
+        return _error(ErrorCode.RATE_LIMITED, "Server is busy, retry later", details)
+    _queue_wait.observe(wait)
+    try:
+        return await call_next(call)
+    finally:
+        ADMISSION.release()
+
+
+async def db_time_middleware(call: ToolCall, call_next: CallNext) -> dict[str, Any]:
+    """Attribute time spent awaiting repository statements to the tool."""
+    with measure_db_time() as elapsed:
+        try:
+            return await call_next(call)
+        finally:
+            call.db_seconds = elapsed[0]
+            call.tool.metrics.db_time.observe(elapsed[0])
+
+
+DEFAULT_MIDDLEWARE: list[Middleware] = [
+    tracing_middleware,
+    logging_middleware,
+    timing_middleware,
+    encoding_middleware,
+    error_metrics_middleware,
+    deadline_middleware,
+    admission_middleware,
+    coalescing_middleware,
+    budget_middleware,
+    rendering_middleware,
+    db_time_middleware,
+]
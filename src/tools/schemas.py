@@ -2,11 +2,11 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
+from typing import Annotated, Any, Literal
 
-from typing import Any
-
-from pydantic import BaseModel, Field, field_validator
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, field_validator
 
+from .budget import decode_cursor
 
 # --- Error Handling ---
 
@@ -16,9 +16,19 @@ class ErrorCode(str, Enum):
     TASK_NOT_FOUND = "TASK_NOT_FOUND"
     DATABASE_ERROR = "DATABASE_ERROR"
     INTERNAL_ERROR = "INTERNAL_ERROR"
+    RATE_LIMITED = "RATE_LIMITED"
+    TIMEOUT = "TIMEOUT"
+    UNAVAILABLE = "UNAVAILABLE"
+
+
+# Validators are built on first use rather than at import, so a cold process
+# only pays for the models its first calls touch
+_DEFERRED = ConfigDict(defer_build=True)
 
 
 class ToolError(BaseModel):
+    model_config = _DEFERRED
+
     code: ErrorCode
     message: str
     details: dict[str, Any] | None = None
@@ -28,6 +38,8 @@ class ToolError(BaseModel):
 
 
 class TaskBase(BaseModel):
+    model_config = _DEFERRED
+
     title: str = Field(..., min_length=1, max_length=500)
 
 
@@ -55,50 +67,102 @@ class Task(TaskBase):
 
 # --- Tool Input Schemas ---
 
+TaskField = Literal["id", "title", "completed", "created_at", "parent_id"]
+
+# What a tool call returns: the data, its rendered UI card, or both
+OutputMode = Literal["json", "html", "both"]
+OUTPUT_MODES: tuple[OutputMode, ...] = ("json", "html", "both")
+
+
+def _sanitize_title(v: str) -> str:
+    stripped = v.strip()
+    if not stripped:
+        raise ValueError("title cannot be empty or whitespace only")
+    return stripped
+
+
+def _check_filter(v: str) -> str:
+    if v not in ("all", "complete", "incomplete"):
+        raise ValueError("filter must be 'all', 'complete', or 'incomplete'")
+    return v
+
+
+def _normalize_order_by(v: str) -> str:
+    column, _, direction = v.strip().lower().partition(" ")
+    direction = direction.strip() or "asc"
+    if column not in ("created_at", "id", "title") or direction not in ("asc", "desc"):
+        raise ValueError("order_by must be 'created_at', 'id' or 'title', optionally followed by 'asc' or 'desc'")
+    return f"{column} {direction}"
+
+
+def _check_cursor(v: str) -> str:
+    decode_cursor(v)
+    return v
+
+
+def _strip_titles(v: list[str]) -> list[str]:
+    return [title.strip() for title in v if title.strip()]
+
+
+# Constrained argument types shared by the tool input models below
+Title = Annotated[str, Field(min_length=1, max_length=500), AfterValidator(_sanitize_title)]
+TaskId = Annotated[int, Field(ge=1)]
+Filter = Annotated[str, AfterValidator(_check_filter)]
+Depth = Annotated[int, Field(ge=0)]
+FieldList = Annotated[list[TaskField], Field(min_length=1)]
+OrderBy = Annotated[str, AfterValidator(_normalize_order_by)]
+Limit = Annotated[int, Field(ge=1, le=1000)]
+Cursor = Annotated[str, AfterValidator(_check_cursor)]
+TopParents = Annotated[int, Field(ge=0, le=50)]
+Days = Annotated[int, Field(ge=1, le=366)]
+SubtaskTitles = Annotated[list[str], Field(min_length=1, max_length=10), AfterValidator(_strip_titles)]
+
 
 class AddTaskInput(BaseModel):
-    title: str = Field(..., min_length=1, max_length=500, description="The task description")
-    parent_id: int | None = Field(None, ge=1, description="Optional parent task ID for creating subtasks")
+    model_config = _DEFERRED
 
-    @field_validator("title")
-    @classmethod
-    def sanitize_title(cls, v: str) -> str:
-        stripped = v.strip()
-        if not stripped:
-            raise ValueError("title cannot be empty or whitespace only")
-        return stripped
+    title: Title = Field(..., description="The task description")
+    parent_id: TaskId | None = Field(None, description="Optional parent task ID for creating subtasks")
 
 
 class ListTasksInput(BaseModel):
-    filter: str = Field("all", description="Filter tasks by completion status")
-    parent_id: int | None = Field(None, ge=1, description="Filter to subtasks of a specific parent")
+    model_config = _DEFERRED
 
-    @field_validator("filter")
-    @classmethod
-    def validate_filter(cls, v: str) -> str:
-        if v not in ("all", "complete", "incomplete"):
-            raise ValueError("filter must be 'all', 'complete', or 'incomplete'")
-        return v
+    filter: Filter = Field("all", description="Filter tasks by completion status")
+    parent_id: TaskId | None = Field(None, description="Filter to subtasks of a specific parent")
+    tree: bool = Field(False, description="Return tasks nested under their parents")
+    max_depth: Depth | None = Field(None, description="Deepest subtask level to include in tree mode")
+    fields: FieldList | None = Field(None, description="Task fields to return")
+    order_by: OrderBy = Field("created_at asc", description="Sort key ('created_at', 'id' or 'title'), optionally followed by 'asc' or 'desc'")
+    limit: Limit | None = Field(None, description="Maximum number of tasks to return")
+    cursor: Cursor | None = Field(None, description="Continuation cursor from a summarized response")
+
+    @property
+    def offset(self) -> int:
+        return decode_cursor(self.cursor) if self.cursor else 0
+
+
+class TaskStatsInput(BaseModel):
+    model_config = _DEFERRED
+
+    top_parents: TopParents = Field(5, description="Number of parent tasks to report completion for")
+    days: Days = Field(14, description="Number of recent days in the activity histogram")
 
 
 class CompleteTaskInput(BaseModel):
-    task_id: int = Field(..., ge=1, description="The ID of the task to complete")
+    model_config = _DEFERRED
+
+    task_id: TaskId = Field(..., description="The ID of the task to complete")
 
 
 class DeleteTaskInput(BaseModel):
-    task_id: int = Field(..., ge=1, description="The ID of the task to delete")
+    model_config = _DEFERRED
+
+    task_id: TaskId = Field(..., description="The ID of the task to delete")
 
 
 class DecomposeTaskInput(BaseModel):
-    task_id: int = Field(..., ge=1, description="The ID of the task to decompose")
-    subtask_titles: list[str] = Field(
-        ...,
-        min_length=1,
-        max_length=10,
-        description="Titles for the subtasks to create",
-    )
-
-    @field_validator("subtask_titles")
-    @classmethod
-    def validate_subtask_titles(cls, v: list[str]) -> list[str]:
-        return [title.strip() for title in v if title.strip()]
+    model_config = _DEFERRED
+
+    task_id: TaskId = Field(..., description="The ID of the task to decompose")
+    subtask_titles: SubtaskTitles = Field(..., description="Titles for the subtasks to create")
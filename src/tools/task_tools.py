@@ -1,25 +1,63 @@
 from __future__ import annotations
 
+import json
 import logging
-from typing import TYPE_CHECKING, Any
-
-from pydantic import ValidationError
+from collections.abc import Hashable, Mapping
+from typing import TYPE_CHECKING, Any, NamedTuple, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from src.config import (
+    LOG_SAMPLE_RATE,
+    LOG_SAMPLE_RATES,
+    OUTPUT_MODE,
+    RESPONSE_MAX_ITEMS,
+    TOOL_TIMEOUT,
+    TOOL_TIMEOUTS,
+    TREE_MAX_DEPTH,
+    TREE_MAX_NODES,
+    UI_STYLES,
+)
+from src.observability.tracing import TRACER
+from src.ui import (
+    render_confirmation,
+    render_task_card,
+    render_task_hierarchy,
+    render_task_tree,
+    render_task_window,
+    style_mode,
+)
 
+from .encoding import encode_response
+from .middleware import (
+    DEFAULT_MIDDLEWARE,
+    Handler,
+    RegisteredTool,
+    Renderer,
+    ToolCall,
+    ToolMetrics,
+    build_chain,
+)
 from .schemas import (
+    OUTPUT_MODES,
     AddTaskInput,
     CompleteTaskInput,
     DecomposeTaskInput,
     DeleteTaskInput,
     ErrorCode,
     ListTasksInput,
+    TaskStatsInput,
     ToolError,
 )
+from .tree import build_tree
 
 if TYPE_CHECKING:
     from src.database.models import TaskRepository
 
 logger = logging.getLogger(__name__)
 
+_InputT = TypeVar("_InputT", bound=BaseModel)
+
 
 class TaskNotFoundError(Exception):
     """Raised when a task is not found."""
@@ -31,12 +69,21 @@ class TaskNotFoundError(Exception):
 
 def _error_response(code: ErrorCode, message: str, details: dict[str, Any] | None = None) -> dict[str, Any]:
     """Build a standardized error response."""
-    return {"error": ToolError(code=code, message=message, details=details).model_dump()}
+    return {"error": ToolError(code=code, message=message, details=details).model_dump(mode="json")}
 
 
-async def add_task_handler(args: dict[str, Any], repo: TaskRepository) -> dict[str, Any]:
+def _validate(model: type[_InputT], args: Mapping[str, Any] | _InputT) -> _InputT:
+    """Validate raw tool arguments, passing already-validated input through as-is."""
+    if isinstance(args, model):
+        return args
+    return model.model_validate(args)
+
+
+async def add_task_handler(
+    args: Mapping[str, Any] | AddTaskInput, repo: TaskRepository
+) -> dict[str, Any]:
     """Create a new task or subtask."""
-    validated = AddTaskInput(**args)
+    validated = _validate(AddTaskInput, args)
 
     if validated.parent_id is not None:
         parent = await repo.get_by_id(validated.parent_id)
@@ -46,26 +93,107 @@ async def add_task_handler(args: dict[str, Any], repo: TaskRepository) -> dict[s
     task = await repo.create(validated.title, parent_id=validated.parent_id)
     return {
         "task": task,
-        "ui": f"<inline-card>Task created: {task['title']}</inline-card>",
     }
 
 
-async def list_tasks_handler(args: dict[str, Any], repo: TaskRepository) -> dict[str, Any]:
+async def list_tasks_handler(
+    args: Mapping[str, Any] | ListTasksInput, repo: TaskRepository
+) -> dict[str, Any]:
     """Retrieve tasks with optional filtering."""
-    validated = ListTasksInput(**args)
-
-    tasks = await repo.get_all(filter=validated.filter, parent_id=validated.parent_id)
-    return {
+    validated = _validate(ListTasksInput, args)
+
+    if validated.tree:
+        return await _list_task_tree(validated, repo)
+
+    # Without a limit, one row past the item budget is enough to know the
+    # response will be summarized, so later pages never scan the whole tail
+    limit = RESPONSE_MAX_ITEMS + 1 if validated.limit is None else validated.limit
+    order_by, direction = validated.order_by.split()
+    tasks = await repo.get_all(
+        filter=validated.filter,
+        parent_id=validated.parent_id,
+        fields=validated.fields,
+        order_by=order_by,
+        descending=direction == "desc",
+        limit=limit,
+        offset=validated.offset,
+    )
+    result: dict[str, Any] = {
         "tasks": tasks,
         "total": len(tasks),
         "filter_applied": validated.filter,
-        "ui": f"<inline-card>Found {len(tasks)} task(s)</inline-card>",
+    }
+    if validated.offset or len(tasks) == limit:
+        # Only part of the listing was fetched; report counts for all of it
+        counts = await repo.count(filter=validated.filter, parent_id=validated.parent_id)
+        result["total"] = counts["total"]
+        result["completed"] = counts["completed"]
+        result["incomplete"] = counts["total"] - counts["completed"]
+    return result
+
+
+async def _list_task_tree(validated: ListTasksInput, repo: TaskRepository) -> dict[str, Any]:
+    """Fetch a task forest in one query and nest it by parent.
+
+    At most the response item budget of nodes is fetched, breadth first, so
+    a large forest comes back as its top levels rather than being summarized.
+    """
+    max_depth = TREE_MAX_DEPTH if validated.max_depth is None else min(validated.max_depth, TREE_MAX_DEPTH)
+    order_by, direction = validated.order_by.split()
+    rows, truncated = await repo.get_tree(
+        filter=validated.filter,
+        parent_id=validated.parent_id,
+        max_depth=max_depth,
+        max_nodes=min(validated.limit or RESPONSE_MAX_ITEMS, RESPONSE_MAX_ITEMS, TREE_MAX_NODES),
+        fields=validated.fields,
+        order_by=order_by,
+        descending=direction == "desc",
+    )
+    return {
+        "tasks": build_tree(rows),
+        "total": len(rows),
+        "filter_applied": validated.filter,
+        "max_depth": max_depth,
+        "truncated": truncated,
+    }
+
+
+def _ratio(completed: int, total: int) -> float:
+    return round(completed / total, 4) if total else 0.0
+
+
+async def task_stats_handler(
+    args: Mapping[str, Any] | TaskStatsInput, repo: TaskRepository
+) -> dict[str, Any]:
+    """Summarize progress from the aggregate tables."""
+    validated = _validate(TaskStatsInput, args)
+
+    stats = await repo.get_stats(top_parents=validated.top_parents, days=validated.days)
+    total, completed = stats["total"], stats["completed"]
+    return {
+        "total": total,
+        "completed": completed,
+        "incomplete": total - completed,
+        "completion_ratio": _ratio(completed, total),
+        "top_parents": [
+            {
+                "id": parent["id"],
+                "title": parent["title"],
+                "subtasks": parent["total"],
+                "completed": parent["completed"],
+                "completion_ratio": _ratio(parent["completed"], parent["total"]),
+            }
+            for parent in stats["parents"]
+        ],
+        "daily": stats["daily"],
     }
 
 
-async def complete_task_handler(args: dict[str, Any], repo: TaskRepository) -> dict[str, Any]:
+async def complete_task_handler(
+    args: Mapping[str, Any] | CompleteTaskInput, repo: TaskRepository
+) -> dict[str, Any]:
     """Mark a task as completed."""
-    validated = CompleteTaskInput(**args)
+    validated = _validate(CompleteTaskInput, args)
 
     task = await repo.get_by_id(validated.task_id)
     if task is None:
@@ -75,13 +203,14 @@ async def complete_task_handler(args: dict[str, Any], repo: TaskRepository) -> d
     assert updated is not None
     return {
         "task": updated,
-        "ui": f"<inline-card>Task completed: {updated['title']}</inline-card>",
     }
 
 
-async def delete_task_handler(args: dict[str, Any], repo: TaskRepository) -> dict[str, Any]:
+async def delete_task_handler(
+    args: Mapping[str, Any] | DeleteTaskInput, repo: TaskRepository
+) -> dict[str, Any]:
     """Delete a task and its subtasks."""
-    validated = DeleteTaskInput(**args)
+    validated = _validate(DeleteTaskInput, args)
 
     task = await repo.get_by_id(validated.task_id)
     if task is None:
@@ -95,13 +224,14 @@ async def delete_task_handler(args: dict[str, Any], repo: TaskRepository) -> dic
         "deleted": True,
         "task_id": validated.task_id,
         "subtasks_deleted": subtasks_count,
-        "ui": "<inline-card>Task deleted</inline-card>",
     }
 
 
-async def decompose_task_handler(args: dict[str, Any], repo: TaskRepository) -> dict[str, Any]:
+async def decompose_task_handler(
+    args: Mapping[str, Any] | DecomposeTaskInput, repo: TaskRepository
+) -> dict[str, Any]:
     """Break down a task into subtasks."""
-    validated = DecomposeTaskInput(**args)
+    validated = _validate(DecomposeTaskInput, args)
 
     parent = await repo.get_by_id(validated.task_id)
     if parent is None:
@@ -111,30 +241,81 @@ async def decompose_task_handler(args: dict[str, Any], repo: TaskRepository) ->
     return {
         "parent_task": parent,
         "subtasks": subtasks,
-        "ui": f"<inline-card>Created {len(subtasks)} subtask(s) for: {parent['title']}</inline-card>",
     }
 
 
-async def handle_tool_call(name: str, args: dict[str, Any], repo: TaskRepository) -> dict[str, Any]:
-    """Dispatch a tool call to the appropriate handler with error handling."""
-    handlers = {
-        "add_task": add_task_handler,
-        "list_tasks": list_tasks_handler,
-        "complete_task": complete_task_handler,
-        "delete_task": delete_task_handler,
-        "decompose_task": decompose_task_handler,
-    }
+# --- UI cards, rendered by the middleware only for calls that want them ---
+
+# Cards link to the stylesheet resource by default rather than embedding it,
+# so a card costs a few hundred bytes, not the stylesheet's two kilobytes
+_STYLES = style_mode(UI_STYLES)
+
+
+def _render_task(result: dict[str, Any], validated: Any) -> str:
+    return render_task_card(result["task"], styles=_STYLES)
+
+
+def _render_list(result: dict[str, Any], validated: ListTasksInput) -> str:
+    tasks = result["tasks"]
+    if tasks and "title" not in tasks[0]:
+        return render_confirmation(f"Found {result['total']} task(s)", styles=_STYLES)
+    if validated.tree:
+        return render_task_tree(tasks, styles=_STYLES)
+    return render_task_window(tasks, offset=validated.offset, total=result["total"], styles=_STYLES)
+
+
+def _render_stats(result: dict[str, Any], validated: TaskStatsInput) -> str:
+    return render_confirmation(f"{result['completed']} of {result['total']} task(s) completed", styles=_STYLES)
 
-    handler = handlers.get(name)
-    if handler is None:
-        return _error_response(
-            ErrorCode.VALIDATION_ERROR,
-            f"Unknown tool: {name}",
-            details={"tool_name": name},
-        )
 
+def _render_delete(result: dict[str, Any], validated: DeleteTaskInput) -> str:
+    count = result["subtasks_deleted"]
+    return render_confirmation(f"Task deleted, with {count} subtask(s)" if count else "Task deleted", styles=_STYLES)
+
+
+def _render_decompose(result: dict[str, Any], validated: DecomposeTaskInput) -> str:
+    return render_task_hierarchy(result["parent_task"], result["subtasks"], styles=_STYLES)
+
+
+def _register(
+    name: str,
+    handler: Handler,
+    input_model: type[BaseModel],
+    render: Renderer,
+    read_only: bool = False,
+) -> RegisteredTool:
+    return RegisteredTool(
+        name,
+        handler,
+        input_model,
+        ToolMetrics(name),
+        read_only,
+        timeout=TOOL_TIMEOUTS.get(name, TOOL_TIMEOUT),
+        log_sample_rate=LOG_SAMPLE_RATES.get(name, LOG_SAMPLE_RATE),
+        render=render,
+    )
+
+
+TOOLS: dict[str, RegisteredTool] = {
+    tool.name: tool
+    for tool in (
+        _register("add_task", add_task_handler, AddTaskInput, _render_task),
+        _register("list_tasks", list_tasks_handler, ListTasksInput, _render_list, read_only=True),
+        _register("task_stats", task_stats_handler, TaskStatsInput, _render_stats, read_only=True),
+        _register("complete_task", complete_task_handler, CompleteTaskInput, _render_task),
+        _register("delete_task", delete_task_handler, DeleteTaskInput, _render_delete),
+        _register("decompose_task", decompose_task_handler, DecomposeTaskInput, _render_decompose),
+    )
+}
+
+
+async def _invoke(call: ToolCall) -> dict[str, Any]:
+    """Validate and run the handler, mapping exceptions to error responses."""
     try:
-        return await handler(args, repo)
+        with TRACER.span("validate"):
+            call.validated = _validate(call.tool.input_model, call.args)
+        with TRACER.span("handler"):
+            return await call.tool.handler(call.validated, call.repo)
     except TaskNotFoundError as e:
         return _error_response(
             ErrorCode.TASK_NOT_FOUND,
@@ -145,7 +326,7 @@ async def handle_tool_call(name: str, args: dict[str, Any], repo: TaskRepository
         return _error_response(
             ErrorCode.VALIDATION_ERROR,
             "Invalid input",
-            details={"errors": e.errors()},
+            details={"errors": json.loads(e.json(include_url=False))},
         )
     except Exception:
         logger.exception("Unexpected error in tool call")
@@ -153,3 +334,84 @@ async def handle_tool_call(name: str, args: dict[str, Any], repo: TaskRepository
             ErrorCode.INTERNAL_ERROR,
             "An unexpected error occurred",
         )
+
+
+_pipeline = build_chain(DEFAULT_MIDDLEWARE, _invoke)
+
+
+def _unknown_tool(name: str) -> dict[str, Any]:
+    return _error_response(
+        ErrorCode.VALIDATION_ERROR,
+        f"Unknown tool: {name}",
+        details={"tool_name": name},
+    )
+
+
+def _invalid_output_mode(output_mode: str) -> dict[str, Any]:
+    return _error_response(
+        ErrorCode.VALIDATION_ERROR,
+        "output_mode must be 'json', 'html' or 'both'",
+        details={"output_mode": output_mode},
+    )
+
+
+async def handle_tool_call(
+    name: str,
+    args: Mapping[str, Any] | BaseModel,
+    repo: TaskRepository,
+    session_id: Hashable | None = None,
+    timeout: float | None = None,
+    output_mode: str | None = None,
+) -> dict[str, Any]:
+    """Dispatch a tool call to the appropriate handler with error handling.
+
+    ``args`` is either raw arguments, validated against the tool's input
+    model, or an instance of that model, which is trusted as already valid.
+    ``session_id`` keys the per-session rate limit; calls without one are
+    only subject to the global in-flight limit. ``timeout`` shortens the
+    tool's configured deadline. ``output_mode`` picks data, UI card or both,
+    defaulting to OUTPUT_MODE.
+    """
+    tool = TOOLS.get(name)
+    if tool is None:
+        return _unknown_tool(name)
+    mode = output_mode or OUTPUT_MODE
+    if mode not in OUTPUT_MODES:
+        return _invalid_output_mode(mode)
+    call = ToolCall(tool, args, repo, session_id=session_id, timeout=timeout, output_mode=mode)
+    return await _pipeline(call)
+
+
+class EncodedResult(NamedTuple):
+    """A tool response alongside its JSON encoding."""
+
+    result: dict[str, Any]
+    text: str
+
+
+async def handle_tool_call_encoded(
+    name: str,
+    args: Mapping[str, Any] | BaseModel,
+    repo: TaskRepository,
+    session_id: Hashable | None = None,
+    timeout: float | None = None,
+    output_mode: str | None = None,
+) -> EncodedResult:
+    """Dispatch a tool call and return the response with its JSON encoding."""
+    tool = TOOLS.get(name)
+    mode = output_mode or OUTPUT_MODE
+    if tool is None or mode not in OUTPUT_MODES:
+        result = _unknown_tool(name) if tool is None else _invalid_output_mode(mode)
+        return EncodedResult(result, encode_response(result))
+    call = ToolCall(
+        tool,
+        args,
+        repo,
+        encode=True,
+        session_id=session_id,
+        timeout=timeout,
+        output_mode=mode,
+    )
+    result = await _pipeline(call)
+    assert call.response is not None
+    return EncodedResult(result, call.response)
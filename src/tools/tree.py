@@ -0,0 +1,34 @@
+"""Nest flat task rows into a subtask tree."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+
+def build_tree(rows: Iterable[Mapping[str, Any]]) -> list[dict[str, Any]]:
+    """Nest task rows under their parents in O(n).
+
+    Each returned node is a copy of its row with a ``subtasks`` list; rows
+    whose parent is not among ``rows`` become roots. Sibling order follows
+    input order. Query bookkeeping columns are dropped, except
+    ``hidden_subtasks`` which is kept when non-zero.
+    """
+    nodes: dict[int, dict[str, Any]] = {}
+    for row in rows:
+        node = dict(row)
+        node.pop("depth", None)
+        hidden = node.pop("hidden_subtasks", 0)
+        if hidden:
+            node["hidden_subtasks"] = hidden
+        node["subtasks"] = []
+        nodes[node["id"]] = node
+
+    roots: list[dict[str, Any]] = []
+    for node in nodes.values():
+        parent = nodes.get(node["parent_id"])
+        if parent is None:
+            roots.append(node)
+        else:
+            parent["subtasks"].append(node)
+    return roots
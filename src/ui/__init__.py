@@ -1,13 +1,37 @@
 from .components import (
+    STYLE_MODES,
+    STYLESHEET,
+    STYLESHEET_URI,
+    StyleMode,
+    fragment_cache_info,
+    iter_task_list,
+    minify_css,
+    render_cards,
     render_confirmation,
     render_task_card,
     render_task_hierarchy,
     render_task_list,
+    render_task_tree,
+    render_task_window,
+    style_mode,
+    stylesheet,
 )
 
 __all__ = [
-    "render_task_card",
-    "render_task_list",
+    "STYLESHEET",
+    "STYLESHEET_URI",
+    "STYLE_MODES",
+    "StyleMode",
+    "fragment_cache_info",
+    "iter_task_list",
+    "minify_css",
+    "render_cards",
     "render_confirmation",
+    "render_task_card",
     "render_task_hierarchy",
+    "render_task_list",
+    "render_task_tree",
+    "render_task_window",
+    "style_mode",
+    "stylesheet",
 ]
@@ -2,16 +2,42 @@
 
 Generates HTML for inline cards following Apps SDK UI guidelines.
 Supports light/dark mode via CSS variables and includes proper HTML escaping.
+
+Every card embeds the stylesheet by default, so it renders on its own. A
+response with several cards can instead render them with ``styles="none"``
+and pass them to ``render_cards``, which emits the stylesheet once; or link
+to it with ``styles="link"``, for clients that fetch and cache the
+stylesheet resource at STYLESHEET_URI.
+
+Per-task fragments (cards, list items, subtasks) are cached in a bounded
+LRU, so re-rendering an unchanged task is a lookup rather than an escape and
+a format, and a list is a join over cached fragments.
+
+Long lists need not be rendered whole: ``render_task_window`` renders one
+page and an "N more" row carrying the cursor ``list_tasks`` takes to fetch
+the next, and ``iter_task_list`` yields a list card piece by piece, for
+transports that can stream it.
+
+``render_task_tree`` renders a task forest of any depth, down to a depth
+limit below which subtrees are collapsed into counts.
 """
 
 from __future__ import annotations
 
+import functools
+import hashlib
 import html
-from typing import Any
+import itertools
+import re
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import Any, Literal
+
+from src.config import UI_FRAGMENT_CACHE_SIZE, UI_PAGE_SIZE, UI_TREE_DEPTH
+from src.tools.budget import encode_cursor
+from src.tools.tree import build_tree
 
 # CSS styles with light/dark mode support via CSS variables
-_STYLES = """
-<style>
+_CSS = """
 .task-card {
     font-family: system-ui, -apple-system, sans-serif;
     padding: 12px 16px;
@@ -38,7 +64,7 @@ _STYLES = """
 .task-list {
     font-family: system-ui, -apple-system, sans-serif;
 }
-.task-list .header {
+.task-list .header, .tree .header {
     font-weight: 600;
     margin-bottom: 8px;
     color: var(--card-text, #1a1a1a);
@@ -58,6 +84,11 @@ _STYLES = """
     color: var(--card-meta, #666);
     font-style: italic;
 }
+.task-list .more, .task-list .footer {
+    padding: 8px 12px 0;
+    font-size: 0.875em;
+    color: var(--card-meta, #666);
+}
 .confirmation {
     font-family: system-ui, -apple-system, sans-serif;
     padding: 12px 16px;
@@ -92,8 +123,19 @@ _STYLES = """
     content: "└ ";
     color: var(--card-meta, #666);
 }
+.tree {
+    font-family: system-ui, -apple-system, sans-serif;
+    color: var(--card-text, #1a1a1a);
+}
+.tree .node, .tree .hidden {
+    padding: 4px 0 4px calc(var(--depth, 0) * 20px);
+}
+.tree .hidden {
+    font-size: 0.875em;
+    color: var(--card-meta, #666);
+}
 @media (prefers-color-scheme: dark) {
-    .task-card, .task-list .item, .hierarchy .parent {
+    .task-card, .task-list .item, .hierarchy .parent, .tree {
         --card-bg: #1f1f1f;
         --card-border: #333;
         --card-text: #e5e5e5;
@@ -109,56 +151,277 @@ _STYLES = """
         --subtask-bg: #171717;
     }
 }
-</style>
 """
 
+# Quoted strings are kept verbatim; everything else is minified around them
+_CSS_STRING = re.compile(r"""("[^"]*"|'[^']*')""")
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_PUNCTUATION = re.compile(r"\s*([{};,>])\s*")
+_CSS_LONG_HEX = re.compile(r"#([0-9a-fA-F])\1([0-9a-fA-F])\2([0-9a-fA-F])\3\b")
 
-def render_task_card(task: dict[str, Any]) -> str:
-    """Render a single task as an inline card."""
-    title = html.escape(task["title"])
-    completed = task.get("completed", False)
+
+def minify_css(css: str) -> str:
+    """Strip comments and the whitespace CSS does not need, and shorten hex colors.
+
+    Whitespace before a colon is kept, since in a selector (``.a :hover``)
+    it is significant.
+    """
+    parts = _CSS_STRING.split(css)
+    for i in range(0, len(parts), 2):
+        part = _CSS_COMMENT.sub("", parts[i])
+        part = re.sub(r"\s+", " ", part)
+        part = _CSS_PUNCTUATION.sub(r"\1", part)
+        part = _CSS_LONG_HEX.sub(r"#\1\2\3", part)
+        parts[i] = part.replace(": ", ":").replace(";}", "}")
+    return "".join(parts).strip()
+
+
+STYLESHEET = minify_css(_CSS)
+
+# Versioned by content, so clients can cache it for as long as it exists
+STYLESHEET_URI = f"ui://todo/styles-{hashlib.sha256(STYLESHEET.encode()).hexdigest()[:12]}.css"
+
+_STYLES = f"<style>{STYLESHEET}</style>"
+_STYLES_LINK = f'<link rel="stylesheet" href="{STYLESHEET_URI}">'
+
+StyleMode = Literal["inline", "link", "none"]
+STYLE_MODES: tuple[StyleMode, ...] = ("inline", "link", "none")
+
+
+def stylesheet(styles: StyleMode = "inline") -> str:
+    """Return the markup that applies the stylesheet in ``styles`` mode.
+
+    ``inline`` embeds the CSS, ``link`` references it at STYLESHEET_URI,
+    and ``none`` returns nothing, for cards whose response carries the
+    stylesheet once already.
+    """
+    if styles == "inline":
+        return _STYLES
+    if styles == "link":
+        return _STYLES_LINK
+    return ""
+
+
+def style_mode(name: str) -> StyleMode:
+    """Return ``name`` as a style mode, raising ValueError if it is not one."""
+    for mode in STYLE_MODES:
+        if name == mode:
+            return mode
+    raise ValueError(f"Unknown style mode: {name!r}; must be one of {', '.join(STYLE_MODES)}")
+
+
+def _head(styles: StyleMode) -> str:
+    markup = stylesheet(styles)
+    return f"{markup}\n" if markup else ""
+
+
+def render_cards(cards: Iterable[str], styles: StyleMode = "inline") -> str:
+    """Combine cards rendered with ``styles="none"`` into one response.
+
+    The stylesheet is emitted once, ahead of the first card.
+    """
+    return _head(styles) + "\n".join(cards)
+
+
+def _render_card(title: str, completed: bool) -> str:
     status_class = "status completed" if completed else "status"
     status_icon = "✓" if completed else "○"
-
-    return f"""<inline-card>
-{_STYLES}
-<div class="task-card">
+    return f"""<div class="task-card">
     <span class="{status_class}">{status_icon}</span>
     <span class="title">{title}</span>
 </div>
 </inline-card>"""
 
 
-def render_task_list(tasks: list[dict[str, Any]]) -> str:
+def _render_item(title: str, completed: bool) -> str:
+    status = "✓" if completed else "○"
+    return f'<div class="item"><span class="status">{status}</span> {title}</div>'
+
+
+def _render_subtask(title: str, completed: bool) -> str:
+    status = "✓" if completed else "○"
+    return f'<div class="subtask">{status} {title}</div>'
+
+
+@functools.lru_cache(maxsize=UI_FRAGMENT_CACHE_SIZE)
+def _fragment(render: Callable[[str, bool], str], task_id: int | None, title: str, completed: bool) -> str:
+    """Return ``render``'s fragment for a task, escaping its title only on a cache miss.
+
+    The arguments are everything the fragment is rendered from, so title and
+    completion serve as the task's version: an edited task misses, and its
+    old fragment ages out of the LRU.
+    """
+    return render(html.escape(title), bool(completed))
+
+
+def render_task_card(task: dict[str, Any], *, styles: StyleMode = "inline") -> str:
+    """Render a single task as an inline card."""
+    card = _fragment(_render_card, task.get("id"), task["title"], task.get("completed", False))
+    return f"<inline-card>\n{_head(styles)}{card}"
+
+
+def render_task_list(tasks: list[dict[str, Any]], *, styles: StyleMode = "inline") -> str:
     """Render a list of tasks as an inline card."""
     if not tasks:
         return f"""<inline-card>
-{_STYLES}
-<div class="task-list">
+{_head(styles)}<div class="task-list">
     <div class="empty">No tasks found</div>
 </div>
 </inline-card>"""
 
-    items = []
-    for task in tasks:
-        title = html.escape(task["title"])
-        completed = task.get("completed", False)
-        status = "✓" if completed else "○"
-        items.append(f'<div class="item"><span class="status">{status}</span> {title}</div>')
-
-    items_html = "\n    ".join(items)
+    items_html = "\n    ".join(
+        [_fragment(_render_item, task.get("id"), task["title"], task.get("completed", False)) for task in tasks]
+    )
     count = len(tasks)
 
     return f"""<inline-card>
-{_STYLES}
-<div class="task-list">
+{_head(styles)}<div class="task-list">
     <div class="header">{count} task(s)</div>
     {items_html}
 </div>
 </inline-card>"""
 
 
-def render_confirmation(message: str, task: dict[str, Any] | None = None) -> str:
+def render_task_window(
+    tasks: Sequence[dict[str, Any]],
+    *,
+    offset: int = 0,
+    page_size: int = UI_PAGE_SIZE,
+    total: int | None = None,
+    styles: StyleMode = "inline",
+) -> str:
+    """Render the first ``page_size`` of ``tasks`` as an inline card.
+
+    ``tasks`` are the rows from position ``offset`` of the listing on, and
+    ``total`` the size of the whole listing when more rows exist than were
+    passed in. Rows past the page are counted in an "N more" row whose
+    ``data-cursor`` resumes the listing after the last task shown.
+    """
+    page = tasks[:page_size]
+    if not page:
+        return render_task_list([], styles=styles)
+    total = offset + len(tasks) if total is None else total
+    remaining = total - offset - len(page)
+
+    items_html = "\n    ".join(
+        [_fragment(_render_item, task.get("id"), task["title"], task.get("completed", False)) for task in page]
+    )
+    more = ""
+    if remaining > 0:
+        cursor = encode_cursor(offset + len(page))
+        more = f'\n    <div class="more" data-cursor="{cursor}">{remaining} more</div>'
+
+    return f"""<inline-card>
+{_head(styles)}<div class="task-list">
+    <div class="header">{total} task(s)</div>
+    {items_html}{more}
+</div>
+</inline-card>"""
+
+
+def iter_task_list(
+    tasks: Iterable[dict[str, Any]], *, count: int | None = None, styles: StyleMode = "inline"
+) -> Iterator[str]:
+    """Yield a list card in pieces: the opening markup, one per task, then the close.
+
+    Only one task is held at a time, so ``tasks`` can be a lazy source of
+    any length. Given the ``count`` up front the pieces join to exactly what
+    ``render_task_list`` returns; without it the count follows the last task.
+    """
+    rows = iter(tasks)
+    first = next(rows, None)
+    if first is None:
+        yield render_task_list([], styles=styles)
+        return
+
+    header = f'\n    <div class="header">{count} task(s)</div>' if count is not None else ""
+    yield f'<inline-card>\n{_head(styles)}<div class="task-list">{header}'
+    seen = 0
+    for task in itertools.chain((first,), rows):
+        seen += 1
+        yield "\n    " + _fragment(_render_item, task.get("id"), task["title"], task.get("completed", False))
+    footer = f'\n    <div class="footer">{seen} task(s)</div>' if count is None else ""
+    yield f"{footer}\n</div>\n</inline-card>"
+
+
+def _render_node(title: str, completed: bool) -> str:
+    status = "✓" if completed else "○"
+    return f'<span class="status">{status}</span> {title}'
+
+
+def _hidden_row(depth: int, hidden: int, done: int | None) -> str:
+    ratio = f" · {done}/{hidden} done" if done is not None else ""
+    return f'<div class="hidden" style="--depth:{depth}">+{hidden} hidden{ratio}</div>'
+
+
+def _collapsed(node: dict[str, Any]) -> tuple[int, int | None]:
+    """Count the descendants of ``node`` and how many are complete.
+
+    A ``hidden_subtasks`` count from the query stands for children whose
+    completion is unknown, in which case no completed count is returned.
+    """
+    hidden = done = 0
+    known = True
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.get("hidden_subtasks"):
+            hidden += current["hidden_subtasks"]
+            known = False
+        for child in current.get("subtasks", ()):
+            hidden += 1
+            done += bool(child.get("completed"))
+            stack.append(child)
+    return hidden, done if known else None
+
+
+def render_task_tree(
+    tasks: list[dict[str, Any]], *, max_depth: int = UI_TREE_DEPTH, styles: StyleMode = "inline"
+) -> str:
+    """Render a task forest as an inline card, one row per task indented by depth.
+
+    ``tasks`` are either nested nodes with ``subtasks`` lists, as
+    ``build_tree`` returns, or flat rows with ``parent_id``, which are nested
+    first. Tasks deeper than ``max_depth`` (roots are depth 0) are collapsed
+    into a "+K hidden" row under their ancestor at the limit, with how many
+    of them are complete. The tree is walked with an explicit stack, so its
+    depth is not bounded by the recursion limit.
+    """
+    roots = tasks if not tasks or "subtasks" in tasks[0] else build_tree(tasks)
+    if not roots:
+        return render_task_list([], styles=styles)
+
+    rows: list[str] = []
+    total = 0
+    stack = [(root, 0) for root in reversed(roots)]
+    while stack:
+        node, depth = stack.pop()
+        total += 1
+        node_html = _fragment(_render_node, node.get("id"), node["title"], node.get("completed", False))
+        rows.append(f'<div class="node" style="--depth:{depth}">{node_html}</div>')
+        subtasks = node.get("subtasks", [])
+        if depth < max_depth:
+            stack.extend((child, depth + 1) for child in reversed(subtasks))
+            if node.get("hidden_subtasks"):
+                total += node["hidden_subtasks"]
+                rows.append(_hidden_row(depth + 1, node["hidden_subtasks"], None))
+        elif subtasks or node.get("hidden_subtasks"):
+            hidden, done = _collapsed(node)
+            total += hidden
+            rows.append(_hidden_row(depth + 1, hidden, done))
+    rows_html = "\n    ".join(rows)
+
+    return f"""<inline-card>
+{_head(styles)}<div class="tree">
+    <div class="header">{total} task(s)</div>
+    {rows_html}
+</div>
+</inline-card>"""
+
+
+def render_confirmation(
+    message: str, task: dict[str, Any] | None = None, *, styles: StyleMode = "inline"
+) -> str:
     """Render a confirmation message as an inline card."""
     escaped_message = html.escape(message)
 
@@ -168,33 +431,35 @@ def render_confirmation(message: str, task: dict[str, Any] | None = None) -> str
         task_info = f'<div class="meta">Task: {title}</div>'
 
     return f"""<inline-card>
-{_STYLES}
-<div class="confirmation">
+{_head(styles)}<div class="confirmation">
     <div>{escaped_message}</div>
     {task_info}
 </div>
 </inline-card>"""
 
 
-def render_task_hierarchy(parent: dict[str, Any], subtasks: list[dict[str, Any]]) -> str:
+def render_task_hierarchy(
+    parent: dict[str, Any], subtasks: list[dict[str, Any]], *, styles: StyleMode = "inline"
+) -> str:
     """Render a parent task with its subtasks as an inline card."""
     parent_title = html.escape(parent["title"])
 
-    subtask_items = []
-    for subtask in subtasks:
-        title = html.escape(subtask["title"])
-        completed = subtask.get("completed", False)
-        status = "✓" if completed else "○"
-        subtask_items.append(f'<div class="subtask">{status} {title}</div>')
-
+    subtask_items = [
+        _fragment(_render_subtask, subtask.get("id"), subtask["title"], subtask.get("completed", False))
+        for subtask in subtasks
+    ]
     subtasks_html = "\n        ".join(subtask_items) if subtask_items else '<div class="subtask">No subtasks</div>'
 
     return f"""<inline-card>
-{_STYLES}
-<div class="hierarchy">
+{_head(styles)}<div class="hierarchy">
     <div class="parent">{parent_title}</div>
     <div class="subtasks">
         {subtasks_html}
     </div>
 </div>
 </inline-card>"""
+
+
+def fragment_cache_info() -> functools._CacheInfo:
+    """Hits, misses and size of the fragment cache."""
+    return _fragment.cache_info()
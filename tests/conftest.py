@@ -1,6 +1,5 @@
 import aiosqlite
 import pytest
-
 from src.database.connection import init_db
 from src.database.models import TaskRepository
 
@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Milliseconds from process start to a first successful tools/call. About
+# 0.5 s on a laptop; the slack absorbs slow CI hosts, not new heavy imports.
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "2000"))
+
+
+@pytest.fixture(scope="module")
+def profile(tmp_path_factory):
+    env = {**os.environ, "DATABASE_PATH": str(tmp_path_factory.mktemp("startup") / "tasks.db")}
+    result = subprocess.run(
+        [sys.executable, "-m", "src", "--profile-startup", "--json"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def test_time_to_first_tool_call_within_budget(profile):
+    phases = profile["time_to_first_call"]
+    assert phases["total_ms"] <= STARTUP_BUDGET_MS, phases
+    assert phases["total_ms"] >= phases["import_ms"] + phases["session_ms"] + phases["first_call_ms"]
+
+
+def test_import_breakdown_covers_server(profile):
+    imports = profile["imports"]
+    assert imports["total_ms"] > 0
+    assert "src.server" in imports["by_package"]
+    assert "mcp" in imports["by_package"]
+
+
+def test_help_does_not_import_server():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "src", "--help"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=30,
+        check=True,
+    )
+    assert "--profile-startup" in result.stdout
+    assert "mcp" not in result.stderr
@@ -0,0 +1,270 @@
+import asyncio
+
+import pytest
+from src.database.connection import get_connection, init_db
+from src.database.models import TaskRepository
+from src.lifecycle import (
+    SHUTDOWN_HOOKS,
+    WARMUP_HOOKS,
+    BackgroundJobs,
+    DrainingServer,
+    Readiness,
+    drain,
+    run_warmup,
+    warm_up,
+)
+from src.tools.admission import AdmissionController
+
+
+class TestWarmUp:
+    async def test_runs_every_step(self, task_repo, sample_task):
+        steps = await warm_up(task_repo)
+        assert set(steps) == {"indexes", "statements", "tools"}
+        assert all(ms >= 0 for ms in steps.values())
+
+    async def test_skips_indexes_and_runs_hooks(self, task_repo, monkeypatch):
+        seen = []
+
+        async def preload_cache(repo):
+            seen.append(repo)
+
+        monkeypatch.setattr("src.lifecycle.WARMUP_HOOKS", [*WARMUP_HOOKS, preload_cache])
+        steps = await warm_up(task_repo, touch_indexes=False)
+        assert "indexes" not in steps
+        assert "preload_cache" in steps
+        assert seen == [task_repo]
+
+
+class TestRunWarmup:
+    async def test_marks_ready(self, tmp_path):
+        state = Readiness()
+        assert state.report()["status"] == "warming_up"
+        await run_warmup(str(tmp_path / "tasks.db"), state=state)
+        assert state.ready
+        assert state.report()["status"] == "ready"
+
+    async def test_warms_only_the_page_cache_and_code_on_its_own_connection(self, tmp_path):
+        state = Readiness()
+        await run_warmup(str(tmp_path / "tasks.db"), state=state)
+        assert set(state.steps) == {"indexes", "tools"}
+
+    async def test_warms_the_serving_connection(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "tasks.db")
+        seen = []
+
+        async def preload_cache(repo):
+            seen.append(repo)
+
+        async def serving():
+            db = await get_connection(path)
+            await init_db(db)
+            repos.append(TaskRepository(db))
+            return repos[-1]
+
+        repos = []
+        monkeypatch.setattr("src.lifecycle.WARMUP_HOOKS", [*WARMUP_HOOKS, preload_cache])
+        state = Readiness()
+        await run_warmup(path, state=state, serving=serving)
+        try:
+            assert state.ready
+            assert set(state.steps) == {"indexes", "connection", "statements", "tools", "preload_cache"}
+            assert seen == repos
+        finally:
+            await repos[0].db.close()
+
+    async def test_failure_leaves_process_not_ready(self, tmp_path):
+        state = Readiness()
+        await run_warmup(str(tmp_path / "missing" / "tasks.db"), state=state)
+        assert not state.ready
+        report = state.report()
+        assert report["status"] == "failed"
+        assert report["error"]
+
+
+class TestBackgroundJobs:
+    async def test_waits_for_jobs(self):
+        jobs = BackgroundJobs()
+        done = []
+
+        async def job():
+            await asyncio.sleep(0.01)
+            done.append(True)
+
+        jobs.spawn(job())
+        assert len(jobs) == 1
+        assert await jobs.wait(5) == 0
+        assert done == [True]
+        assert len(jobs) == 0
+
+    async def test_cancels_jobs_past_deadline(self):
+        jobs = BackgroundJobs()
+        task = jobs.spawn(asyncio.sleep(10))
+        assert await jobs.wait(0.01) == 1
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    async def test_failed_job_is_logged(self, caplog):
+        jobs = BackgroundJobs()
+
+        async def job():
+            raise RuntimeError("boom")
+
+        jobs.spawn(job())
+        assert await jobs.wait(5) == 0
+        await asyncio.sleep(0)
+        assert "Background job failed" in caplog.text
+
+
+class TestDrain:
+    async def test_waits_for_calls_jobs_and_hooks(self, monkeypatch):
+        admission = AdmissionController(session_rate=0)
+        jobs = BackgroundJobs()
+        state = Readiness()
+        state.ready = True
+        flushed = []
+
+        async def flush_writes():
+            flushed.append(True)
+
+        monkeypatch.setattr("src.lifecycle.SHUTDOWN_HOOKS", [*SHUTDOWN_HOOKS, flush_writes])
+        await admission.acquire()
+        asyncio.get_running_loop().call_later(0.02, admission.release)
+        jobs.spawn(asyncio.sleep(0.01))
+
+        report = await drain(admission, 5, jobs=jobs, state=state)
+        assert report["calls_abandoned"] == 0
+        assert report["jobs_dropped"] == 0
+        assert report["hooks_failed"] == []
+        assert report["duration_ms"] >= 20
+        assert flushed == [True]
+        assert admission.closed
+        assert not state.ready
+        assert state.report()["status"] == "draining"
+
+    async def test_reports_work_left_at_deadline(self, monkeypatch):
+        admission = AdmissionController(session_rate=0)
+        jobs = BackgroundJobs()
+
+        async def stuck_flush():
+            await asyncio.sleep(10)
+
+        monkeypatch.setattr("src.lifecycle.SHUTDOWN_HOOKS", [stuck_flush])
+        await admission.acquire()
+        jobs.spawn(asyncio.sleep(10))
+
+        report = await drain(admission, 0.02, jobs=jobs, state=Readiness())
+        assert report["calls_abandoned"] == 1
+        assert report["jobs_dropped"] == 1
+        assert report["hooks_failed"] == ["stuck_flush"]
+        assert report["duration_ms"] < 1000
+
+
+@pytest.fixture
+def readiness(monkeypatch):
+    state = Readiness()
+    monkeypatch.setattr("src.server.READINESS", state)
+    return state
+
+
+class TestHealthRoutes:
+    def test_healthz(self):
+        from src.server import app
+        from starlette.testclient import TestClient
+
+        assert TestClient(app).get("/healthz").json() == {"status": "ok"}
+
+    def test_readyz_follows_warmup(self, readiness):
+        from src.server import app
+        from starlette.testclient import TestClient
+
+        client = TestClient(app)
+        assert client.get("/readyz").status_code == 503
+        readiness.ready = True
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+
+    async def test_app_lifespan_runs_warmup_in_background(self, readiness, tmp_path, monkeypatch):
+        from contextlib import asynccontextmanager
+
+        from src.server import _with_process_lifecycle
+
+        monkeypatch.setattr("src.server.DATABASE_PATH", tmp_path / "tasks.db")
+        admission = AdmissionController()
+        monkeypatch.setattr("src.server.ADMISSION", admission)
+        entered = []
+
+        @asynccontextmanager
+        async def session_manager(app):
+            entered.append(app)
+            yield
+
+        async with _with_process_lifecycle(session_manager)("app"):
+            for _ in range(200):
+                if readiness.ready:
+                    break
+                await asyncio.sleep(0.01)
+            assert readiness.ready
+        assert entered == ["app"]
+        assert admission.closed
+        assert readiness.report()["status"] == "draining"
+        wal = tmp_path / "tasks.db-wal"
+        assert not wal.exists() or wal.stat().st_size == 0
+
+    async def test_readyz_reports_draining_before_uvicorn_stops(self, readiness, tmp_path, monkeypatch):
+        from contextlib import asynccontextmanager
+
+        import httpx
+        import uvicorn
+        from src.launcher import bind_socket
+        from src.server import _with_process_lifecycle, readyz
+        from starlette.applications import Starlette
+        from starlette.routing import Route
+
+        monkeypatch.setattr("src.server.DATABASE_PATH", tmp_path / "tasks.db")
+        admission = AdmissionController()
+        monkeypatch.setattr("src.server.ADMISSION", admission)
+
+        @asynccontextmanager
+        async def session_manager(app):
+            yield
+
+        app = Starlette(routes=[Route("/readyz", readyz)], lifespan=_with_process_lifecycle(session_manager))
+        sock = bind_socket("127.0.0.1", 0)
+        url = f"http://127.0.0.1:{sock.getsockname()[1]}/readyz"
+        server = DrainingServer(uvicorn.Config(app, log_level="warning"), admission, 0.3, state=readiness)
+        serving = asyncio.create_task(server.serve(sockets=[sock]))
+        async with httpx.AsyncClient() as client:
+            for _ in range(200):
+                if readiness.ready:
+                    break
+                await asyncio.sleep(0.01)
+            assert (await client.get(url)).status_code == 200
+
+            # What SIGTERM does; handle_exit would re-raise the signal here on exit
+            server.should_exit = True
+            while not readiness.draining:
+                await asyncio.sleep(0.01)
+            response = await client.get(url)
+            assert response.status_code == 503
+            assert response.json()["status"] == "draining"
+            assert admission.closed
+
+            await asyncio.wait_for(serving, 5)
+            with pytest.raises(httpx.ConnectError):
+                await client.get(url)
+
+    async def test_app_lifespan_passes_state_through(self, readiness, tmp_path, monkeypatch):
+        from contextlib import asynccontextmanager
+
+        from src.server import _with_process_lifecycle
+
+        monkeypatch.setattr("src.server.DATABASE_PATH", tmp_path / "tasks.db")
+        monkeypatch.setattr("src.server.ADMISSION", AdmissionController())
+
+        @asynccontextmanager
+        async def stateful(app):
+            yield {"key": "value"}
+
+        async with _with_process_lifecycle(stateful)("app") as state:
+            assert state == {"key": "value"}
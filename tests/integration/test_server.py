@@ -1,11 +1,22 @@
+import asyncio
 import json
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from unittest.mock import MagicMock
 
 import pytest
-
+from mcp.shared.exceptions import McpError
+from mcp.types import CallToolResult, RequestParams, ServerNotification
 from src.database.models import TaskRepository
+from src.lifecycle import BACKGROUND_JOBS
 from src.server import (
+    _client_timeout,
+    _close_database,
     _get_repo,
+    _open_repository,
+    _output_mode,
+    _session_key,
+    _start_warmup,
     add_task,
     complete_task,
     decompose_task,
@@ -13,9 +24,18 @@ from src.server import (
     lifespan,
     list_tasks,
     mcp,
+    task_stats,
 )
+from src.sessions import InMemorySessionStore
 
-EXPECTED_TOOLS = {"add_task", "list_tasks", "complete_task", "delete_task", "decompose_task"}
+EXPECTED_TOOLS = {
+    "add_task",
+    "list_tasks",
+    "task_stats",
+    "complete_task",
+    "delete_task",
+    "decompose_task",
+}
 
 
 @pytest.fixture
@@ -41,7 +61,7 @@ class TestToolRegistration:
         assert tool_names == EXPECTED_TOOLS
 
     def test_tool_count(self):
-        assert len(mcp._tool_manager._tools) == 5
+        assert len(mcp._tool_manager._tools) == 6
 
 
 class TestToolSchemas:
@@ -58,6 +78,11 @@ class TestToolSchemas:
         assert "filter" in props
         assert "parent_id" in props
 
+    def test_list_tasks_has_tree_params(self):
+        props = self._get_tool("list_tasks").parameters["properties"]
+        assert "tree" in props
+        assert "max_depth" in props
+
     def test_complete_task_has_task_id(self):
         props = self._get_tool("complete_task").parameters["properties"]
         assert "task_id" in props
@@ -79,12 +104,130 @@ class TestAsgiApp:
 
         assert isinstance(app, Starlette)
 
+    def test_metrics_route(self):
+        from src.server import app
+        from starlette.testclient import TestClient
+
+        response = TestClient(app).get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE tool_call_duration_seconds histogram" in response.text
+        assert "# TYPE process_resident_memory_bytes gauge" in response.text
+        assert "read_coalescing_hit_ratio" in response.text
+
+    def test_responses_compressed_when_accepted(self):
+        from src.server import app
+        from starlette.testclient import TestClient
+
+        response = TestClient(app).get("/metrics", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "# TYPE tool_call_duration_seconds histogram" in response.text
+
+    async def test_debug_traces_route(self, ctx, monkeypatch):
+        from src.observability.tracing import TRACER, RingBufferExporter
+        from src.server import app
+        from starlette.testclient import TestClient
+
+        monkeypatch.setattr(TRACER, "sample_rate", 1.0)
+        monkeypatch.setattr(TRACER, "exporter", RingBufferExporter(100))
+        await list_tasks(ctx)
+
+        client = TestClient(app)
+        spans = client.get("/debug/traces").json()["spans"]
+        root = next(s for s in spans if s["name"] == "mcp.request")
+        assert root["attributes"]["tool"] == "list_tasks"
+        trace = client.get("/debug/traces", params={"trace_id": root["trace_id"]}).json()["spans"]
+        assert {s["name"] for s in trace} >= {"mcp.request", "tool.dispatch", "sql"}
+        assert client.get("/debug/traces", params={"limit": "x"}).status_code == 400
+
+
+class TestOutputMode:
+    @pytest.fixture
+    def store(self, monkeypatch):
+        store = InMemorySessionStore(ttl=60)
+        monkeypatch.setattr("src.server.sessions", store)
+        monkeypatch.setattr("src.server._session_modes", OrderedDict())
+        return store
+
+    async def test_call_argument_wins(self, ctx, store):
+        ctx.request_context.request.headers = {"x-output-mode": "html"}
+        assert await _output_mode(ctx, "json", "abc") == "json"
+
+    async def test_session_header(self, ctx, store):
+        ctx.request_context.request.headers = {"x-output-mode": "html"}
+        assert await _output_mode(ctx, None, None) == "html"
+
+    async def test_neither_uses_default(self, ctx, store):
+        ctx.request_context.request = None
+        assert await _output_mode(ctx, None, "abc") is None
+
+    async def test_session_keeps_its_header_mode(self, ctx, store, monkeypatch):
+        ctx.request_context.request.headers = {"x-output-mode": "html"}
+        assert await _output_mode(ctx, None, "abc") == "html"
+        await BACKGROUND_JOBS.wait(1)
+        assert await store.get("abc") == {"output_mode": "html"}
+
+        ctx.request_context.request.headers = {}
+        assert await _output_mode(ctx, None, "abc") == "html"
+        # Another process reads the mode from the store
+        monkeypatch.setattr("src.server._session_modes", OrderedDict())
+        assert await _output_mode(ctx, None, "abc") == "html"
+        assert await _output_mode(ctx, None, "other") is None
+
+    async def test_writes_the_store_only_on_change(self, ctx, store):
+        ctx.request_context.request.headers = {"x-output-mode": "json"}
+        await _output_mode(ctx, None, "abc")
+        await BACKGROUND_JOBS.wait(1)
+        await _output_mode(ctx, None, "abc")
+        assert len(BACKGROUND_JOBS) == 0
+
+    async def test_invalid_header_is_not_kept(self, ctx, store):
+        ctx.request_context.request.headers = {"x-output-mode": "xml"}
+        assert await _output_mode(ctx, None, "abc") == "xml"
+        assert len(BACKGROUND_JOBS) == 0
+        ctx.request_context.request.headers = {}
+        assert await _output_mode(ctx, None, "abc") is None
+
+    async def test_tool_argument(self, ctx):
+        result = json.loads(await add_task("Plain", ctx, output_mode="json"))
+        assert "ui" not in result
+        result = json.loads(await list_tasks(ctx, output_mode="html"))
+        assert "Plain" in result["ui"]
+        assert "tasks" not in result
+
 
 class TestGetRepo:
     def test_returns_repo(self, ctx, task_repo):
         assert _get_repo(ctx) is task_repo
 
 
+class TestClientTimeout:
+    def test_reads_meta_timeout(self, ctx):
+        ctx.request_context.meta = RequestParams.Meta.model_validate({"timeout": 2.5})
+        assert _client_timeout(ctx) == 2.5
+
+    @pytest.mark.parametrize("meta", [None, {}, {"timeout": "soon"}, {"timeout": 0}, {"timeout": True}])
+    def test_ignores_missing_or_invalid(self, ctx, meta):
+        ctx.request_context.meta = None if meta is None else RequestParams.Meta.model_validate(meta)
+        assert _client_timeout(ctx) is None
+
+
+class TestSessionKey:
+    def test_uses_session_header(self, ctx):
+        ctx.request_context.request.headers = {"mcp-session-id": "abc"}
+        assert _session_key(ctx) == "abc"
+
+    def test_uses_client_header_in_stateless_mode(self, ctx):
+        ctx.request_context.request.headers = {"x-session-id": "client-1"}
+        assert _session_key(ctx) == "client-1"
+
+    def test_none_without_a_session_header(self, ctx):
+        ctx.request_context.request.headers = {}
+        assert _session_key(ctx) is None
+        ctx.request_context.request = None
+        assert _session_key(ctx) is None
+
+
 class TestLifespan:
     async def test_yields_task_repository(self, tmp_path, monkeypatch):
         monkeypatch.setattr("src.server.DATABASE_PATH", tmp_path / "test.db")
@@ -96,6 +239,54 @@ class TestLifespan:
         async with lifespan(MagicMock()):
             assert (tmp_path / "sub").exists()
 
+    async def test_stateless_sessions_share_one_repository(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("src.server.DATABASE_PATH", tmp_path / "test.db")
+        monkeypatch.setattr("src.server.MCP_STATELESS_HTTP", True)
+        try:
+            async with lifespan(MagicMock()) as first:
+                pass
+            async with lifespan(MagicMock()) as second:
+                assert second is first
+            # Still open after both sessions ended
+            assert await second.get_stats()
+        finally:
+            await _close_database()
+
+    async def test_stateless_warmup_opens_the_shared_repository(self, tmp_path, monkeypatch):
+        from src.lifecycle import Readiness
+
+        monkeypatch.setattr("src.server.DATABASE_PATH", tmp_path / "test.db")
+        monkeypatch.setattr("src.server.MCP_STATELESS_HTTP", True)
+        monkeypatch.setattr("src.server.WARMUP_ENABLED", True)
+        state = Readiness()
+        monkeypatch.setattr("src.server.READINESS", state)
+        opened = []
+
+        async def open_repository():
+            opened.append(await _open_repository())
+            return opened[-1]
+
+        monkeypatch.setattr("src.server._open_repository", open_repository)
+        try:
+            await _start_warmup()
+            assert state.ready
+            assert "connection" in state.steps
+            async with lifespan(MagicMock()) as repo:
+                # The first session finds the warmed repository already open
+                assert opened == [repo]
+        finally:
+            await _close_database()
+
+    async def test_close_checkpoints_wal(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("src.server.DATABASE_PATH", tmp_path / "test.db")
+        monkeypatch.setattr("src.server.MCP_STATELESS_HTTP", True)
+        async with lifespan(MagicMock()) as repo:
+            await repo.create("Written before shutdown")
+        assert (tmp_path / "test.db-wal").stat().st_size > 0
+        result = await _close_database()
+        assert result["busy"] == 0
+        assert result["checkpointed_pages"] == result["wal_pages"]
+
 
 class TestToolFunctions:
     async def test_add_task(self, ctx):
@@ -120,6 +311,15 @@ class TestToolFunctions:
         result = json.loads(await list_tasks(ctx, parent_id=sample_task["id"]))
         assert result["total"] == 1
 
+    async def test_list_tasks_tree(self, ctx, sample_task):
+        await add_task("Child", ctx, parent_id=sample_task["id"])
+        result = json.loads(await list_tasks(ctx, tree=True))
+        assert result["tasks"][0]["subtasks"][0]["title"] == "Child"
+
+    async def test_task_stats(self, ctx, sample_task):
+        result = json.loads(await task_stats(ctx))
+        assert result["total"] == 1
+
     async def test_complete_task(self, ctx, sample_task):
         result = json.loads(await complete_task(sample_task["id"], ctx))
         assert result["task"]["completed"] == 1
@@ -131,3 +331,153 @@ class TestToolFunctions:
     async def test_decompose_task(self, ctx, sample_task):
         result = json.loads(await decompose_task(sample_task["id"], ["A", "B"], ctx))
         assert len(result["subtasks"]) == 2
+
+
+class TestResponseEncoding:
+    def test_tools_have_no_wrapped_output_schema(self):
+        for tool in mcp._tool_manager._tools.values():
+            assert tool.output_schema is None
+
+    async def test_structured_output(self, ctx, monkeypatch):
+        monkeypatch.setattr("src.server.MCP_STRUCTURED_OUTPUT", True)
+        result = await add_task("Structured", ctx)
+        assert isinstance(result, CallToolResult)
+        assert result.structuredContent["task"]["title"] == "Structured"
+        assert json.loads(result.content[0].text) == result.structuredContent
+
+    async def test_created_at_is_iso_utc(self, ctx):
+        result = json.loads(await add_task("Timestamped", ctx))
+        assert result["task"]["created_at"].endswith("Z")
+        assert "T" in result["task"]["created_at"]
+
+
+@pytest.fixture
+def connect(tmp_path, monkeypatch):
+    """Open an initialized in-memory MCP client session that records notifications.
+
+    A context manager rather than a yield fixture: the session's task group
+    must be entered and exited in the same task.
+    """
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    monkeypatch.setattr("src.server.DATABASE_PATH", tmp_path / "test.db")
+    monkeypatch.setattr("src.server._changes.window", 0.01)
+
+    @asynccontextmanager
+    async def open_session():
+        notifications = []
+
+        async def on_message(message):
+            if isinstance(message, ServerNotification):
+                notifications.append(message.root)
+
+        async with create_connected_server_and_client_session(mcp, message_handler=on_message) as session:
+            session.notifications = notifications
+            yield session
+
+    return open_session
+
+
+class TestResources:
+    async def test_advertises_subscriptions(self, connect):
+        async with connect() as client:
+            assert client.get_server_capabilities().resources.subscribe is True
+            templates = await client.list_resource_templates()
+            assert {t.uriTemplate for t in templates.resourceTemplates} == {
+                "task://{task_id}",
+                "tasks://list{?filter}",
+            }
+
+    async def test_read_task_and_lists(self, connect):
+        async with connect() as client:
+            await client.call_tool("add_task", {"title": "Read me"})
+            await client.call_tool("complete_task", {"task_id": 1})
+            await client.call_tool("add_task", {"title": "Still open"})
+
+            task = json.loads((await client.read_resource("task://1")).contents[0].text)
+            assert task["title"] == "Read me"
+            listed = json.loads((await client.read_resource("tasks://list?filter=incomplete")).contents[0].text)
+            assert [t["title"] for t in listed["tasks"]] == ["Still open"]
+            listed = json.loads((await client.read_resource("tasks://list")).contents[0].text)
+            assert listed["total"] == 2
+
+    @pytest.mark.parametrize(
+        ("tool", "arguments", "field"),
+        [
+            ("add_task", {"title": "   "}, "title"),
+            ("list_tasks", {"filter": "done"}, "filter"),
+            ("list_tasks", {"cursor": "not-a-cursor"}, "cursor"),
+            ("complete_task", {"task_id": 0}, "task_id"),
+        ],
+    )
+    async def test_invalid_arguments_get_the_error_envelope(self, connect, tool, arguments, field):
+        async with connect() as client:
+            result = await client.call_tool(tool, arguments)
+        error = json.loads(result.content[0].text)["error"]
+        assert error["code"] == "VALIDATION_ERROR"
+        assert [e["loc"] for e in error["details"]["errors"]] == [[field]]
+
+    async def test_arguments_are_normalized_once(self, connect):
+        async with connect() as client:
+            result = await client.call_tool("add_task", {"title": "  Trimmed  "})
+        assert json.loads(result.content[0].text)["task"]["title"] == "Trimmed"
+
+    async def test_read_stylesheet(self, connect):
+        from src.ui import STYLESHEET, STYLESHEET_URI
+
+        async with connect() as client:
+            contents = (await client.read_resource(STYLESHEET_URI)).contents[0]
+            assert contents.mimeType == "text/css"
+            assert contents.text == STYLESHEET
+
+    async def test_default_response_size(self, connect):
+        from src.ui import STYLESHEET_URI
+
+        async with connect() as client:
+            result = await client.call_tool("add_task", {"title": "Buy milk"})
+        text = result.content[0].text
+        # The default output is data and a card linking the stylesheet resource
+        assert STYLESHEET_URI in json.loads(text)["ui"]
+        assert len(text.encode()) < 400
+
+    async def test_read_missing_task(self, connect):
+        async with connect() as client:
+            with pytest.raises(McpError, match="does not exist"):
+                await client.read_resource("task://99")
+
+    async def test_subscribers_get_one_update_per_burst(self, connect, monkeypatch):
+        monkeypatch.setattr("src.server._changes.window", 0.2)
+        async with connect() as client:
+            await client.call_tool("add_task", {"title": "Parent"})
+            await client.subscribe_resource("tasks://list")
+            await client.subscribe_resource("task://1")
+            await client.call_tool("decompose_task", {"task_id": 1, "subtask_titles": ["A", "B", "C"]})
+            await client.call_tool("complete_task", {"task_id": 1})
+            await asyncio.sleep(0.3)
+            assert sorted(str(n.params.uri) for n in client.notifications) == ["task://1", "tasks://list"]
+
+            await client.unsubscribe_resource("tasks://list")
+            await client.call_tool("add_task", {"title": "Unwatched"})
+            await asyncio.sleep(0.3)
+            assert len(client.notifications) == 2
+
+    async def test_subscriptions_end_with_the_session(self, connect):
+        from src.server import _changes
+
+        async with connect() as client:
+            await client.subscribe_resource("tasks://list")
+            await client.subscribe_resource("task://1")
+            assert _changes.subscribers == 1
+        assert _changes.subscribers == 0
+        assert _changes.subscriptions == 0
+
+    async def test_subscribe_rejects_unknown_uri(self, connect):
+        async with connect() as client:
+            with pytest.raises(McpError, match="Unknown resource"):
+                await client.subscribe_resource("tasks://list?filter=done")
+
+    async def test_subscribe_needs_stateful_sessions(self, connect, monkeypatch):
+        async with connect() as client:
+            monkeypatch.setattr("src.server.MCP_STATELESS_HTTP", True)
+            with pytest.raises(McpError, match="stateful"):
+                await client.subscribe_resource("task://1")
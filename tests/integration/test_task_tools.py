@@ -1,16 +1,23 @@
-import pytest
+import asyncio
+import json
+import logging
+import re
 
+import pytest
+from src.tools.schemas import AddTaskInput, ListTasksInput
 from src.tools.task_tools import (
+    TOOLS,
     TaskNotFoundError,
     add_task_handler,
     complete_task_handler,
     decompose_task_handler,
     delete_task_handler,
     handle_tool_call,
+    handle_tool_call_encoded,
     list_tasks_handler,
+    task_stats_handler,
 )
 
-
 # --- add_task_handler ---
 
 
@@ -19,7 +26,7 @@ class TestAddTaskHandler:
         result = await add_task_handler({"title": "Buy milk"}, task_repo)
         assert result["task"]["title"] == "Buy milk"
         assert result["task"]["completed"] == 0
-        assert "ui" in result
+        assert "ui" not in result
 
     async def test_creates_subtask(self, task_repo, sample_task):
         result = await add_task_handler(
@@ -27,6 +34,10 @@ class TestAddTaskHandler:
         )
         assert result["task"]["parent_id"] == sample_task["id"]
 
+    async def test_accepts_validated_input(self, task_repo):
+        result = await add_task_handler(AddTaskInput(title="  Typed  "), task_repo)
+        assert result["task"]["title"] == "Typed"
+
     async def test_invalid_parent_raises(self, task_repo):
         with pytest.raises(TaskNotFoundError) as exc_info:
             await add_task_handler({"title": "Task", "parent_id": 999}, task_repo)
@@ -41,7 +52,7 @@ class TestListTasksHandler:
         result = await list_tasks_handler({}, task_repo)
         assert result["total"] == 1
         assert result["filter_applied"] == "all"
-        assert "ui" in result
+        assert "ui" not in result
 
     async def test_filter_complete(self, task_repo, sample_task):
         await task_repo.update_completed(sample_task["id"], True)
@@ -62,6 +73,85 @@ class TestListTasksHandler:
         assert result["total"] == 0
         assert result["tasks"] == []
 
+    async def test_projection_order_and_limit(self, task_repo):
+        for title in ("a", "b", "c"):
+            await task_repo.create(title)
+        result = await list_tasks_handler(
+            {"fields": ["title"], "order_by": "id desc", "limit": 2}, task_repo
+        )
+        assert result["tasks"] == [{"title": "c"}, {"title": "b"}]
+        # The total counts the whole listing, not just the page returned
+        assert result["total"] == 3
+
+    async def test_tree_mode_projection_keeps_links(self, task_repo, sample_task):
+        await task_repo.create("Child", parent_id=sample_task["id"])
+        result = await list_tasks_handler({"tree": True, "fields": ["title"]}, task_repo)
+        [root] = result["tasks"]
+        assert set(root) == {"id", "title", "parent_id", "subtasks"}
+        assert root["subtasks"][0]["title"] == "Child"
+
+    async def test_tree_mode_nests_subtasks(self, task_repo, sample_task):
+        subs = await task_repo.create_subtasks(sample_task["id"], ["A", "B"])
+        await task_repo.create("Deep", parent_id=subs[0]["id"])
+        result = await list_tasks_handler({"tree": True}, task_repo)
+        assert result["total"] == 4
+        assert result["truncated"] is False
+        [root] = result["tasks"]
+        assert [s["title"] for s in root["subtasks"]] == ["A", "B"]
+        assert root["subtasks"][0]["subtasks"][0]["title"] == "Deep"
+
+    async def test_tree_mode_max_depth(self, task_repo, sample_task):
+        await task_repo.create_subtasks(sample_task["id"], ["A", "B"])
+        result = await list_tasks_handler({"tree": True, "max_depth": 0}, task_repo)
+        [root] = result["tasks"]
+        assert root["subtasks"] == []
+        assert root["hidden_subtasks"] == 2
+        assert result["max_depth"] == 0
+
+
+    async def test_large_tree_returns_its_top_levels(self, task_repo, sample_task, monkeypatch):
+        monkeypatch.setattr("src.tools.task_tools.RESPONSE_MAX_ITEMS", 5)
+        monkeypatch.setattr("src.tools.middleware.RESPONSE_MAX_ITEMS", 5)
+        subs = await task_repo.create_subtasks(sample_task["id"], ["A", "B", "C"])
+        for sub in subs:
+            await task_repo.create_subtasks(sub["id"], ["1", "2"])
+        result = await handle_tool_call("list_tasks", {"tree": True}, task_repo, output_mode="json")
+        assert "summarized" not in result
+        assert result["total"] == 5
+        assert result["truncated"] is True
+        [root] = result["tasks"]
+        assert [s["title"] for s in root["subtasks"]] == ["A", "B", "C"]
+        assert [s["title"] for s in root["subtasks"][0]["subtasks"]] == ["1"]
+
+
+# --- task_stats_handler ---
+
+
+class TestTaskStatsHandler:
+    async def test_empty_database(self, task_repo):
+        result = await task_stats_handler({}, task_repo)
+        assert result["total"] == 0
+        assert result["completion_ratio"] == 0.0
+        assert result["top_parents"] == []
+        assert "ui" not in result
+
+    async def test_counts_and_parent_ratios(self, task_repo, sample_task):
+        subs = await task_repo.create_subtasks(sample_task["id"], ["A", "B", "C", "D"])
+        await task_repo.update_completed(subs[0]["id"], True)
+        result = await task_stats_handler({"top_parents": 1}, task_repo)
+        assert (result["total"], result["completed"], result["incomplete"]) == (5, 1, 4)
+        [parent] = result["top_parents"]
+        assert parent["id"] == sample_task["id"]
+        assert parent["subtasks"] == 4
+        assert parent["completion_ratio"] == 0.25
+
+    async def test_daily_histogram(self, task_repo, sample_task):
+        await task_repo.update_completed(sample_task["id"], True)
+        result = await task_stats_handler({"days": 1}, task_repo)
+        [today] = result["daily"]
+        assert today["created"] == 1
+        assert today["completed"] == 1
+
 
 # --- complete_task_handler ---
 
@@ -70,7 +160,7 @@ class TestCompleteTaskHandler:
     async def test_completes_task(self, task_repo, sample_task):
         result = await complete_task_handler({"task_id": sample_task["id"]}, task_repo)
         assert result["task"]["completed"] == 1
-        assert "ui" in result
+        assert "ui" not in result
 
     async def test_nonexistent_task_raises(self, task_repo):
         with pytest.raises(TaskNotFoundError) as exc_info:
@@ -86,7 +176,7 @@ class TestDeleteTaskHandler:
         result = await delete_task_handler({"task_id": sample_task["id"]}, task_repo)
         assert result["deleted"] is True
         assert result["task_id"] == sample_task["id"]
-        assert "ui" in result
+        assert "ui" not in result
 
     async def test_counts_subtasks_deleted(self, task_repo, sample_task):
         await task_repo.create_subtasks(sample_task["id"], ["A", "B"])
@@ -111,7 +201,7 @@ class TestDecomposeTaskHandler:
         assert result["parent_task"]["id"] == sample_task["id"]
         assert len(result["subtasks"]) == 3
         assert all(s["parent_id"] == sample_task["id"] for s in result["subtasks"])
-        assert "ui" in result
+        assert "ui" not in result
 
     async def test_nonexistent_task_raises(self, task_repo):
         with pytest.raises(TaskNotFoundError) as exc_info:
@@ -142,6 +232,26 @@ class TestHandleToolCall:
         assert result["error"]["code"] == "TASK_NOT_FOUND"
         assert result["error"]["details"]["task_id"] == 999
 
+    async def test_none_optional_args_accepted(self, task_repo):
+        result = await handle_tool_call("list_tasks", {"filter": "all", "parent_id": None}, task_repo)
+        assert result["total"] == 0
+
+    async def test_model_input_is_not_validated_again(self, task_repo):
+        # A model instance is trusted, as the server builds it from arguments
+        # FastMCP has already checked
+        result = await handle_tool_call("add_task", AddTaskInput.model_construct(title=" Raw "), task_repo)
+        assert result["task"]["title"] == " Raw "
+
+    async def test_model_input_is_coalesced(self, task_repo, sample_task):
+        args = ListTasksInput.model_construct(fields=["id", "title"], order_by="id asc")
+        before = task_repo.flight.coalesced
+        first, second = await asyncio.gather(
+            handle_tool_call("list_tasks", args, task_repo),
+            handle_tool_call("list_tasks", args, task_repo),
+        )
+        assert first == second
+        assert task_repo.flight.coalesced == before + 1
+
     async def test_validation_error_returns_error(self, task_repo):
         result = await handle_tool_call("add_task", {"title": ""}, task_repo)
         assert "error" in result
@@ -159,3 +269,387 @@ class TestHandleToolCall:
         for tool_name, args in tools:
             result = await handle_tool_call(tool_name, args, task_repo)
             assert "error" not in result, f"{tool_name} failed: {result}"
+
+
+# --- middleware chain ---
+
+
+class TestToolMiddleware:
+    async def test_records_latency_and_db_time(self, task_repo):
+        metrics = TOOLS["add_task"].metrics
+        calls, db_calls = metrics.latency.count, metrics.db_time.count
+        await handle_tool_call("add_task", {"title": "Timed"}, task_repo)
+        assert metrics.latency.count == calls + 1
+        assert metrics.db_time.count == db_calls + 1
+        assert metrics.db_time.sum > 0
+
+    async def test_counts_errors_by_code(self, task_repo):
+        counter = TOOLS["complete_task"].metrics.error("TASK_NOT_FOUND")
+        before = counter.value
+        await handle_tool_call("complete_task", {"task_id": 999}, task_repo)
+        assert counter.value == before + 1
+
+    async def test_encoded_response_accounts_payload(self, task_repo):
+        metrics = TOOLS["list_tasks"].metrics
+        before = metrics.response_bytes.sum
+        result, text = await handle_tool_call_encoded("list_tasks", {}, task_repo)
+        assert result["total"] == 0
+        assert metrics.response_bytes.sum == before + len(text)
+
+    async def test_large_list_is_summarized(self, task_repo, monkeypatch):
+        monkeypatch.setattr("src.tools.middleware.RESPONSE_MAX_ITEMS", 3)
+        monkeypatch.setattr("src.tools.middleware.RESPONSE_SUMMARY_ITEMS", 2)
+        await task_repo.create_subtasks((await task_repo.create("P"))["id"], ["A", "B", "C"])
+        counter = TOOLS["list_tasks"].metrics.summarized("items")
+        before = counter.value
+
+        first = await handle_tool_call("list_tasks", {"order_by": "id"}, task_repo)
+        assert first["summarized"] == "items"
+        assert [t["title"] for t in first["tasks"]] == ["P", "A"]
+        assert counter.value == before + 1
+
+        rest = await handle_tool_call(
+            "list_tasks", {"order_by": "id", "cursor": first["next_cursor"]}, task_repo
+        )
+        assert "summarized" not in rest
+        assert [t["title"] for t in rest["tasks"]] == ["B", "C"]
+
+    async def test_unlimited_pages_fetch_one_past_the_budget(self, task_repo, monkeypatch):
+        monkeypatch.setattr("src.tools.task_tools.RESPONSE_MAX_ITEMS", 3)
+        monkeypatch.setattr("src.tools.middleware.RESPONSE_MAX_ITEMS", 3)
+        monkeypatch.setattr("src.tools.middleware.RESPONSE_SUMMARY_ITEMS", 2)
+        for i in range(10):
+            await task_repo.create(f"Task {i}")
+        await task_repo.update_completed(1, True)
+        limits = []
+        get_all = task_repo.get_all
+
+        async def spy(**kwargs):
+            limits.append(kwargs["limit"])
+            return await get_all(**kwargs)
+
+        monkeypatch.setattr(task_repo, "get_all", spy)
+        first = await handle_tool_call("list_tasks", {"order_by": "id"}, task_repo)
+        second = await handle_tool_call(
+            "list_tasks", {"order_by": "id", "cursor": first["next_cursor"]}, task_repo
+        )
+        assert limits == [4, 4]
+        # Counts cover the whole listing on every page
+        for page in (first, second):
+            assert (page["total"], page["completed"], page["incomplete"]) == (10, 1, 9)
+        assert [t["title"] for t in second["tasks"]] == ["Task 2", "Task 3"]
+
+    async def test_last_page_reports_the_full_total(self, task_repo, monkeypatch):
+        monkeypatch.setattr("src.tools.middleware.RESPONSE_MAX_ITEMS", 3)
+        monkeypatch.setattr("src.tools.middleware.RESPONSE_SUMMARY_ITEMS", 2)
+        for i in range(4):
+            await task_repo.create(f"Task {i}")
+        first = await handle_tool_call("list_tasks", {"order_by": "id"}, task_repo)
+        rest = await handle_tool_call(
+            "list_tasks", {"order_by": "id", "cursor": first["next_cursor"]}, task_repo
+        )
+        assert "summarized" not in rest
+        assert (first["total"], rest["total"]) == (4, 4)
+
+    async def test_byte_budget(self, task_repo, monkeypatch):
+        monkeypatch.setattr("src.tools.middleware.RESPONSE_MAX_BYTES", 200)
+        await task_repo.create_subtasks((await task_repo.create("P"))["id"], ["A", "B", "C"])
+        result, text = await handle_tool_call_encoded("list_tasks", {}, task_repo)
+        assert result["summarized"] == "bytes"
+        assert json.loads(text)["summarized"] == "bytes"
+
+    async def test_invalid_cursor_is_validation_error(self, task_repo):
+        result = await handle_tool_call("list_tasks", {"cursor": "bogus"}, task_repo)
+        assert result["error"]["code"] == "VALIDATION_ERROR"
+
+    async def test_encoded_unknown_tool(self, task_repo):
+        result, text = await handle_tool_call_encoded("unknown_tool", {}, task_repo)
+        assert result["error"]["code"] == "VALIDATION_ERROR"
+        assert "VALIDATION_ERROR" in text
+
+    async def test_session_over_rate_is_rejected_as_retryable(self, task_repo, monkeypatch):
+        from src.tools.admission import AdmissionController
+
+        monkeypatch.setattr(
+            "src.tools.middleware.ADMISSION", AdmissionController(session_rate=1, session_burst=1)
+        )
+        counter = TOOLS["list_tasks"].metrics.error("RATE_LIMITED")
+        before = counter.value
+        assert "tasks" in await handle_tool_call("list_tasks", {}, task_repo, session_id="s1")
+        result = await handle_tool_call("list_tasks", {}, task_repo, session_id="s1")
+        assert result["error"]["code"] == "RATE_LIMITED"
+        assert result["error"]["details"]["reason"] == "session_rate"
+        assert result["error"]["details"]["retryable"] is True
+        assert counter.value == before + 1
+        assert "tasks" in await handle_tool_call("list_tasks", {}, task_repo, session_id="s2")
+
+    async def test_calls_refused_while_shutting_down(self, task_repo, monkeypatch):
+        from src.tools.admission import AdmissionController
+
+        admission = AdmissionController()
+        admission.close()
+        monkeypatch.setattr("src.tools.middleware.ADMISSION", admission)
+        result = await handle_tool_call("add_task", {"title": "Late"}, task_repo)
+        assert result["error"]["code"] == "UNAVAILABLE"
+        assert result["error"]["details"]["retryable"] is True
+        assert await task_repo.get_all() == []
+
+    async def test_identical_concurrent_reads_share_one_response(self, task_repo, sample_task):
+        metrics = TOOLS["list_tasks"].metrics
+        before = metrics.latency.count, metrics.response_bytes.count
+        results = await asyncio.gather(
+            *(handle_tool_call_encoded("list_tasks", {"filter": "all"}, task_repo) for _ in range(3))
+        )
+        assert all(r.text is results[0].text for r in results)
+        assert json.loads(results[0].text)["total"] == 1
+        assert metrics.latency.count == before[0] + 3
+        # Encoded once, and accounted for every caller it was sent to
+        assert metrics.response_bytes.count == before[1] + 3
+
+    async def test_coalesced_callers_keep_their_own_rate_limit(self, task_repo, monkeypatch):
+        from src.tools.admission import AdmissionController
+
+        monkeypatch.setattr(
+            "src.tools.middleware.ADMISSION", AdmissionController(session_rate=0.001, session_burst=1)
+        )
+        await handle_tool_call("list_tasks", {}, task_repo, session_id="a")
+        limited, allowed = await asyncio.gather(
+            handle_tool_call("list_tasks", {}, task_repo, session_id="a"),
+            handle_tool_call("list_tasks", {}, task_repo, session_id="b"),
+        )
+        assert limited["error"]["code"] == "RATE_LIMITED"
+        assert "tasks" in allowed
+
+    async def test_coalesced_callers_keep_their_own_deadline(self, task_repo, sample_task):
+        expired, unbounded = await asyncio.gather(
+            handle_tool_call("list_tasks", {}, task_repo, timeout=1e-9),
+            handle_tool_call("list_tasks", {}, task_repo),
+        )
+        assert expired["error"]["code"] == "TIMEOUT"
+        assert unbounded["total"] == 1
+
+    async def test_errors_are_not_shared(self, task_repo, monkeypatch):
+        calls = 0
+        get_all = task_repo.get_all
+
+        async def flaky_get_all(**kwargs):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            if calls == 1:
+                raise RuntimeError("boom")
+            return await get_all(**kwargs)
+
+        monkeypatch.setattr(task_repo, "get_all", flaky_get_all)
+        failed, retried = await asyncio.gather(
+            handle_tool_call("list_tasks", {}, task_repo),
+            handle_tool_call("list_tasks", {}, task_repo),
+        )
+        assert failed["error"]["code"] == "INTERNAL_ERROR"
+        assert retried["total"] == 0
+        assert calls == 2
+
+    async def test_read_after_write_is_not_stale(self, task_repo):
+        first = asyncio.create_task(handle_tool_call("list_tasks", {}, task_repo))
+        await asyncio.sleep(0)
+        await handle_tool_call("add_task", {"title": "New"}, task_repo)
+        second = await handle_tool_call("list_tasks", {}, task_repo)
+        assert (await first)["total"] == 0
+        assert second["total"] == 1
+
+    async def test_expired_deadline_interrupts_query(self, task_repo, monkeypatch):
+        async def slow_get_all(**kwargs):
+            await task_repo._fetchone(
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1000000000)"
+                " SELECT count(*) FROM n",
+                method="get_all",
+            )
+            return []
+
+        monkeypatch.setattr(task_repo, "get_all", slow_get_all)
+        counter = TOOLS["list_tasks"].metrics.error("TIMEOUT")
+        before = counter.value
+        result = await handle_tool_call("list_tasks", {}, task_repo, timeout=0.05)
+        assert result["error"]["code"] == "TIMEOUT"
+        assert result["error"]["details"] == {"timeout": 0.05, "retryable": True}
+        assert counter.value == before + 1
+        monkeypatch.undo()
+        assert "tasks" in await asyncio.wait_for(handle_tool_call("list_tasks", {}, task_repo), 1)
+
+    async def test_trace_covers_dispatch_handler_and_sql(self, task_repo, monkeypatch):
+        from src.observability.tracing import TRACER, RingBufferExporter
+
+        monkeypatch.setattr(TRACER, "sample_rate", 1.0)
+        monkeypatch.setattr(TRACER, "exporter", RingBufferExporter(100))
+        with TRACER.span("mcp.request"):
+            await handle_tool_call("add_task", {"title": "Traced"}, task_repo)
+
+        spans = {s["span_id"]: s for s in TRACER.exporter.query()}
+        names = [s["name"] for s in spans.values()]
+        assert {"mcp.request", "tool.dispatch", "validate", "handler"} <= set(names)
+        sql = [s for s in spans.values() if s["name"] == "sql"]
+        assert [s["attributes"]["method"] for s in reversed(sql)] == ["create", "commit", "get_by_id"]
+        assert all(spans[s["parent_id"]]["name"] == "handler" for s in sql)
+        assert len({s["trace_id"] for s in spans.values()}) == 1
+
+    async def test_sampled_and_slow_call_logs(self, task_repo, monkeypatch, caplog):
+        import dataclasses
+
+        caplog.set_level(logging.INFO, logger="src.tools.calls")
+        await handle_tool_call("list_tasks", {}, task_repo)
+        (record,) = caplog.records
+        assert record.message == "Tool call"
+        assert record.tool == "list_tasks"
+        assert record.arguments == {}
+        assert record.error_code is None
+
+        caplog.clear()
+        monkeypatch.setitem(TOOLS, "list_tasks", dataclasses.replace(TOOLS["list_tasks"], log_sample_rate=0.0))
+        await handle_tool_call("list_tasks", {}, task_repo)
+        assert caplog.records == []
+
+        monkeypatch.setattr("src.tools.middleware.LOG_SLOW_CALL_MS", 0)
+        await handle_tool_call("list_tasks", {}, task_repo)
+        (record,) = caplog.records
+        assert record.levelno == logging.WARNING
+        assert record.message == "Slow tool call"
+        assert record.sampled is False
+
+
+# --- output modes ---
+
+
+class TestOutputModes:
+    async def test_both_adds_card_to_data(self, task_repo):
+        result = await handle_tool_call("add_task", {"title": "Card"}, task_repo, output_mode="both")
+        assert result["task"]["title"] == "Card"
+        assert result["ui"].startswith("<inline-card>")
+        assert 'class="task-card"' in result["ui"]
+
+    async def test_json_skips_rendering(self, task_repo, monkeypatch):
+        import dataclasses
+
+        def fail(result, validated):
+            raise AssertionError("rendered a json call")
+
+        monkeypatch.setitem(TOOLS, "add_task", dataclasses.replace(TOOLS["add_task"], render=fail))
+        metrics = TOOLS["add_task"].metrics
+        before = metrics.render_time.count
+        result = await handle_tool_call("add_task", {"title": "Data"}, task_repo, output_mode="json")
+        assert "ui" not in result
+        assert metrics.render_time.count == before
+
+    async def test_html_returns_card_only(self, task_repo, sample_task):
+        result, text = await handle_tool_call_encoded("list_tasks", {}, task_repo, output_mode="html")
+        assert list(result) == ["ui"]
+        assert sample_task["title"] in json.loads(text)["ui"]
+
+    async def test_default_response_links_the_stylesheet(self, task_repo):
+        from src.ui import STYLESHEET, STYLESHEET_URI
+
+        result, text = await handle_tool_call_encoded("add_task", {"title": "Buy milk"}, task_repo)
+        assert f'href="{STYLESHEET_URI}"' in result["ui"]
+        assert STYLESHEET not in text
+        # The card adds a few hundred bytes to the data, not the stylesheet's two kilobytes
+        assert len(text.encode()) < 400
+
+    async def test_style_mode_from_config(self, task_repo, monkeypatch):
+        from src.ui import STYLESHEET
+
+        monkeypatch.setattr("src.tools.task_tools._STYLES", "inline")
+        result = await handle_tool_call("add_task", {"title": "Styled"}, task_repo)
+        assert STYLESHEET in result["ui"]
+
+    async def test_default_from_config(self, task_repo, monkeypatch):
+        monkeypatch.setattr("src.tools.task_tools.OUTPUT_MODE", "json")
+        assert "ui" not in await handle_tool_call("list_tasks", {}, task_repo)
+
+    async def test_invalid_mode_is_validation_error(self, task_repo):
+        result, _ = await handle_tool_call_encoded("list_tasks", {}, task_repo, output_mode="xml")
+        assert result["error"]["code"] == "VALIDATION_ERROR"
+        assert result["error"]["details"] == {"output_mode": "xml"}
+        assert await handle_tool_call("add_task", {"title": "X"}, task_repo, output_mode="xml") == result
+
+    async def test_errors_are_not_rendered(self, task_repo):
+        result = await handle_tool_call("complete_task", {"task_id": 999}, task_repo, output_mode="html")
+        assert result["error"]["code"] == "TASK_NOT_FOUND"
+        assert "ui" not in result
+
+    async def test_records_render_time(self, task_repo):
+        metrics = TOOLS["list_tasks"].metrics
+        before = metrics.render_time.count
+        await handle_tool_call("list_tasks", {}, task_repo, output_mode="both")
+        assert metrics.render_time.count == before + 1
+
+    async def test_modes_do_not_share_coalesced_reads(self, task_repo, sample_task):
+        json_call, html_call = await asyncio.gather(
+            handle_tool_call_encoded("list_tasks", {}, task_repo, output_mode="json"),
+            handle_tool_call_encoded("list_tasks", {}, task_repo, output_mode="html"),
+        )
+        assert "ui" not in json_call.result
+        assert list(html_call.result) == ["ui"]
+
+    async def test_list_card_pages_with_list_cursor(self, task_repo):
+        from src.config import UI_PAGE_SIZE
+
+        for i in range(UI_PAGE_SIZE + 2):
+            await task_repo.create(f"Task {i}")
+        result = await handle_tool_call("list_tasks", {"order_by": "id"}, task_repo)
+        assert result["ui"].count('class="item"') == UI_PAGE_SIZE
+        assert ">2 more</div>" in result["ui"]
+        cursor = re.search(r'data-cursor="([^"]+)"', result["ui"]).group(1)
+        rest = await handle_tool_call("list_tasks", {"order_by": "id", "cursor": cursor}, task_repo)
+        assert [t["title"] for t in rest["tasks"]] == [f"Task {UI_PAGE_SIZE}", f"Task {UI_PAGE_SIZE + 1}"]
+        assert f"{UI_PAGE_SIZE + 2} task(s)" in rest["ui"]
+
+    @pytest.fixture
+    def encodes(self, monkeypatch):
+        from src.tools import middleware
+
+        calls = []
+        encode = middleware.encode_response
+        monkeypatch.setattr(middleware, "encode_response", lambda result: calls.append(1) or encode(result))
+        return calls
+
+    async def test_card_counts_against_byte_budget(self, task_repo, encodes):
+        from src.config import RESPONSE_MAX_BYTES, RESPONSE_SUMMARY_ITEMS
+
+        for i in range(120):
+            await task_repo.create(f"{i:03d} " + "x" * 396)
+        result, text = await handle_tool_call_encoded("list_tasks", {}, task_repo, output_mode="both")
+        assert result["summarized"] == "bytes"
+        assert len(text) <= RESPONSE_MAX_BYTES
+        # The over-budget candidate, then the summary that is sent
+        assert len(encodes) == 2
+        # The card shows the summarized page, not the tasks left out
+        assert result["ui"].count('class="item"') == RESPONSE_SUMMARY_ITEMS
+        assert f">{120 - RESPONSE_SUMMARY_ITEMS} more</div>" in result["ui"]
+        assert json.loads(text) == result
+
+    async def test_card_within_budget_is_encoded_once(self, task_repo, encodes):
+        for i in range(120):
+            await task_repo.create(f"{i:03d} " + "x" * 396)
+        result, _ = await handle_tool_call_encoded("list_tasks", {}, task_repo, output_mode="html")
+        assert len(encodes) == 1
+        assert ">70 more</div>" in result["ui"]
+
+    async def test_json_response_is_encoded_once(self, task_repo, sample_task, encodes):
+        await handle_tool_call_encoded("list_tasks", {}, task_repo, output_mode="json")
+        assert len(encodes) == 1
+
+    async def test_tree_card(self, task_repo, sample_task):
+        await task_repo.create_subtasks(sample_task["id"], ["A", "B"])
+        result = await handle_tool_call("list_tasks", {"tree": True}, task_repo)
+        assert 'class="tree"' in result["ui"]
+        assert result["ui"].count('class="node"') == 3
+
+    async def test_projection_without_titles(self, task_repo, sample_task):
+        result = await handle_tool_call("list_tasks", {"fields": ["id"]}, task_repo)
+        assert "Found 1 task(s)" in result["ui"]
+
+    async def test_decompose_card_shows_hierarchy(self, task_repo, sample_task):
+        result = await handle_tool_call(
+            "decompose_task", {"task_id": sample_task["id"], "subtask_titles": ["A", "B"]}, task_repo
+        )
+        assert 'class="hierarchy"' in result["ui"]
+        assert result["ui"].count('class="subtask"') == 2
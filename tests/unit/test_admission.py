@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+from src.tools.admission import AdmissionController, AdmissionRejected, TokenBucket
+
+
+class TestTokenBucket:
+    def test_burst_then_empty(self):
+        bucket = TokenBucket(rate=1, burst=2, now=0.0)
+        assert bucket.try_take(0.0)
+        assert bucket.try_take(0.0)
+        assert not bucket.try_take(0.0)
+        assert bucket.retry_after() == pytest.approx(1.0)
+
+    def test_refills_over_time_up_to_burst(self):
+        bucket = TokenBucket(rate=10, burst=2, now=0.0)
+        bucket.try_take(0.0)
+        bucket.try_take(0.0)
+        assert bucket.try_take(0.1)
+        bucket.refill(100.0)
+        assert bucket.tokens == 2
+
+
+class TestAdmissionController:
+    async def test_session_rate_limit(self):
+        admission = AdmissionController(session_rate=1, session_burst=2, max_in_flight=10)
+        for _ in range(2):
+            await admission.acquire("a")
+            admission.release()
+        with pytest.raises(AdmissionRejected) as exc:
+            await admission.acquire("a")
+        assert exc.value.reason == "session_rate"
+        assert exc.value.retry_after > 0
+        # Other sessions are unaffected
+        await admission.acquire("b")
+
+    async def test_rate_limit_disabled(self):
+        admission = AdmissionController(session_rate=0, session_burst=1, max_in_flight=100)
+        for _ in range(50):
+            await admission.acquire("a")
+        assert admission.in_flight == 50
+
+    async def test_waiters_admitted_in_order(self):
+        admission = AdmissionController(session_rate=0, max_in_flight=1, max_queue=5)
+        await admission.acquire()
+        order: list[int] = []
+
+        async def worker(i: int) -> None:
+            wait = await admission.acquire()
+            assert wait >= 0
+            order.append(i)
+            admission.release()
+
+        tasks = [asyncio.create_task(worker(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        assert admission.queued == 3
+        admission.release()
+        await asyncio.gather(*tasks)
+        assert order == [0, 1, 2]
+        assert admission.in_flight == 0
+        assert admission.queued == 0
+
+    async def test_queue_full(self):
+        admission = AdmissionController(session_rate=0, max_in_flight=1, max_queue=1)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as exc:
+            await admission.acquire()
+        assert exc.value.reason == "queue_full"
+        admission.release()
+        await waiter
+        assert admission.in_flight == 1
+
+    async def test_queue_timeout_frees_queue_slot(self):
+        admission = AdmissionController(session_rate=0, max_in_flight=1, max_queue=1, queue_timeout=0.01)
+        await admission.acquire()
+        with pytest.raises(AdmissionRejected) as exc:
+            await admission.acquire()
+        assert exc.value.reason == "queue_timeout"
+        assert admission.queued == 0
+        admission.release()
+        assert admission.in_flight == 0
+
+    async def test_cancelled_waiter_leaves_queue(self):
+        admission = AdmissionController(session_rate=0, max_in_flight=1, max_queue=5)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert admission.queued == 0
+        admission.release()
+        assert admission.in_flight == 0
+
+    async def test_release_skips_waiter_cancelled_in_the_same_turn(self):
+        admission = AdmissionController(session_rate=0, max_in_flight=1, max_queue=5)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        # Cancelled as by its deadline, but its task has not run yet to leave the queue
+        admission._waiters[0].cancel()
+        admission.release()
+        assert admission.in_flight == 0
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert admission.queued == 0
+        assert admission.in_flight == 0
+
+    async def test_release_hands_slot_past_cancelled_waiter(self):
+        admission = AdmissionController(session_rate=0, max_in_flight=1, max_queue=5)
+        await admission.acquire()
+        cancelled = asyncio.create_task(admission.acquire())
+        live = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        admission._waiters[0].cancel()
+        admission.release()
+        await live
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert admission.in_flight == 1
+        assert admission.queued == 0
+
+    async def test_close_skips_cancelled_waiters(self):
+        admission = AdmissionController(session_rate=0, max_in_flight=1, max_queue=5)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        admission._waiters[0].cancel()
+        admission.close()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert admission.queued == 0
+
+    async def test_close_rejects_new_and_queued_calls(self):
+        admission = AdmissionController(session_rate=0, max_in_flight=1, max_queue=5)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        admission.close()
+        with pytest.raises(AdmissionRejected) as exc:
+            await waiter
+        assert exc.value.reason == "shutting_down"
+        with pytest.raises(AdmissionRejected):
+            await admission.acquire()
+        assert admission.queued == 0
+        assert admission.in_flight == 1
+
+    async def test_wait_idle(self):
+        admission = AdmissionController(session_rate=0)
+        assert await admission.wait_idle(0) == 0
+        await admission.acquire()
+        await admission.acquire()
+        asyncio.get_running_loop().call_later(0.01, admission.release)
+        asyncio.get_running_loop().call_later(0.02, admission.release)
+        assert await admission.wait_idle(5) == 0
+
+    async def test_wait_idle_gives_up_at_deadline(self):
+        admission = AdmissionController(session_rate=0)
+        await admission.acquire()
+        assert await admission.wait_idle(0.01) == 1
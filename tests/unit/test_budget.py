@@ -0,0 +1,76 @@
+import pytest
+from src.tools.budget import decode_cursor, encode_cursor, summarize
+
+
+def _tasks(n, completed_every=2):
+    return [{"id": i, "title": f"T{i}", "completed": int(i % completed_every == 0)} for i in range(n)]
+
+
+class TestCursor:
+    def test_round_trip(self):
+        assert decode_cursor(encode_cursor(40)) == 40
+
+    @pytest.mark.parametrize("cursor", ["not base64!", "b2Zmc2V0Oi0x", "Zm9vOjE="])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+class TestSummarize:
+    def test_flat_keeps_first_items_and_counts(self):
+        result = {"tasks": _tasks(10), "total": 10, "filter_applied": "all"}
+        summary = summarize(result, 3, "items")
+        assert [t["id"] for t in summary["tasks"]] == [0, 1, 2]
+        assert summary["returned"] == 3
+        assert summary["total"] == 10
+        assert summary["completed"] == 5
+        assert summary["incomplete"] == 5
+        assert summary["summarized"] == "items"
+        assert summary["filter_applied"] == "all"
+        assert decode_cursor(summary["next_cursor"]) == 3
+
+    def test_cursor_accounts_for_offset(self):
+        summary = summarize({"tasks": _tasks(10), "total": 10}, 3, "bytes", offset=20)
+        assert decode_cursor(summary["next_cursor"]) == 23
+
+    def test_no_cursor_when_everything_kept(self):
+        summary = summarize({"tasks": _tasks(2), "total": 2}, 5, "bytes")
+        assert summary["next_cursor"] is None
+
+    def test_projection_without_completed(self):
+        summary = summarize({"tasks": [{"title": "x"}] * 4, "total": 4}, 1, "items")
+        assert "completed" not in summary
+
+    def test_tree_collapses_roots(self):
+        roots = [
+            {"id": 1, "subtasks": [{"id": 3, "subtasks": []}]},
+            {"id": 2, "subtasks": [], "hidden_subtasks": 4},
+            {"id": 5, "subtasks": []},
+        ]
+        summary = summarize({"tasks": roots, "total": 4}, 2, "items", tree=True)
+        assert summary["tasks"] == [
+            {"id": 1, "subtasks": [], "hidden_subtasks": 1},
+            {"id": 2, "subtasks": [], "hidden_subtasks": 4},
+        ]
+        assert summary["next_cursor"] is None
+
+    def test_tree_keeps_nodes_breadth_first(self):
+        roots = [
+            {"id": 1, "subtasks": [{"id": 3, "subtasks": [{"id": 5, "subtasks": []}]}, {"id": 4, "subtasks": []}]},
+            {"id": 2, "subtasks": []},
+        ]
+        summary = summarize({"tasks": roots, "total": 5}, 4, "bytes", tree=True)
+        assert summary["tasks"] == [
+            {
+                "id": 1,
+                "subtasks": [{"id": 3, "subtasks": [], "hidden_subtasks": 1}, {"id": 4, "subtasks": []}],
+            },
+            {"id": 2, "subtasks": []},
+        ]
+        assert summary["returned"] == 4
+        assert roots[0]["subtasks"][0]["subtasks"] == [{"id": 5, "subtasks": []}]
+
+    def test_does_not_mutate_result(self):
+        result = {"tasks": _tasks(5), "total": 5}
+        summarize(result, 1, "items")
+        assert len(result["tasks"]) == 5
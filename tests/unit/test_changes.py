@@ -0,0 +1,119 @@
+import asyncio
+
+from src.database.changes import ChangeFeed, list_uri, task_uri
+
+
+class Recorder:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.uris: list[str] = []
+
+    async def __call__(self, uri: str) -> None:
+        await asyncio.sleep(self.delay)
+        self.uris.append(uri)
+
+
+async def settle(feed: ChangeFeed) -> None:
+    await asyncio.sleep(feed.window + 0.02)
+
+
+class TestChangeFeed:
+    async def test_notifies_subscribers_of_changed_topics(self):
+        feed = ChangeFeed(window=0)
+        first, second = Recorder(), Recorder()
+        feed.subscribe("a", task_uri(1), first)
+        feed.subscribe("b", task_uri(2), second)
+        feed.publish([task_uri(1)])
+        await settle(feed)
+        assert first.uris == ["task://1"]
+        assert second.uris == []
+
+    async def test_coalesces_a_burst(self):
+        feed = ChangeFeed(window=0.01)
+        recorder = Recorder()
+        feed.subscribe("a", list_uri(), recorder)
+        for i in range(50):
+            feed.publish([task_uri(i), list_uri()])
+        await settle(feed)
+        assert recorder.uris == ["tasks://list?filter=all"]
+
+    async def test_echoes_the_uri_the_subscriber_used(self):
+        feed = ChangeFeed(window=0)
+        recorder = Recorder()
+        feed.subscribe("a", list_uri(), recorder, uri="tasks://list")
+        feed.publish([list_uri()])
+        await settle(feed)
+        assert recorder.uris == ["tasks://list"]
+
+    async def test_resubscribing_replaces_delivery(self):
+        feed = ChangeFeed(window=0)
+        old, new = Recorder(), Recorder()
+        feed.subscribe("a", task_uri(1), old)
+        feed.subscribe("a", task_uri(2), new)
+        feed.publish([task_uri(1)])
+        await settle(feed)
+        assert old.uris == []
+        assert new.uris == ["task://1"]
+
+    async def test_unsubscribe(self):
+        feed = ChangeFeed(window=0)
+        recorder = Recorder()
+        feed.subscribe("a", task_uri(1), recorder)
+        feed.subscribe("a", task_uri(2), recorder)
+        feed.unsubscribe("a", task_uri(1))
+        assert feed.subscriptions == 1
+        feed.publish([task_uri(1), task_uri(2)])
+        await settle(feed)
+        assert recorder.uris == ["task://2"]
+        feed.unsubscribe("a", task_uri(2))
+        assert feed.subscribers == 0
+
+    async def test_slow_subscriber_gets_coalesced_updates(self):
+        feed = ChangeFeed(window=0)
+        slow, fast = Recorder(delay=0.05), Recorder()
+        feed.subscribe("slow", task_uri(1), slow)
+        feed.subscribe("fast", task_uri(1), fast)
+        for _ in range(5):
+            feed.publish([task_uri(1)])
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.15)
+        # One in flight while the rest of the burst piled up as one pending update
+        assert slow.uris == ["task://1", "task://1"]
+        assert fast.uris == ["task://1"] * 5
+
+    async def test_failed_delivery_drops_subscriber(self):
+        feed = ChangeFeed(window=0)
+
+        async def closed(uri: str) -> None:
+            raise ConnectionError("stream closed")
+
+        feed.subscribe("gone", task_uri(1), closed)
+        feed.subscribe("gone", list_uri(), closed)
+        feed.publish([task_uri(1)])
+        await settle(feed)
+        assert feed.subscribers == 0
+        assert feed.subscriptions == 0
+
+    async def test_fans_out_to_many_subscribers(self):
+        feed = ChangeFeed(window=0)
+        recorders = [Recorder() for _ in range(2000)]
+        for i, recorder in enumerate(recorders):
+            feed.subscribe(i, list_uri("incomplete"), recorder)
+        feed.publish([list_uri("incomplete")])
+        await settle(feed)
+        assert all(recorder.uris == ["tasks://list?filter=incomplete"] for recorder in recorders)
+
+    async def test_publish_without_subscribers_schedules_nothing(self):
+        feed = ChangeFeed(window=0)
+        feed.publish([task_uri(1)])
+        assert feed._flush_handle is None
+
+    async def test_close_cancels_pending_deliveries(self):
+        feed = ChangeFeed(window=0)
+        recorder = Recorder(delay=10)
+        feed.subscribe("a", task_uri(1), recorder)
+        feed.publish([task_uri(1)])
+        await asyncio.sleep(0.01)
+        await feed.close()
+        assert feed.subscribers == 0
+        assert recorder.uris == []
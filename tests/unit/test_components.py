@@ -1,8 +1,24 @@
+import re
+
+import pytest
+from src.tools.budget import decode_cursor
 from src.ui.components import (
+    _CSS,
+    STYLE_MODES,
+    STYLESHEET,
+    STYLESHEET_URI,
+    _fragment,
+    fragment_cache_info,
+    iter_task_list,
+    minify_css,
+    render_cards,
     render_confirmation,
     render_task_card,
     render_task_hierarchy,
     render_task_list,
+    render_task_tree,
+    render_task_window,
+    style_mode,
 )
 
 
@@ -182,9 +198,263 @@ class TestDarkModeSupport:
     def test_includes_dark_mode_media_query(self):
         task = {"title": "Task", "completed": False}
         html = render_task_card(task)
-        assert "@media (prefers-color-scheme: dark)" in html
+        assert "@media (prefers-color-scheme:dark)" in html
 
     def test_uses_css_variables(self):
         task = {"title": "Task", "completed": False}
         html = render_task_card(task)
         assert "var(--card-bg" in html
+
+
+class TestStylesheet:
+    def test_minified_at_import(self):
+        assert "\n" not in STYLESHEET
+        assert len(STYLESHEET) < 0.8 * len(_CSS)
+        assert ".task-card{" in STYLESHEET
+        assert "background:var(--card-bg,#fff)" in STYLESHEET
+
+    def test_minify_keeps_strings_and_selector_spaces(self):
+        css = '/* note */ .a :hover ,\n.b > .c {\n  content: "x  ;  y" ;\n  color: #AABBCC;\n}'
+        assert minify_css(css) == '.a :hover,.b>.c{content:"x  ;  y";color:#ABC}'
+
+    def test_uri_is_versioned_by_content(self):
+        assert re.fullmatch(r"ui://todo/styles-[0-9a-f]{12}\.css", STYLESHEET_URI)
+
+
+def _tasks(count):
+    return [{"id": i, "title": f"Task {i}", "completed": i % 2 == 0} for i in range(1, count + 1)]
+
+
+class TestRenderTaskWindow:
+    def test_renders_first_page_with_more(self):
+        html = render_task_window(_tasks(120), page_size=50)
+        assert "120 task(s)" in html
+        assert html.count('class="item"') == 50
+        assert ">70 more</div>" in html
+
+    def test_cursor_resumes_after_the_page(self):
+        html = render_task_window(_tasks(120), page_size=50)
+        cursor = re.search(r'data-cursor="([^"]+)"', html).group(1)
+        assert decode_cursor(cursor) == 50
+
+    def test_later_page_from_rows_at_offset(self):
+        html = render_task_window(_tasks(30), offset=100, page_size=20, total=130)
+        assert "130 task(s)" in html
+        assert ">10 more</div>" in html
+        cursor = re.search(r'data-cursor="([^"]+)"', html).group(1)
+        assert decode_cursor(cursor) == 120
+
+    def test_last_page_has_no_more(self):
+        html = render_task_window(_tasks(10), page_size=50)
+        assert 'class="more"' not in html
+        assert html == render_task_list(_tasks(10))
+
+    def test_empty(self):
+        assert "No tasks found" in render_task_window([])
+
+
+class TestIterTaskList:
+    def test_pieces_join_to_render_task_list(self):
+        tasks = _tasks(5)
+        assert "".join(iter_task_list(tasks, count=5)) == render_task_list(tasks)
+
+    def test_one_piece_per_task(self):
+        pieces = list(iter_task_list(_tasks(5), count=5, styles="none"))
+        assert len(pieces) == 7
+
+    def test_consumes_lazily(self):
+        pulled = []
+
+        def source():
+            for task in _tasks(1000):
+                pulled.append(task["id"])
+                yield task
+
+        pieces = iter_task_list(source(), styles="none")
+        for _ in range(3):
+            next(pieces)
+        assert pulled == [1, 2]
+
+    def test_count_follows_without_header(self):
+        html = "".join(iter_task_list(iter(_tasks(3)), styles="none"))
+        assert 'class="header"' not in html
+        assert '<div class="footer">3 task(s)</div>' in html
+        assert html.endswith("</inline-card>")
+
+    def test_empty(self):
+        assert "".join(iter_task_list(iter([]))) == render_task_list([])
+
+
+def _row(task_id, parent_id=None, completed=False):
+    return {"id": task_id, "title": f"Task {task_id}", "completed": completed, "parent_id": parent_id}
+
+
+def _depths(html):
+    return [int(depth) for depth in re.findall(r'class="node" style="--depth:(\d+)"', html)]
+
+
+class TestRenderTaskTree:
+    def test_nests_flat_rows(self):
+        rows = [_row(1), _row(2, 1), _row(3, 2), _row(4)]
+        html = render_task_tree(rows, max_depth=5)
+        assert "4 task(s)" in html
+        assert _depths(html) == [0, 1, 2, 0]
+        assert html.index("Task 3") < html.index("Task 4")
+
+    def test_accepts_nested_nodes(self):
+        tree = [{"id": 1, "title": "Root", "subtasks": [{"id": 2, "title": "Child", "subtasks": []}]}]
+        html = render_task_tree(tree)
+        assert _depths(html) == [0, 1]
+        assert html.index("Root") < html.index("Child")
+
+    def test_collapses_below_max_depth(self):
+        rows = [_row(1), _row(2, 1), _row(3, 2, completed=True), _row(4, 2), _row(5, 3, completed=True)]
+        html = render_task_tree(rows, max_depth=1)
+        assert _depths(html) == [0, 1]
+        assert '<div class="hidden" style="--depth:2">+3 hidden · 2/3 done</div>' in html
+        assert "Task 3" not in html
+        assert "5 task(s)" in html
+
+    def test_roots_only(self):
+        html = render_task_tree([_row(1), _row(2, 1), _row(3)], max_depth=0)
+        assert _depths(html) == [0, 0]
+        assert "+1 hidden · 0/1 done" in html
+
+    def test_query_hidden_count_has_no_ratio(self):
+        tree = [{"id": 1, "title": "Root", "subtasks": [], "hidden_subtasks": 4}]
+        html = render_task_tree(tree)
+        assert "+4 hidden</div>" in html
+        assert "5 task(s)" in html
+
+    def test_deep_tree_does_not_recurse(self):
+        rows = [_row(1)] + [_row(i, i - 1) for i in range(2, 5001)]
+        html = render_task_tree(rows, max_depth=10_000)
+        assert _depths(html) == list(range(5000))
+        assert "+" not in html.split("</style>")[-1]
+
+    def test_deep_tree_collapses(self):
+        rows = [_row(1)] + [_row(i, i - 1, completed=i % 2 == 0) for i in range(2, 5001)]
+        html = render_task_tree(rows, max_depth=2)
+        assert "+4997 hidden · 2499/4997 done" in html
+
+    def test_escapes_titles(self):
+        html = render_task_tree([{"id": 1, "title": "<b>x</b>", "parent_id": None}])
+        assert "<b>" not in html
+        assert "&lt;b&gt;" in html
+
+    def test_empty(self):
+        assert "No tasks found" in render_task_tree([])
+
+
+RENDERERS = [
+    lambda styles: render_task_card({"title": "Task", "completed": False}, styles=styles),
+    lambda styles: render_task_list([{"title": "Task", "completed": False}], styles=styles),
+    lambda styles: render_task_list([], styles=styles),
+    lambda styles: render_confirmation("Done", {"title": "Task"}, styles=styles),
+    lambda styles: render_task_hierarchy({"title": "Parent"}, [], styles=styles),
+    lambda styles: render_task_window(_tasks(3), page_size=2, styles=styles),
+    lambda styles: render_task_tree([_row(1), _row(2, 1)], styles=styles),
+    lambda styles: "".join(iter_task_list(_tasks(3), styles=styles)),
+]
+
+
+class TestStyleModes:
+    @pytest.mark.parametrize("render", RENDERERS)
+    def test_inline_embeds_stylesheet(self, render):
+        assert render("inline").count(STYLESHEET) == 1
+
+    @pytest.mark.parametrize("render", RENDERERS)
+    def test_link_references_stylesheet(self, render):
+        html = render("link")
+        assert f'href="{STYLESHEET_URI}"' in html
+        assert "<style>" not in html
+
+    @pytest.mark.parametrize("render", RENDERERS)
+    def test_none_omits_stylesheet(self, render):
+        html = render("none")
+        assert "<style>" not in html
+        assert "<link" not in html
+
+    def test_style_mode_by_name(self):
+        assert [style_mode(name) for name in STYLE_MODES] == ["inline", "link", "none"]
+        with pytest.raises(ValueError, match="Unknown style mode"):
+            style_mode("external")
+
+    def test_render_cards_emits_stylesheet_once(self):
+        cards = [render_task_card({"title": f"Task {i}"}, styles="none") for i in range(5)]
+        html = render_cards(cards)
+        assert html.count("<style>") == 1
+        assert html.index("<style>") < html.index("<inline-card>")
+        assert html.count("<inline-card>") == 5
+
+
+class TestBytesPerTask:
+    TITLE = "Water the plants"
+    # Markup around the title of one card, without the stylesheet
+    CARD_OVERHEAD = 144
+
+    def test_list_item(self):
+        tasks = [{"title": self.TITLE, "completed": i % 2} for i in range(100)]
+        one = len(render_task_list(tasks[:1], styles="none").encode())
+        hundred = len(render_task_list(tasks, styles="none").encode())
+        assert (hundred - one) / 99 <= len(self.TITLE) + 64
+
+    def test_card_without_stylesheet(self):
+        card = render_task_card({"title": self.TITLE, "completed": False}, styles="none")
+        assert len(card.encode()) <= len(self.TITLE) + self.CARD_OVERHEAD
+
+    def test_cards_in_one_response_share_the_stylesheet(self):
+        cards = [render_task_card({"title": self.TITLE}, styles="none") for _ in range(10)]
+        per_task = (len(render_cards(cards).encode()) - len(STYLESHEET)) / 10
+        assert per_task <= len(self.TITLE) + self.CARD_OVERHEAD
+
+
+class TestFragmentCache:
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        _fragment.cache_clear()
+
+    @pytest.fixture
+    def escapes(self, monkeypatch):
+        from html import escape as original
+
+        calls = []
+
+        def escape(text, quote=True):
+            calls.append(text)
+            return original(text, quote)
+
+        monkeypatch.setattr("src.ui.components.html.escape", escape)
+        return calls
+
+    def test_unchanged_tasks_are_escaped_once(self, escapes):
+        tasks = [{"id": i, "title": f"Task {i}", "completed": False} for i in range(3)]
+        first = render_task_list(tasks)
+        assert render_task_list(tasks) == first
+        assert len(escapes) == 3
+        assert fragment_cache_info().hits == 3
+
+    def test_changed_title_is_escaped_again(self, escapes):
+        tasks = [{"id": 1, "title": "Old <title>", "completed": False}]
+        render_task_list(tasks)
+        html = render_task_list([{"id": 1, "title": "New <title>", "completed": False}])
+        assert "New &lt;title&gt;" in html
+        assert "Old" not in html
+        assert escapes == ["Old <title>", "New <title>"]
+
+    def test_completion_change_rerenders(self):
+        task = {"id": 1, "title": "Task", "completed": False}
+        assert "○" in render_task_card(task)
+        assert 'class="status completed"' in render_task_card({**task, "completed": True})
+
+    def test_sqlite_and_bool_completion_share_entries(self):
+        render_task_list([{"id": 1, "title": "Task", "completed": 1}])
+        render_task_list([{"id": 1, "title": "Task", "completed": True}])
+        assert fragment_cache_info().currsize == 1
+
+    def test_fragments_are_per_component(self):
+        task = {"id": 1, "title": "Task", "completed": False}
+        render_task_card(task)
+        render_task_list([task])
+        render_task_hierarchy({"title": "Parent"}, [task])
+        assert fragment_cache_info().currsize == 3
@@ -0,0 +1,143 @@
+import json
+import zlib
+
+import pytest
+from src.compression import CompressionMiddleware, GzipEncoder, negotiate
+from src.observability.metrics import REGISTRY
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+TASKS = [{"id": i, "title": f"Task {i}", "completed": False} for i in range(200)]
+
+
+async def tasks(request):
+    return JSONResponse({"tasks": TASKS})
+
+
+async def small(request):
+    return JSONResponse({"ok": True})
+
+
+async def binary(request):
+    return Response(b"\0" * 4096, media_type="application/octet-stream")
+
+
+async def events(request):
+    async def stream():
+        yield f"event: message\r\ndata: {json.dumps({'tasks': TASKS})}\r\n\r\n"
+        yield "event: message\r\ndata: {}\r\n\r\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@pytest.fixture
+def client():
+    app = Starlette(
+        routes=[Route("/tasks", tasks), Route("/small", small), Route("/binary", binary), Route("/events", events)]
+    )
+    app.add_middleware(CompressionMiddleware, encodings=["zstd", "br", "gzip"], minimum_size=1024)
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    REGISTRY.reset()
+
+
+def _counter(name, **labels):
+    return REGISTRY.counter(name, **labels).value
+
+
+class TestNegotiate:
+    def test_first_preferred_accepted(self):
+        assert negotiate("gzip, br", ["zstd", "br", "gzip"]) == "br"
+
+    def test_zero_quality_excluded(self):
+        assert negotiate("br;q=0, gzip;q=0.5", ["br", "gzip"]) == "gzip"
+
+    def test_wildcard(self):
+        assert negotiate("*", ["br", "gzip"]) == "br"
+        assert negotiate("gzip;q=0, *", ["gzip"]) is None
+
+    def test_nothing_accepted(self):
+        assert negotiate("", ["gzip"]) is None
+        assert negotiate("identity", ["gzip"]) is None
+
+
+class TestCompressionMiddleware:
+    def test_compresses_large_json(self, client):
+        response = client.get("/tasks", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.json() == {"tasks": TASKS}
+        raw = len(json.dumps({"tasks": TASKS}, separators=(",", ":")))
+        assert int(response.headers["content-length"]) < raw / 4
+        assert _counter("http_compression_input_bytes_total", encoding="gzip") == raw
+        assert _counter("http_compression_output_bytes_total", encoding="gzip") == int(
+            response.headers["content-length"]
+        )
+
+    def test_small_response_uncompressed(self, client):
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.json() == {"ok": True}
+        assert _counter("http_compression_skipped_total", reason="small") == 1
+
+    def test_not_accepted(self, client):
+        response = client.get("/tasks", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert _counter("http_compression_skipped_total", reason="not_accepted") == 1
+
+    def test_incompressible_type_untouched(self, client):
+        response = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.content == b"\0" * 4096
+
+    def test_sse_stream_compressed(self, client):
+        response = client.get("/events", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.text.count("event: message") == 2
+
+    async def test_each_sse_event_decodable_on_arrival(self):
+        app = CompressionMiddleware(Starlette(routes=[Route("/events", events)]), encodings=["gzip"])
+        sent = []
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/events",
+            "raw_path": b"/events",
+            "root_path": "",
+            "scheme": "http",
+            "query_string": b"",
+            "headers": [(b"accept-encoding", b"gzip")],
+            "server": ("testserver", 80),
+        }
+        await app(scope, receive, send)
+
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        frames = [decoder.decompress(m["body"]) for m in sent if m["type"] == "http.response.body"]
+        events_seen = [frame for frame in frames if frame]
+        # Both events decode completely from their own chunk, without the trailer
+        assert len(events_seen) == 2
+        assert all(frame.endswith(b"\r\n\r\n") for frame in events_seen)
+        assert json.loads(events_seen[0].split(b"data: ", 1)[1]) == {"tasks": TASKS}
+
+    def test_unavailable_encodings_ignored(self):
+        app = CompressionMiddleware(Starlette(), encodings=["snappy", "gzip"])
+        assert app.encodings == ["gzip"]
+
+
+def test_gzip_encoder_round_trip():
+    encoder = GzipEncoder(level=1)
+    data = encoder.compress(b"hello ") + encoder.flush() + encoder.compress(b"world") + encoder.finish()
+    assert zlib.decompress(data, 16 + zlib.MAX_WBITS) == b"hello world"
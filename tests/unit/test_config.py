@@ -6,9 +6,16 @@ def test_config_defaults(monkeypatch):
     monkeypatch.delenv("MCP_SERVER_HOST", raising=False)
     monkeypatch.delenv("MCP_SERVER_PORT", raising=False)
     monkeypatch.delenv("LOG_LEVEL", raising=False)
+    monkeypatch.delenv("MCP_STRUCTURED_OUTPUT", raising=False)
+    monkeypatch.delenv("LOG_FORMAT", raising=False)
+    monkeypatch.delenv("MCP_STATELESS_HTTP", raising=False)
+    monkeypatch.delenv("SESSION_STORE", raising=False)
+    monkeypatch.delenv("WORKERS", raising=False)
+    monkeypatch.delenv("SERVER_LOOP", raising=False)
 
     # Re-import to pick up cleared env vars
     import importlib
+
     import src.config
 
     importlib.reload(src.config)
@@ -17,6 +24,17 @@ def test_config_defaults(monkeypatch):
     assert src.config.MCP_SERVER_HOST == "localhost"
     assert src.config.MCP_SERVER_PORT == 8000
     assert src.config.LOG_LEVEL == "INFO"
+    assert src.config.LOG_FORMAT == "json"
+    assert src.config.MCP_STRUCTURED_OUTPUT is False
+    assert src.config.TREE_MAX_DEPTH == 10
+    assert src.config.TREE_MAX_NODES == 1000
+    assert src.config.ADMISSION_MAX_IN_FLIGHT == 32
+    assert src.config.ADMISSION_QUEUE_TIMEOUT == 5.0
+    assert src.config.MCP_STATELESS_HTTP is False
+    assert src.config.MCP_JSON_RESPONSE is False
+    assert src.config.SESSION_STORE == "memory"
+    assert src.config.WORKERS == 0
+    assert src.config.SERVER_LOOP == "auto"
 
 
 def test_config_from_env(monkeypatch, tmp_path):
@@ -24,8 +42,10 @@ def test_config_from_env(monkeypatch, tmp_path):
     monkeypatch.setenv("MCP_SERVER_HOST", "0.0.0.0")
     monkeypatch.setenv("MCP_SERVER_PORT", "9000")
     monkeypatch.setenv("LOG_LEVEL", "DEBUG")
+    monkeypatch.setenv("MCP_STRUCTURED_OUTPUT", "true")
 
     import importlib
+
     import src.config
 
     importlib.reload(src.config)
@@ -34,3 +54,18 @@ def test_config_from_env(monkeypatch, tmp_path):
     assert src.config.MCP_SERVER_HOST == "0.0.0.0"
     assert src.config.MCP_SERVER_PORT == 9000
     assert src.config.LOG_LEVEL == "DEBUG"
+    assert src.config.MCP_STRUCTURED_OUTPUT is True
+
+
+def test_tool_timeouts_from_env(monkeypatch):
+    monkeypatch.setenv("TOOL_TIMEOUT", "3")
+    monkeypatch.setenv("TOOL_TIMEOUTS", "list_tasks=5, task_stats=0.5")
+
+    import importlib
+
+    import src.config
+
+    importlib.reload(src.config)
+
+    assert src.config.TOOL_TIMEOUT == 3.0
+    assert src.config.TOOL_TIMEOUTS == {"list_tasks": 5.0, "task_stats": 0.5}
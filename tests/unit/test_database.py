@@ -1,8 +1,18 @@
+import asyncio
+
 import aiosqlite
 import pytest
-
+from src.database.changes import LIST_FILTERS, list_uri, task_uri
 from src.database.connection import get_connection, init_db
-
+from src.database.models import (
+    TASK_FIELDS,
+    TaskFields,
+    TaskRepository,
+    TaskRow,
+    measure_db_time,
+)
+from src.database.singleflight import SingleFlight
+from src.observability.metrics import REGISTRY
 
 # --- connection.py tests ---
 
@@ -32,6 +42,13 @@ class TestGetConnection:
         assert row[0] == "wal"
         await db.close()
 
+    async def test_busy_timeout(self, tmp_path):
+        db = await get_connection(str(tmp_path / "test.db"), busy_timeout=2.5)
+        cursor = await db.execute("PRAGMA busy_timeout")
+        row = await cursor.fetchone()
+        assert row[0] == 2500
+        await db.close()
+
 
 class TestInitDb:
     async def test_creates_tasks_table(self, test_db):
@@ -45,7 +62,27 @@ class TestInitDb:
             "SELECT name FROM sqlite_master WHERE type='index' AND name LIKE 'idx_tasks_%'"
         )
         indexes = {row[0] for row in await cursor.fetchall()}
-        assert indexes == {"idx_tasks_completed", "idx_tasks_parent_id"}
+        assert indexes == {
+            "idx_tasks_created_at",
+            "idx_tasks_completed_created_at",
+            "idx_tasks_parent_id_created_at",
+            "idx_tasks_title",
+        }
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "SELECT id FROM tasks WHERE completed = 0 ORDER BY tasks.created_at DESC LIMIT 5",
+            "SELECT id FROM tasks WHERE parent_id = 1 ORDER BY tasks.created_at",
+            "SELECT id FROM tasks ORDER BY tasks.title LIMIT 5",
+            "SELECT id FROM tasks ORDER BY tasks.created_at DESC LIMIT 5",
+        ],
+    )
+    async def test_sorted_queries_avoid_temp_sort(self, test_db, query):
+        cursor = await test_db.execute(f"EXPLAIN QUERY PLAN {query}")
+        plan = " ".join(row[3] for row in await cursor.fetchall())
+        assert "USING INDEX" in plan or "USING COVERING INDEX" in plan
+        assert "TEMP B-TREE" not in plan
 
     async def test_idempotent(self, test_db):
         """Calling init_db twice should not raise."""
@@ -64,6 +101,12 @@ class TestCreate:
         assert task["id"] is not None
         assert task["created_at"] is not None
 
+    async def test_returns_a_typed_task_row(self, task_repo):
+        task = await task_repo.create("Typed")
+        assert tuple(task) == TASK_FIELDS == tuple(TaskRow.__annotations__)
+        assert tuple(TaskFields.__annotations__) == TASK_FIELDS
+        assert isinstance(task["id"], int) and isinstance(task["created_at"], str)
+
     async def test_create_with_parent(self, task_repo, sample_task):
         child = await task_repo.create("Subtask", parent_id=sample_task["id"])
         assert child["parent_id"] == sample_task["id"]
@@ -179,3 +222,311 @@ class TestCreateSubtasks:
         titles = ["Milk", "Eggs", "Bread"]
         subs = await task_repo.create_subtasks(sample_task["id"], titles)
         assert [s["title"] for s in subs] == titles
+
+
+class TestGetAllOptions:
+    async def test_projection(self, task_repo, sample_task):
+        [task] = await task_repo.get_all(fields=["title"])
+        assert task == {"title": "Sample task"}
+
+    async def test_projection_keeps_column_order(self, task_repo, sample_task):
+        [task] = await task_repo.get_all(fields=["parent_id", "id"])
+        assert list(task) == ["id", "parent_id"]
+
+    async def test_order_by_title_desc(self, task_repo):
+        for title in ("b", "c", "a"):
+            await task_repo.create(title)
+        tasks = await task_repo.get_all(order_by="title", descending=True)
+        assert [t["title"] for t in tasks] == ["c", "b", "a"]
+
+    async def test_limit(self, task_repo):
+        for title in ("a", "b", "c"):
+            await task_repo.create(title)
+        tasks = await task_repo.get_all(order_by="id", descending=True, limit=2)
+        assert [t["title"] for t in tasks] == ["c", "b"]
+
+
+class TestCount:
+    async def test_counts_by_filter_and_parent(self, task_repo, sample_task):
+        subs = await task_repo.create_subtasks(sample_task["id"], ["A", "B", "C"])
+        await task_repo.update_completed(subs[0]["id"], True)
+        assert await task_repo.count() == {"total": 4, "completed": 1}
+        assert await task_repo.count(filter="complete") == {"total": 1, "completed": 1}
+        assert await task_repo.count(filter="incomplete") == {"total": 3, "completed": 0}
+        assert await task_repo.count(parent_id=sample_task["id"]) == {"total": 3, "completed": 1}
+
+    async def test_unknown_parent_has_no_tasks(self, task_repo):
+        assert await task_repo.count(parent_id=999) == {"total": 0, "completed": 0}
+
+
+class TestGetTree:
+    async def _build(self, task_repo):
+        root = await task_repo.create("Root")
+        child = await task_repo.create("Child", parent_id=root["id"])
+        grandchild = await task_repo.create("Grandchild", parent_id=child["id"])
+        await task_repo.create("Other root")
+        return root, child, grandchild
+
+    async def test_breadth_first_with_depth(self, task_repo):
+        _, _, grandchild = await self._build(task_repo)
+        rows, truncated = await task_repo.get_tree(max_depth=5)
+        assert [r["depth"] for r in rows] == [0, 0, 1, 2]
+        assert rows[-1]["id"] == grandchild["id"]
+        assert truncated is False
+
+    async def test_depth_limit_counts_hidden(self, task_repo):
+        root, child, _ = await self._build(task_repo)
+        rows, _ = await task_repo.get_tree(max_depth=1)
+        by_id = {r["id"]: r for r in rows}
+        assert len(rows) == 3
+        assert by_id[child["id"]]["hidden_subtasks"] == 1
+        assert by_id[root["id"]]["hidden_subtasks"] == 0
+
+    async def test_node_budget(self, task_repo):
+        await self._build(task_repo)
+        rows, truncated = await task_repo.get_tree(max_depth=5, max_nodes=2)
+        assert len(rows) == 2
+        assert truncated is True
+
+    async def test_rooted_at_parent(self, task_repo):
+        root, child, grandchild = await self._build(task_repo)
+        rows, _ = await task_repo.get_tree(parent_id=root["id"], max_depth=5)
+        assert [r["id"] for r in rows] == [child["id"], grandchild["id"]]
+
+    async def test_filter_applies_at_every_level(self, task_repo):
+        _, child, _ = await self._build(task_repo)
+        await task_repo.update_completed(child["id"], True)
+        rows, _ = await task_repo.get_tree(filter="incomplete", max_depth=5)
+        assert child["id"] not in {r["id"] for r in rows}
+        assert len(rows) == 2
+
+
+class TestStatsAggregates:
+    async def _group_by(self, test_db):
+        cursor = await test_db.execute(
+            "SELECT COALESCE(parent_id, 0), COUNT(*), SUM(completed) FROM tasks GROUP BY parent_id"
+        )
+        expected = {row[0]: (row[1], row[2]) for row in await cursor.fetchall()}
+        cursor = await test_db.execute("SELECT COUNT(*), COALESCE(SUM(completed), 0) FROM tasks")
+        expected[0] = tuple(await cursor.fetchone())
+        return expected
+
+    async def _aggregates(self, test_db):
+        cursor = await test_db.execute("SELECT parent_id, total, completed FROM task_counts WHERE total > 0")
+        return {row[0]: (row[1], row[2]) for row in await cursor.fetchall()}
+
+    async def test_triggers_match_group_by(self, task_repo, test_db, sample_task):
+        subs = await task_repo.create_subtasks(sample_task["id"], ["A", "B", "C"])
+        await task_repo.create_subtasks(subs[0]["id"], ["X", "Y"])
+        await task_repo.update_completed(subs[1]["id"], True)
+        await task_repo.update_completed(subs[2]["id"], True)
+        await task_repo.update_completed(subs[2]["id"], False)
+        await task_repo.delete(subs[0]["id"])
+        assert await self._aggregates(test_db) == await self._group_by(test_db)
+
+    async def test_backfill_existing_tasks(self, task_repo, test_db, sample_task):
+        await task_repo.create_subtasks(sample_task["id"], ["A", "B"])
+        await test_db.execute("DELETE FROM task_counts")
+        await init_db(test_db)
+        assert await self._aggregates(test_db) == await self._group_by(test_db)
+
+    async def test_concurrent_init_backfills_once(self, tmp_path):
+        path = str(tmp_path / "test.db")
+        db = await get_connection(path)
+        await init_db(db)
+        repo = TaskRepository(db)
+        parent = await repo.create("Parent")
+        await repo.create_subtasks(parent["id"], ["A", "B"])
+        await db.execute("DELETE FROM task_counts")
+        await db.commit()
+
+        # As when several worker processes start against the same file
+        others = [await get_connection(path) for _ in range(4)]
+        try:
+            await asyncio.gather(*(init_db(other) for other in others))
+        finally:
+            for other in others:
+                await other.close()
+        assert await self._aggregates(db) == await self._group_by(db)
+        await db.close()
+
+    async def test_get_stats(self, task_repo, sample_task):
+        await task_repo.create_subtasks(sample_task["id"], ["A", "B"])
+        stats = await task_repo.get_stats(top_parents=3)
+        assert stats["total"] == 3
+        assert stats["parents"] == [
+            {"id": sample_task["id"], "title": "Sample task", "total": 2, "completed": 0}
+        ]
+        assert stats["daily"][0]["created"] == 3
+
+
+class TestMeasureDbTime:
+    async def test_accumulates_statement_time(self, task_repo):
+        with measure_db_time() as elapsed:
+            await task_repo.create("Timed")
+        assert elapsed[0] > 0
+
+    async def test_statement_metrics_by_method(self, task_repo):
+        create = REGISTRY.histogram("db_statement_duration_seconds", method="create")
+        get_by_id = REGISTRY.histogram("db_statement_duration_seconds", method="get_by_id")
+        commits = REGISTRY.counter("db_commits_total")
+        before = create.count, get_by_id.count, commits.value
+        await task_repo.create("Counted")
+        assert (create.count, get_by_id.count, commits.value) == (
+            before[0] + 1,
+            before[1] + 1,
+            before[2] + 1,
+        )
+
+    async def test_no_accumulator_outside_block(self, task_repo):
+        with measure_db_time() as elapsed:
+            pass
+        await task_repo.create("Untimed")
+        assert elapsed[0] == 0
+
+
+class TestReadCoalescing:
+    async def test_identical_concurrent_reads_share_one_query(self, task_repo, sample_task):
+        results = await asyncio.gather(
+            *(task_repo.get_all(filter="all", fields=["id", "title"]) for _ in range(4)),
+            task_repo.get_by_id(sample_task["id"]),
+        )
+        assert results[0] == [{"id": sample_task["id"], "title": "Sample task"}]
+        assert all(r is results[0] for r in results[1:4])
+        assert results[4] == sample_task
+        assert task_repo.flight.coalesced == 3
+
+    async def test_write_bumps_generation(self, task_repo):
+        generation = task_repo.flight.generation
+        task = await task_repo.create("New")
+        assert task_repo.flight.generation > generation
+        assert [t["id"] for t in await task_repo.get_all()] == [task["id"]]
+
+    async def test_repositories_share_a_flight(self, test_db, sample_task):
+        flight = SingleFlight()
+        repos = [TaskRepository(test_db, flight=flight) for _ in range(3)]
+        await asyncio.gather(*(repo.get_stats() for repo in repos))
+        assert flight.coalesced == 2
+
+
+class TestChangePublishing:
+    async def watch(self, repo, topics):
+        seen = set()
+
+        async def deliver(uri):
+            seen.add(uri)
+
+        repo.changes.window = 0
+        for topic in topics:
+            repo.changes.subscribe("watcher", topic, deliver)
+        return seen
+
+    async def settle(self):
+        await asyncio.sleep(0.02)
+
+    async def test_create_publishes_task_and_open_lists(self, task_repo):
+        seen = await self.watch(task_repo, [task_uri(1), *map(list_uri, LIST_FILTERS)])
+        await task_repo.create("New")
+        await self.settle()
+        assert seen == {"task://1", "tasks://list?filter=all", "tasks://list?filter=incomplete"}
+
+    async def test_update_publishes_task_and_lists(self, task_repo, sample_task):
+        seen = await self.watch(task_repo, [task_uri(sample_task["id"]), list_uri("complete")])
+        await task_repo.update_completed(sample_task["id"], True)
+        await self.settle()
+        assert seen == {task_uri(sample_task["id"]), "tasks://list?filter=complete"}
+
+    async def test_delete_publishes_cascaded_subtasks(self, task_repo, sample_task):
+        child = await task_repo.create("Child", parent_id=sample_task["id"])
+        grandchild = await task_repo.create("Grandchild", parent_id=child["id"])
+        seen = await self.watch(task_repo, [task_uri(grandchild["id"])])
+        await task_repo.delete(sample_task["id"])
+        await self.settle()
+        assert seen == {task_uri(grandchild["id"])}
+
+    async def test_failed_delete_publishes_nothing(self, task_repo):
+        seen = await self.watch(task_repo, [list_uri()])
+        assert not await task_repo.delete(999)
+        await self.settle()
+        assert seen == set()
+
+
+# Counts to a billion; takes far longer than any test unless interrupted
+_SLOW_QUERY = (
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1000000000)"
+    " SELECT count(*) FROM n"
+)
+
+
+class TestCancellation:
+    async def test_cancelled_read_interrupts_statement(self, task_repo):
+        slow = asyncio.create_task(task_repo._fetchone(_SLOW_QUERY, method="test"))
+        await asyncio.sleep(0.05)
+        slow.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await slow
+        # The connection is free again rather than still counting
+        assert await asyncio.wait_for(task_repo.get_all(), 1) == []
+
+    async def test_cancelled_queued_read_spares_the_running_one(self, task_repo, sample_task):
+        running = asyncio.create_task(task_repo._fetchone("SELECT count(*) FROM tasks, tasks AS b", method="test"))
+        slow = asyncio.create_task(task_repo._fetchone(_SLOW_QUERY, method="test"))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(task_repo.get_by_id(sample_task["id"]))
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        await asyncio.sleep(0.05)
+        # The slow read was not interrupted by the queued caller's cancellation
+        assert not slow.done()
+        slow.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await slow
+        assert tuple(await running) == (1,)
+
+    async def test_dropped_read_never_runs(self, task_repo):
+        fetched = []
+        slow = asyncio.create_task(task_repo._fetchone(_SLOW_QUERY, method="test"))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(task_repo._read("SELECT 1", (), fetched.append, method="test"))
+        await asyncio.sleep(0)
+        queued.cancel()
+        slow.cancel()
+        await asyncio.gather(slow, queued, return_exceptions=True)
+        # Statements run in order on the thread, so the queued one was skipped
+        assert await asyncio.wait_for(task_repo.get_all(), 1) == []
+        assert fetched == []
+
+    async def test_no_interrupt_while_writing(self, task_repo):
+        slow = asyncio.create_task(task_repo._fetchone(_SLOW_QUERY, method="test"))
+        await asyncio.sleep(0.05)
+        task_repo._writes += 1
+        try:
+            slow.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await slow
+            assert task_repo._running is not None
+        finally:
+            task_repo._writes -= 1
+        # Nothing interrupted the read, so interrupt it to free the connection
+        task_repo.db._conn.interrupt()
+        assert await asyncio.wait_for(task_repo.get_all(), 1) == []
+
+    async def test_cancelled_write_still_commits(self, task_repo):
+        create = asyncio.create_task(task_repo.create("Kept"))
+        await asyncio.sleep(0)
+        create.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await create
+        await asyncio.sleep(0.05)
+        assert [t["title"] for t in await task_repo.get_all()] == ["Kept"]
+
+
+class TestWarmupQueries:
+    async def test_touch_indexes_scans_each_index(self, task_repo, sample_task):
+        assert await task_repo.touch_indexes() >= 5
+
+    async def test_prepare_statements_leaves_data_untouched(self, task_repo, sample_task):
+        await task_repo.prepare_statements()
+        assert await task_repo.get_all() == [sample_task]
@@ -0,0 +1,38 @@
+import json
+
+from src.tools.encoding import encode_response, encode_stdlib
+
+TASK = {
+    "id": 1,
+    "title": 'Quote " and <tag> and ünïcode',
+    "completed": 0,
+    "created_at": "2026-01-01T12:00:00Z",
+    "parent_id": None,
+}
+
+
+class TestEncodeStdlib:
+    def test_task_list_round_trips(self):
+        result = {"tasks": [TASK, {**TASK, "id": 2, "parent_id": 1}], "total": 2}
+        assert json.loads(encode_stdlib(result)) == result
+
+    def test_single_task_round_trips(self):
+        result = {"task": {**TASK, "completed": True}, "ui": "<inline-card>x</inline-card>"}
+        assert json.loads(encode_stdlib(result)) == result
+
+    def test_matches_json_dumps(self):
+        result = {"tasks": [TASK], "total": 1, "filter_applied": "all"}
+        assert encode_stdlib(result) == json.dumps(result)
+
+    def test_non_task_dicts_use_generic_encoder(self):
+        result = {"error": {"code": "TASK_NOT_FOUND", "message": "x", "details": None}}
+        assert json.loads(encode_stdlib(result)) == result
+
+    def test_empty_list(self):
+        assert json.loads(encode_stdlib({"tasks": []})) == {"tasks": []}
+
+
+class TestEncodeResponse:
+    def test_round_trips(self):
+        result = {"tasks": [TASK], "total": 1}
+        assert json.loads(encode_response(result)) == result
@@ -0,0 +1,39 @@
+from src.observability.exposition import render_prometheus
+from src.observability.metrics import MetricsRegistry
+from src.observability.process import resident_memory_bytes
+
+
+def _registry():
+    registry = MetricsRegistry()
+    registry.counter("calls_total", "Calls", tool="add_task").inc(3)
+    registry.gauge("depth", lambda: 2.5, "Queue depth")
+    histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0), tool="add_task")
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+    return registry
+
+
+class TestRenderPrometheus:
+    def test_counter_and_gauge(self):
+        text = render_prometheus(_registry())
+        assert "# HELP calls_total Calls\n# TYPE calls_total counter\n" in text
+        assert 'calls_total{tool="add_task"} 3\n' in text
+        assert "# TYPE depth gauge\ndepth 2.5\n" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        lines = render_prometheus(_registry()).splitlines()
+        assert 'latency_seconds_bucket{tool="add_task",le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{tool="add_task",le="1.0"} 2' in lines
+        assert 'latency_seconds_bucket{tool="add_task",le="+Inf"} 3' in lines
+        assert 'latency_seconds_sum{tool="add_task"} 5.55' in lines
+        assert 'latency_seconds_count{tool="add_task"} 3' in lines
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("errors_total", reason='bad "quote"\n').inc()
+        assert 'errors_total{reason="bad \\"quote\\"\\n"} 1' in render_prometheus(registry)
+
+
+def test_resident_memory_is_positive():
+    assert resident_memory_bytes() > 0
@@ -0,0 +1,52 @@
+import socket
+
+import pytest
+from src.launcher import bind_socket, resolve_http, resolve_loop, resolve_workers
+
+
+class TestResolveWorkers:
+    def test_explicit_count(self):
+        assert resolve_workers(4, stateless=True) == 4
+
+    def test_zero_means_one_per_core(self, monkeypatch):
+        monkeypatch.setattr("os.sched_getaffinity", lambda pid: {0, 1, 2}, raising=False)
+        assert resolve_workers(0, stateless=True) == 3
+
+    def test_stateful_sessions_force_one_worker(self, caplog):
+        assert resolve_workers(4, stateless=False) == 1
+        assert "pinned to one process" in caplog.text
+
+
+class TestResolveImplementations:
+    def test_auto_follows_installed_packages(self, monkeypatch):
+        monkeypatch.setattr("importlib.util.find_spec", lambda name: None)
+        assert resolve_loop("auto") == "asyncio"
+        assert resolve_http("auto") == "h11"
+        monkeypatch.setattr("importlib.util.find_spec", lambda name: object())
+        assert resolve_loop("auto") == "uvloop"
+        assert resolve_http("auto") == "httptools"
+
+    def test_explicit_setting_is_kept(self):
+        assert resolve_loop("asyncio") == "asyncio"
+        assert resolve_http("h11") == "h11"
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="needs SO_REUSEPORT")
+class TestBindSocket:
+    def test_workers_share_a_port(self):
+        first = bind_socket("127.0.0.1", 0, reuse_port=True)
+        port = first.getsockname()[1]
+        second = bind_socket("127.0.0.1", port, reuse_port=True)
+        try:
+            assert second.getsockname()[1] == port
+        finally:
+            first.close()
+            second.close()
+
+    def test_port_is_exclusive_without_reuse_port(self):
+        first = bind_socket("127.0.0.1", 0)
+        try:
+            with pytest.raises(OSError):
+                bind_socket("127.0.0.1", first.getsockname()[1])
+        finally:
+            first.close()
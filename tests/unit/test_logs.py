@@ -0,0 +1,42 @@
+import json
+import logging
+import sys
+
+from src.observability.logs import JsonFormatter, configure_logging, shutdown_logging
+
+
+def _record(**extra):
+    record = logging.LogRecord("src.test", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJsonFormatter:
+    def test_standard_fields_and_extras(self):
+        entry = json.loads(JsonFormatter().format(_record(tool="add_task", duration_ms=1.5)))
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "src.test"
+        assert entry["message"] == "hello world"
+        assert entry["ts"].endswith("Z")
+        assert entry["tool"] == "add_task"
+        assert entry["duration_ms"] == 1.5
+        assert "args" not in entry and "msg" not in entry
+
+    def test_exception_is_formatted(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord("src.test", logging.ERROR, __file__, 1, "failed", (), sys.exc_info())
+        entry = json.loads(JsonFormatter().format(record))
+        assert "ValueError: boom" in entry["exc_info"]
+
+
+def test_records_are_written_by_background_listener(capsys):
+    configure_logging("INFO")
+    try:
+        logging.getLogger("src.test").info("queued %d", 1, extra={"tool": "list_tasks"})
+    finally:
+        shutdown_logging()
+    entry = json.loads(capsys.readouterr().err.strip().splitlines()[-1])
+    assert entry["message"] == "queued 1"
+    assert entry["tool"] == "list_tasks"
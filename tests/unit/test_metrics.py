@@ -0,0 +1,71 @@
+import pytest
+from src.observability.metrics import SIZE_BUCKETS, Histogram, MetricsRegistry
+
+
+class TestHistogram:
+    def test_empty_quantile_is_zero(self):
+        assert Histogram().quantile(0.5) == 0.0
+
+    def test_quantiles_within_bucket_error(self):
+        h = Histogram()
+        for i in range(1, 1001):
+            h.observe(i / 1000)
+        assert h.count == 1000
+        assert h.quantile(0.50) == pytest.approx(0.5, rel=0.2)
+        assert h.quantile(0.99) == pytest.approx(0.99, rel=0.2)
+
+    def test_values_above_last_bound(self):
+        h = Histogram(SIZE_BUCKETS)
+        h.observe(SIZE_BUCKETS[-1] * 10)
+        assert h.quantile(0.5) == SIZE_BUCKETS[-1]
+
+    def test_summary_keys(self):
+        h = Histogram()
+        h.observe(0.01)
+        assert set(h.summary()) == {"count", "sum", "p50", "p95", "p99"}
+
+
+class TestMetricsRegistry:
+    def test_counter_get_or_create(self):
+        registry = MetricsRegistry()
+        a = registry.counter("calls", tool="x")
+        assert registry.counter("calls", tool="x") is a
+        assert registry.counter("calls", tool="y") is not a
+
+    def test_histogram_keeps_first_buckets(self):
+        registry = MetricsRegistry()
+        h1 = registry.histogram("size", buckets=SIZE_BUCKETS, tool="a")
+        h2 = registry.histogram("size", tool="b")
+        assert h1.bounds is h2.bounds
+
+    def test_snapshot(self):
+        registry = MetricsRegistry()
+        registry.counter("calls", tool="x").inc(3)
+        registry.histogram("latency", tool="x").observe(0.1)
+        snap = registry.snapshot()
+        assert snap["counters"]["calls"] == [{"labels": {"tool": "x"}, "value": 3}]
+        assert snap["histograms"]["latency"][0]["count"] == 1
+
+    def test_reset_keeps_handles(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("calls")
+        counter.inc()
+        registry.reset()
+        assert counter.value == 0
+        assert registry.counter("calls") is counter
+
+
+class TestGauge:
+    def test_reads_callback_at_collection(self):
+        registry = MetricsRegistry()
+        depth = [1]
+        gauge = registry.gauge("depth", lambda: depth[0])
+        depth[0] = 7
+        assert gauge.value == 7
+        assert registry.snapshot()["gauges"]["depth"] == [{"labels": {}, "value": 7}]
+
+    def test_reregistering_replaces_callback(self):
+        registry = MetricsRegistry()
+        registry.gauge("depth", lambda: 1)
+        registry.gauge("depth", lambda: 2)
+        assert [g.value for g in registry.gauges()["depth"].values()] == [2]
@@ -0,0 +1,39 @@
+import pytest
+from src.resources import TaskListTemplate, parse_resource_uri, resource_topic
+
+
+class TestParseResourceUri:
+    @pytest.mark.parametrize(
+        "uri, expected",
+        [
+            ("task://7", ("task", {"task_id": 7})),
+            ("tasks://list", ("list", {"filter": "all"})),
+            ("tasks://list?filter=complete", ("list", {"filter": "complete"})),
+        ],
+    )
+    def test_known_resources(self, uri, expected):
+        assert parse_resource_uri(uri) == expected
+
+    @pytest.mark.parametrize(
+        "uri",
+        ["task://abc", "task://7?x=1", "tasks://list?filter=done", "tasks://list?limit=5", "tasks://other", "file:///x"],
+    )
+    def test_unknown_resources(self, uri):
+        with pytest.raises(ValueError, match="Unknown resource"):
+            parse_resource_uri(uri)
+
+    def test_equivalent_uris_share_a_topic(self):
+        assert resource_topic("tasks://list") == resource_topic("tasks://list?filter=all")
+        assert resource_topic("task://7/") == resource_topic("task://7") == "task://7"
+
+
+class TestTaskListTemplate:
+    def test_matches_list_uris_only(self):
+        async def read(filter: str = "all") -> str:
+            return filter
+
+        template = TaskListTemplate.from_function(read, uri_template="tasks://list{?filter}")
+        assert template.matches("tasks://list") == {"filter": "all"}
+        assert template.matches("tasks://list?filter=incomplete") == {"filter": "incomplete"}
+        assert template.matches("task://1") is None
+        assert template.matches("tasks://list?filter=nope") is None
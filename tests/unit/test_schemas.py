@@ -2,12 +2,11 @@ from datetime import datetime
 
 import pytest
 from pydantic import ValidationError
-
 from src.tools.schemas import (
     AddTaskInput,
     CompleteTaskInput,
-    DeleteTaskInput,
     DecomposeTaskInput,
+    DeleteTaskInput,
     ErrorCode,
     ListTasksInput,
     Task,
@@ -15,7 +14,6 @@ from src.tools.schemas import (
     ToolError,
 )
 
-
 # --- Error Handling ---
 
 
@@ -25,6 +23,9 @@ class TestErrorCode:
         assert ErrorCode.TASK_NOT_FOUND.value == "TASK_NOT_FOUND"
         assert ErrorCode.DATABASE_ERROR.value == "DATABASE_ERROR"
         assert ErrorCode.INTERNAL_ERROR.value == "INTERNAL_ERROR"
+        assert ErrorCode.RATE_LIMITED.value == "RATE_LIMITED"
+        assert ErrorCode.TIMEOUT.value == "TIMEOUT"
+        assert ErrorCode.UNAVAILABLE.value == "UNAVAILABLE"
 
 
 class TestToolError:
@@ -177,6 +178,32 @@ class TestListTasksInput:
             ListTasksInput(parent_id=0)
 
 
+    def test_order_by_default(self):
+        assert ListTasksInput().order_by == "created_at asc"
+
+    def test_order_by_with_direction(self):
+        assert ListTasksInput(order_by="Title DESC").order_by == "title desc"
+
+    def test_order_by_invalid_column_fails(self):
+        with pytest.raises(ValidationError):
+            ListTasksInput(order_by="completed")
+
+    def test_order_by_invalid_direction_fails(self):
+        with pytest.raises(ValidationError):
+            ListTasksInput(order_by="id sideways")
+
+    def test_fields_valid(self):
+        assert ListTasksInput(fields=["id", "title"]).fields == ["id", "title"]
+
+    def test_fields_unknown_fails(self):
+        with pytest.raises(ValidationError):
+            ListTasksInput(fields=["secret"])
+
+    def test_limit_zero_fails(self):
+        with pytest.raises(ValidationError):
+            ListTasksInput(limit=0)
+
+
 class TestCompleteTaskInput:
     def test_valid(self):
         inp = CompleteTaskInput(task_id=1)
@@ -0,0 +1,86 @@
+import pytest
+from src.sessions import InMemorySessionStore, SqliteSessionStore, create_session_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+async def store(request, tmp_path):
+    store = create_session_store(request.param, str(tmp_path / "sessions.db"), ttl=60)
+    yield store
+    await store.close()
+
+
+class TestSessionStore:
+    async def test_get_missing(self, store):
+        assert await store.get("nope") is None
+
+    async def test_put_and_get(self, store):
+        await store.put("abc", {"first_seen": 1.5, "theme": "dark"})
+        assert await store.get("abc") == {"first_seen": 1.5, "theme": "dark"}
+
+    async def test_put_replaces(self, store):
+        await store.put("abc", {"theme": "dark"})
+        await store.put("abc", {"theme": "light"})
+        assert await store.get("abc") == {"theme": "light"}
+
+    async def test_delete(self, store):
+        await store.put("abc", {})
+        await store.delete("abc")
+        await store.delete("abc")
+        assert await store.get("abc") is None
+
+    async def test_expired_session_is_gone(self, store):
+        store.ttl = 0
+        await store.put("abc", {})
+        assert await store.get("abc") is None
+
+
+class TestInMemorySessionStore:
+    async def test_bounded_to_max_size(self):
+        store = InMemorySessionStore(ttl=60, max_size=2)
+        for session_id in ("a", "b", "a", "c"):
+            await store.put(session_id, {})
+        assert list(store._sessions) == ["a", "c"]
+
+    async def test_put_sweeps_expired_sessions(self):
+        store = InMemorySessionStore(ttl=0)
+        await store.put("a", {})
+        await store.put("b", {})
+        store.ttl = 60
+        await store.put("c", {})
+        assert list(store._sessions) == ["c"]
+
+
+class TestSqliteSessionStore:
+    async def test_shared_across_instances(self, tmp_path):
+        path = str(tmp_path / "sessions.db")
+        first = SqliteSessionStore(path, ttl=60)
+        second = SqliteSessionStore(path, ttl=60)
+        try:
+            await first.put("abc", {"first_seen": 1.0})
+            assert await second.get("abc") == {"first_seen": 1.0}
+        finally:
+            await first.close()
+            await second.close()
+
+    async def test_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "sessions.db")
+        store = SqliteSessionStore(path, ttl=60)
+        await store.put("abc", {"first_seen": 1.0})
+        await store.close()
+        store = SqliteSessionStore(path, ttl=60)
+        try:
+            assert await store.get("abc") == {"first_seen": 1.0}
+        finally:
+            await store.close()
+
+    async def test_opens_lazily(self, tmp_path):
+        store = SqliteSessionStore(str(tmp_path / "sessions.db"), ttl=60)
+        await store.close()
+        assert not (tmp_path / "sessions.db").exists()
+
+
+def test_create_session_store_kinds(tmp_path):
+    assert isinstance(create_session_store("memory", "", 60), InMemorySessionStore)
+    assert isinstance(create_session_store("sqlite", str(tmp_path / "s.db"), 60), SqliteSessionStore)
+    with pytest.raises(ValueError, match="Unknown session store"):
+        create_session_store("redis", "", 60)
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from src.database.singleflight import SingleFlight, freeze
+
+
+def _slow(result, calls, delay=0.01):
+    async def fn():
+        calls.append(result)
+        await asyncio.sleep(delay)
+        return result
+
+    return fn
+
+
+class TestFreeze:
+    def test_nested_values_are_hashable_and_order_insensitive(self):
+        assert freeze({"b": [1, 2], "a": {"x": None}}) == freeze({"a": {"x": None}, "b": [1, 2]})
+        hash(freeze({"fields": ["id", "title"]}))
+
+    def test_unhashable_leaf_raises(self):
+        with pytest.raises(TypeError):
+            freeze([bytearray(b"x")])
+
+
+class TestSingleFlight:
+    async def test_concurrent_calls_share_one_run(self):
+        flight, calls = SingleFlight(), []
+        results = await asyncio.gather(*(flight.run("k", _slow("r", calls)) for _ in range(5)))
+        assert results == ["r"] * 5
+        assert calls == ["r"]
+        assert flight.coalesced == 4
+
+    async def test_different_keys_run_separately(self):
+        flight, calls = SingleFlight(), []
+        await asyncio.gather(flight.run("a", _slow("a", calls)), flight.run("b", _slow("b", calls)))
+        assert sorted(calls) == ["a", "b"]
+
+    async def test_sequential_calls_are_not_cached(self):
+        flight, calls = SingleFlight(), []
+        await flight.run("k", _slow(1, calls))
+        await flight.run("k", _slow(2, calls))
+        assert calls == [1, 2]
+
+    async def test_invalidate_starts_new_generation(self):
+        flight, calls = SingleFlight(), []
+        first = asyncio.create_task(flight.run("k", _slow("old", calls)))
+        await asyncio.sleep(0)
+        flight.invalidate()
+        assert await flight.run("k", _slow("new", calls)) == "new"
+        assert await first == "old"
+        assert calls == ["old", "new"]
+
+    async def test_error_is_shared(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(flight.run("k", fail), flight.run("k", fail), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def test_waiter_runs_its_own_when_leader_is_cancelled(self):
+        flight, calls = SingleFlight(), []
+        leader = asyncio.create_task(flight.run("k", _slow("leader", calls, delay=1)))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.run("k", _slow("follower", calls)))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "follower"
+        assert calls == ["leader", "follower"]
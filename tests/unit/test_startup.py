@@ -0,0 +1,19 @@
+from src.startup import parse_importtime
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:      1000 |       1000 |     pydantic.version
+import time:      2000 |       3000 |   pydantic
+import time:       500 |        500 |     src.tools.schemas
+import time:       250 |        750 |   src.tools
+import time:      4000 |       7750 | src.server
+{"level": "INFO", "message": "not an importtime line"}
+"""
+
+
+def test_parse_importtime_groups_self_time_by_package():
+    report = parse_importtime(IMPORTTIME, top=2)
+    assert report["total_ms"] == 7.8
+    assert report["by_package"] == {"src.server": 4.0, "pydantic": 3.0, "src.tools": 0.8}
+    assert list(report["by_package"]) == ["src.server", "pydantic", "src.tools"]
+    assert report["slowest_modules"] == {"src.server": 4.0, "pydantic": 2.0}
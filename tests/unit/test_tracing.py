@@ -0,0 +1,72 @@
+import json
+
+from src.observability.tracing import JsonLinesExporter, RingBufferExporter, Tracer
+
+
+def _tracer(rate=1.0, capacity=100):
+    return Tracer(rate, RingBufferExporter(capacity))
+
+
+class TestTracer:
+    def test_nested_spans_share_trace(self):
+        tracer = _tracer()
+        with tracer.span("root", tool="add_task"), tracer.span("child") as child:
+            child.set("rows", 3)
+        root, child_span = tracer.exporter.query()
+        assert root["name"] == "root" and root["parent_id"] is None
+        assert root["attributes"] == {"tool": "add_task"}
+        assert child_span["trace_id"] == root["trace_id"]
+        assert child_span["parent_id"] == root["span_id"]
+        assert child_span["attributes"] == {"rows": 3}
+
+    def test_sampling_off_records_nothing(self):
+        tracer = _tracer(rate=0.0)
+        with tracer.span("root") as root:
+            root.set("ignored", True)
+            with tracer.span("child"):
+                pass
+        assert tracer.exporter.query() == []
+
+    def test_sampling_is_decided_at_the_root(self):
+        tracer = _tracer(rate=0.5)
+        for _ in range(200):
+            with tracer.span("root"), tracer.span("child"):
+                pass
+        spans = tracer.exporter.query(limit=1000)
+        roots = {s["span_id"] for s in spans if s["parent_id"] is None}
+        children = [s for s in spans if s["parent_id"] is not None]
+        assert 0 < len(roots) < 200
+        assert len(children) == len(roots)
+        assert all(c["parent_id"] in roots for c in children)
+
+    def test_error_is_recorded(self):
+        tracer = _tracer()
+        try:
+            with tracer.span("root"):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+        assert tracer.exporter.query()[0]["attributes"]["error"] == "ValueError"
+
+
+class TestRingBufferExporter:
+    def test_keeps_most_recent_and_filters(self):
+        tracer = _tracer(capacity=3)
+        for i in range(5):
+            with tracer.span(f"span-{i}"):
+                pass
+        spans = tracer.exporter.query()
+        assert [s["name"] for s in spans] == ["span-4", "span-3", "span-2"]
+        assert tracer.exporter.query(spans[1]["trace_id"]) == [spans[1]]
+        assert len(tracer.exporter.query(limit=1)) == 1
+
+
+class TestJsonLinesExporter:
+    def test_writes_one_line_per_span(self, tmp_path):
+        exporter = JsonLinesExporter(str(tmp_path / "spans.jsonl"))
+        tracer = Tracer(1.0, exporter)
+        with tracer.span("root"), tracer.span("child"):
+            pass
+        lines = (tmp_path / "spans.jsonl").read_text().splitlines()
+        exporter.close()
+        assert [json.loads(line)["name"] for line in lines] == ["child", "root"]
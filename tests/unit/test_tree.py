@@ -0,0 +1,38 @@
+from src.tools.tree import build_tree
+
+
+def _row(id, parent_id=None, **extra):
+    return {"id": id, "title": f"T{id}", "completed": 0, "parent_id": parent_id, **extra}
+
+
+class TestBuildTree:
+    def test_empty(self):
+        assert build_tree([]) == []
+
+    def test_nests_children(self):
+        roots = build_tree([_row(1), _row(2, 1), _row(3, 2), _row(4)])
+        assert [r["id"] for r in roots] == [1, 4]
+        assert roots[0]["subtasks"][0]["subtasks"][0]["id"] == 3
+
+    def test_children_before_parents(self):
+        roots = build_tree([_row(3, 2), _row(2, 1), _row(1)])
+        assert [r["id"] for r in roots] == [1]
+        assert roots[0]["subtasks"][0]["subtasks"][0]["id"] == 3
+
+    def test_missing_parent_becomes_root(self):
+        roots = build_tree([_row(5, 99)])
+        assert [r["id"] for r in roots] == [5]
+
+    def test_drops_bookkeeping_columns(self):
+        [root] = build_tree([_row(1, depth=0, hidden_subtasks=0)])
+        assert "depth" not in root
+        assert "hidden_subtasks" not in root
+
+    def test_keeps_hidden_count(self):
+        [root] = build_tree([_row(1, depth=0, hidden_subtasks=3)])
+        assert root["hidden_subtasks"] == 3
+
+    def test_does_not_mutate_rows(self):
+        row = _row(1, depth=0)
+        build_tree([row])
+        assert "subtasks" not in row